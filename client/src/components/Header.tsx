@@ -19,11 +19,17 @@ export function Header({ title }: { title: string }) {
   const [isDropdownOpen, setIsDropdownOpen] = useState(false);
   const dropdownRef = useRef<HTMLDivElement>(null);
 
-  // Poll for unread count every 10 seconds
+  // Unread count and new notifications are pushed by the server (EventSource reconnects on its own)
   useEffect(() => {
-    fetchUnreadCount();
-    const interval = setInterval(fetchUnreadCount, 10000);
-    return () => clearInterval(interval);
+    const events = new EventSource(`${API_BASE_URL}/api/notifications/stream`);
+    events.addEventListener("unread-count", (e) => {
+      setUnreadCount(JSON.parse((e as MessageEvent).data).count);
+    });
+    events.addEventListener("notification", (e) => {
+      const notification: Notification = JSON.parse((e as MessageEvent).data);
+      setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)].slice(0, 50));
+    });
+    return () => events.close();
   }, []);
 
   // Fetch notifications when dropdown opens
@@ -44,16 +50,6 @@ export function Header({ title }: { title: string }) {
     return () => document.removeEventListener("mousedown", handleClickOutside);
   }, []);
 
-  const fetchUnreadCount = async () => {
-    try {
-      const res = await fetch(`${API_BASE_URL}/api/notifications/unread-count`);
-      const data = await res.json();
-      setUnreadCount(data.count);
-    } catch (e) {
-      console.error("Failed to fetch unread count", e);
-    }
-  };
-
   const fetchNotifications = async () => {
     try {
       const res = await fetch(`${API_BASE_URL}/api/notifications`);
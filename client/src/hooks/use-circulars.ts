@@ -16,12 +16,11 @@ export interface Circular {
   summary: string | null;
 }
 
-export function useCirculars(search?: string, category?: string) {
+export function useCirculars(category?: string) {
   return useQuery({
-    queryKey: [apiRoutes.circulars.list.path, search, category],
+    queryKey: [apiRoutes.circulars.list.path, category],
     queryFn: async () => {
       const params = new URLSearchParams();
-      if (search) params.append("search", search);
       if (category) params.append("category", category);
 
       const url = `${API_BASE_URL}${apiRoutes.circulars.list.path}?${params.toString()}`;
@@ -51,7 +50,16 @@ export function useUploadCircular() {
     mutationFn: async (formData: FormData) => {
       // Changed from /api/circulars/upload to /api/upload as per backend route
       const res = await apiRequest("POST", "/api/upload", formData);
-      return await res.json();
+      const accepted = await res.json();
+
+      // Upload is processed by the ingestion job queue; poll until it finishes
+      while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const jobRes = await apiRequest("GET", accepted.status_url);
+        const job = await jobRes.json();
+        if (job.status === "completed") return job.result;
+        if (job.status === "failed") throw new Error(job.error || "Upload failed");
+      }
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: [apiRoutes.circulars.list.path] });
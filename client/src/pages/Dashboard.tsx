@@ -3,7 +3,6 @@ import Layout from "@/components/Layout";
 import { Header } from "@/components/Header";
 import { StatsCard } from "@/components/StatsCard";
 import { Loader } from "@/components/ui/loader";
-import { useCirculars } from "@/hooks/use-circulars";
 import { useQueries } from "@/hooks/use-queries";
 import { useAnalytics } from "@/hooks/use-analytics";
 import {
@@ -26,9 +25,10 @@ import {
 import { motion } from "framer-motion";
 
 export default function Dashboard() {
-  const { data: circulars } = useCirculars();
   const { data: queries } = useQueries();
   const { data: analytics } = useAnalytics();
+  // /api/circulars is paginated: the library-wide count comes from the aggregated analytics
+  const totalCirculars = (analytics as any)?.total_documents || 0;
   const [loading, setLoading] = useState(true);
 
   // Simulate initial loading
@@ -65,7 +65,7 @@ export default function Dashboard() {
             <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6 mb-8">
               <StatsCard
                 label="Total Circulars"
-                value={circulars?.length || 0}
+                value={totalCirculars}
                 icon={FileText}
                 color="cyan"
                 delay={0.1}
@@ -34,6 +34,7 @@ import {
 } from "@/components/ui/table";
 import { EmptyState } from "@/components/ui/empty-state";
 import { useToast } from "@/hooks/use-toast";
+import { useAnalytics } from "@/hooks/use-analytics";
 import {
   AlertDialog,
   AlertDialogAction,
@@ -57,26 +58,38 @@ interface Document {
   file_size?: number;
 }
 
+// Only the columns the table renders; pages are keyset-paginated by the server
+const LIBRARY_FIELDS = "id,title,category,filename,upload_date,file_path,total_pages,file_size";
+const PAGE_SIZE = 100;
+
 export default function Library() {
   const [documents, setDocuments] = useState<Document[]>([]);
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState("");
   const [category, setCategory] = useState("All");
   const [selectedIds, setSelectedIds] = useState<number[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const { toast } = useToast();
+  const { data: stats, refetch: refetchStats } = useAnalytics() as any;
 
   useEffect(() => {
     fetchDocuments();
-  }, []);
+  }, [category]);
 
-  const fetchDocuments = async () => {
+  const fetchDocuments = async (cursor?: string) => {
     try {
-      setLoading(true);
-      const response = await fetch(`${API_BASE_URL}/api/circulars`);
+      if (cursor) setLoadingMore(true);
+      else setLoading(true);
+      const params = new URLSearchParams({ fields: LIBRARY_FIELDS, limit: String(PAGE_SIZE) });
+      if (category !== "All") params.set("category", category);
+      if (cursor) params.set("cursor", cursor);
+      const response = await fetch(`${API_BASE_URL}/api/circulars?${params}`);
       if (!response.ok) throw new Error("Failed to fetch documents");
       const data = await response.json();
-      setDocuments(data);
-      setSelectedIds([]); // Clear selection on refresh
+      setDocuments(prev => (cursor ? [...prev, ...data] : data));
+      setNextCursor(response.headers.get("X-Next-Cursor"));
+      if (!cursor) setSelectedIds([]); // Clear selection on refresh
     } catch (error) {
       console.error("Error:", error);
       toast({
@@ -86,6 +99,7 @@ export default function Library() {
       });
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -123,6 +137,7 @@ export default function Library() {
       });
 
       fetchDocuments();
+      refetchStats();
 
     } catch (error) {
       console.error("Delete Error:", error);
@@ -165,11 +180,10 @@ export default function Library() {
     }
   };
 
-  const totalPages = documents.reduce((acc, doc) => acc + (doc.total_pages || 0), 0);
-  const categoriesCount = documents.reduce((acc: Record<string, number>, doc) => {
-    acc[doc.category] = (acc[doc.category] || 0) + 1;
-    return acc;
-  }, {});
+  // Library-wide totals come from /api/analytics: only the loaded pages are in `documents`
+  const totalDocuments = stats?.total_documents ?? documents.length;
+  const totalPages = stats?.total_pages ?? documents.reduce((acc, doc) => acc + (doc.total_pages || 0), 0);
+  const topCategory = stats?.categories?.[0]?.name || "General";
 
   const isAllSelected = filteredDocs.length > 0 && selectedIds.length === filteredDocs.length;
 
@@ -186,7 +200,7 @@ export default function Library() {
             className="glass-panel p-4 rounded-2xl border border-white/10 flex flex-col gap-1"
           >
             <span className="text-zinc-500 text-xs uppercase tracking-widest font-bold">Total Documents</span>
-            <span className="text-2xl font-bold text-white font-rajdhani">{documents.length}</span>
+            <span className="text-2xl font-bold text-white font-rajdhani">{totalDocuments}</span>
           </motion.div>
           <motion.div
             initial={{ opacity: 0, y: -20 }}
@@ -216,9 +230,7 @@ export default function Library() {
           >
             <span className="text-zinc-500 text-xs uppercase tracking-widest font-bold">Top Category</span>
             <span className="text-2xl font-bold text-orange-400 font-rajdhani">
-              {Object.keys(categoriesCount).length > 0
-                ? Object.entries(categoriesCount).sort((a, b) => b[1] - a[1])[0][0]
-                : "General"}
+              {topCategory}
             </span>
           </motion.div>
         </div>
@@ -395,6 +407,19 @@ export default function Library() {
                       ))}
                     </TableBody>
                   </Table>
+                  {nextCursor && (
+                    <div className="p-4 flex justify-center border-t border-white/10">
+                      <Button
+                        variant="outline"
+                        className="bg-white/5 border-white/10 hover:bg-white/10 text-white gap-2"
+                        disabled={loadingMore}
+                        onClick={() => fetchDocuments(nextCursor)}
+                      >
+                        {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+                        Load more
+                      </Button>
+                    </div>
+                  )}
                 </div>
               )}
             </AnimatePresence>
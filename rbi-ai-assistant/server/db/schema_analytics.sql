@@ -0,0 +1,19 @@
+-- 📊 Dashboard analytics aggregated in the database
+-- /api/analytics reads one row per category instead of every document row.
+
+-- 1. Documents and pages per category
+CREATE OR REPLACE FUNCTION document_category_stats()
+RETURNS TABLE (category TEXT, documents BIGINT, pages BIGINT)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(d.category, 'General') AS category,
+           COUNT(*) AS documents,
+           COALESCE(SUM(d.total_pages), 0) AS pages
+    FROM documents d
+    GROUP BY 1
+    ORDER BY 2 DESC, 1;
+$$;
+
+-- 2. Lets the GROUP BY run as an index-only scan on large archives
+CREATE INDEX IF NOT EXISTS idx_documents_category ON documents (category);
@@ -0,0 +1,29 @@
+-- 🧹 Corpus-wide boilerplate spans (headers, footers, addresses, sign-offs)
+-- Each distinct header/footer-zone line is stored once with the number of documents it appears in.
+
+-- 1. Span index
+CREATE TABLE IF NOT EXISTS boilerplate_spans (
+    span_hash TEXT PRIMARY KEY,          -- 16-hex shingle hash of the normalized line (digits folded)
+    sample_text TEXT,                    -- One stored copy of the span
+    document_count INTEGER NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_boilerplate_spans_count ON boilerplate_spans(document_count);
+
+-- 2. Increment counts for one document's spans in a single round trip
+CREATE OR REPLACE FUNCTION record_boilerplate_spans(span_hashes TEXT[], samples TEXT[])
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO boilerplate_spans (span_hash, sample_text)
+    SELECT h, s FROM unnest(span_hashes, samples) AS t(h, s)
+    ON CONFLICT (span_hash) DO UPDATE
+        SET document_count = boilerplate_spans.document_count + 1,
+            updated_at = timezone('utc'::text, now());
+$$;
+
+-- 3. Enable Row Level Security (RLS)
+ALTER TABLE boilerplate_spans ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON boilerplate_spans FOR SELECT USING (true);
+CREATE POLICY "Allow service role insert" ON boilerplate_spans FOR INSERT WITH CHECK (true);
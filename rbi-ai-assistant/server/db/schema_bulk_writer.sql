@@ -0,0 +1,11 @@
+-- 📦 Idempotency keys for the bulk writer (services/bulk_writer.py)
+-- Batches are written as upserts on these keys, so a retried batch never duplicates rows.
+
+-- 1. One row per chunk position within a document
+CREATE UNIQUE INDEX IF NOT EXISTS uq_document_chunks_doc_chunk ON document_chunks(document_id, chunk_index);
+
+-- 2. One row per table position within a document page
+CREATE UNIQUE INDEX IF NOT EXISTS uq_document_tables_doc_page_table ON document_tables(document_id, page_number, table_index);
+
+-- 3. Upserts need UPDATE rights for the service role as well as INSERT
+CREATE POLICY "Allow service role update" ON document_tables FOR UPDATE USING (true);
@@ -0,0 +1,9 @@
+-- 📚 Keyset pagination of the circular library (/api/circulars)
+-- Pages are read newest first by (upload_date, id), so each page is an index range scan
+-- whatever its depth, instead of an OFFSET that re-reads every earlier row.
+
+-- 1. Unfiltered library pages
+CREATE INDEX IF NOT EXISTS idx_documents_upload_date_id ON documents (upload_date DESC, id DESC);
+
+-- 2. Library pages filtered by category
+CREATE INDEX IF NOT EXISTS idx_documents_category_upload_date_id ON documents (category, upload_date DESC, id DESC);
@@ -0,0 +1,9 @@
+-- 🔁 Duplicate-document detection (content hash + normalized-text hash)
+
+-- 1. Hash columns on documents
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT; -- SHA-256 of the raw PDF bytes
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS text_hash TEXT;    -- SHA-256 of the normalized extracted text
+
+-- 2. Indexes for the pre-extraction duplicate lookup
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_content_hash ON documents(content_hash) WHERE content_hash IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_documents_text_hash ON documents(text_hash) WHERE text_hash IS NOT NULL;
@@ -0,0 +1,15 @@
+-- 🧰 Periodic index maintenance (called by the scheduler's index_maintenance job)
+
+-- 1. Refresh planner statistics of the search tables after bulk ingestion
+--    (VACUUM cannot run inside a function; autovacuum covers it)
+CREATE OR REPLACE FUNCTION run_index_maintenance()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    ANALYZE documents;
+    ANALYZE document_chunks;
+    ANALYZE document_tables;
+    ANALYZE rbi_updates;
+END;
+$$;
@@ -0,0 +1,120 @@
+-- 📑 Page-level incremental re-ingestion (amended circulars / reissued master directions)
+-- Each indexed page keeps a content hash; a re-ingest re-embeds only pages whose hash changed
+-- and swaps their chunks and tables in one transaction.
+
+-- 1. Per-page content hashes of the currently indexed version
+CREATE TABLE IF NOT EXISTS document_pages (
+    document_id BIGINT REFERENCES documents(id) ON DELETE CASCADE,
+    page_number INTEGER NOT NULL,
+    page_hash TEXT,                   -- SHA-256 of the page's normalized text, digits kept and "Page n of m"
+                                      -- lines dropped (services/dedupe.py); NULL for pages without text
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    PRIMARY KEY (document_id, page_number)
+);
+-- Tables created before blank pages were stored without a hash
+ALTER TABLE document_pages ALTER COLUMN page_hash DROP NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_document_pages_hash ON document_pages(page_hash);
+
+-- 2. Revision log: which pages each re-ingest changed
+CREATE TABLE IF NOT EXISTS document_revisions (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    document_id BIGINT REFERENCES documents(id) ON DELETE CASCADE,
+    filename TEXT,
+    content_hash TEXT,
+    changed_pages INTEGER[] NOT NULL DEFAULT '{}',   -- Re-embedded (edited or newly added) pages
+    removed_pages INTEGER[] NOT NULL DEFAULT '{}',   -- Old page numbers no longer present
+    moved_pages JSONB NOT NULL DEFAULT '[]',         -- [{"from": old, "to": new}] unchanged pages that shifted
+    total_pages INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_revisions_doc_id ON document_revisions(document_id);
+
+-- 3. Atomic swap of a document's changed pages (runs as one transaction)
+--    p_replaced_pages: new page numbers being re-indexed; p_removed_pages: old page numbers dropped
+--    p_moves: [{"from": old, "to": new}]; p_chunks / p_tables: rows for the replaced pages
+--    p_pages: [{"page_number", "page_hash"}] for the whole new version; p_document: columns to update
+CREATE OR REPLACE FUNCTION swap_document_pages(
+    p_document_id BIGINT,
+    p_replaced_pages INTEGER[],
+    p_removed_pages INTEGER[],
+    p_moves JSONB,
+    p_chunks JSONB,
+    p_tables JSONB,
+    p_pages JSONB,
+    p_document JSONB
+)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    base_index INTEGER;
+    revision_id BIGINT;
+BEGIN
+    -- Serialize concurrent re-ingests of the same document
+    PERFORM 1 FROM documents WHERE id = p_document_id FOR UPDATE;
+
+    -- a. Drop chunks/tables of removed pages and of old pages sitting where replaced pages go
+    --    (moved pages are excluded: their rows are renumbered below)
+    DELETE FROM document_chunks
+    WHERE document_id = p_document_id
+      AND page_number = ANY(p_removed_pages || p_replaced_pages)
+      AND page_number NOT IN (SELECT (m->>'from')::INTEGER FROM jsonb_array_elements(p_moves) m);
+    DELETE FROM document_tables
+    WHERE document_id = p_document_id
+      AND page_number = ANY(p_removed_pages || p_replaced_pages)
+      AND page_number NOT IN (SELECT (m->>'from')::INTEGER FROM jsonb_array_elements(p_moves) m);
+
+    -- b. Renumber moved pages in two steps so swaps never collide
+    UPDATE document_chunks c SET page_number = -((m->>'to')::INTEGER)
+    FROM jsonb_array_elements(p_moves) m
+    WHERE c.document_id = p_document_id AND c.page_number = (m->>'from')::INTEGER;
+    UPDATE document_tables t SET page_number = -((m->>'to')::INTEGER)
+    FROM jsonb_array_elements(p_moves) m
+    WHERE t.document_id = p_document_id AND t.page_number = (m->>'from')::INTEGER;
+    UPDATE document_chunks SET page_number = -page_number WHERE document_id = p_document_id AND page_number < 0;
+    UPDATE document_tables SET page_number = -page_number WHERE document_id = p_document_id AND page_number < 0;
+
+    -- c. Insert the re-embedded pages; chunk_index continues after the current maximum
+    SELECT COALESCE(MAX(chunk_index), -1) + 1 INTO base_index FROM document_chunks WHERE document_id = p_document_id;
+    INSERT INTO document_chunks (document_id, content, embedding, page_number, chunk_index)
+    SELECT p_document_id, c->>'content', (c->>'embedding')::vector, (c->>'page_number')::INTEGER,
+           base_index + (ord - 1)::INTEGER
+    FROM jsonb_array_elements(p_chunks) WITH ORDINALITY AS t(c, ord);
+    INSERT INTO document_tables (document_id, page_number, table_index, table_data, summary)
+    SELECT p_document_id, (t->>'page_number')::INTEGER, (t->>'table_index')::INTEGER, t->'table_data', t->>'summary'
+    FROM jsonb_array_elements(p_tables) t;
+
+    -- d. Page hashes now describe the new version
+    DELETE FROM document_pages WHERE document_id = p_document_id;
+    INSERT INTO document_pages (document_id, page_number, page_hash)
+    SELECT p_document_id, (p->>'page_number')::INTEGER, p->>'page_hash'
+    FROM jsonb_array_elements(p_pages) p;
+
+    UPDATE documents SET
+        file_path = COALESCE(p_document->>'file_path', file_path),
+        filename = COALESCE(p_document->>'filename', filename),
+        total_pages = COALESCE((p_document->>'total_pages')::INTEGER, total_pages),
+        file_size = COALESCE((p_document->>'file_size')::NUMERIC, file_size),
+        content_hash = COALESCE(p_document->>'content_hash', content_hash),
+        text_hash = COALESCE(p_document->>'text_hash', text_hash)
+    WHERE id = p_document_id;
+
+    INSERT INTO document_revisions (document_id, filename, content_hash, changed_pages, removed_pages, moved_pages, total_pages)
+    VALUES (p_document_id, p_document->>'filename', p_document->>'content_hash', p_replaced_pages, p_removed_pages,
+            p_moves, (p_document->>'total_pages')::INTEGER)
+    RETURNING id INTO revision_id;
+
+    RETURN revision_id;
+END;
+$$;
+
+-- 4. Enable Row Level Security (RLS)
+ALTER TABLE document_pages ENABLE ROW LEVEL SECURITY;
+ALTER TABLE document_revisions ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON document_pages FOR SELECT USING (true);
+CREATE POLICY "Allow service role insert" ON document_pages FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow service role update" ON document_pages FOR UPDATE USING (true);
+CREATE POLICY "Allow public read access" ON document_revisions FOR SELECT USING (true);
+CREATE POLICY "Allow service role insert" ON document_revisions FOR INSERT WITH CHECK (true);
@@ -0,0 +1,9 @@
+-- 🧹 One rbi_updates row per source link (set-based dedupe + upsert in the scraper)
+
+-- 1. Drop duplicates left by earlier overlapping syncs (keep the oldest row)
+DELETE FROM rbi_updates a
+USING rbi_updates b
+WHERE a.pdf_url = b.pdf_url AND a.id > b.id;
+
+-- 2. Unique link: backs the batched `pdf_url IN (...)` lookup and ON CONFLICT (pdf_url) inserts
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rbi_updates_pdf_url ON rbi_updates(pdf_url);
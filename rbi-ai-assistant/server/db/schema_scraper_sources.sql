@@ -0,0 +1,20 @@
+-- 🛰️ Conditional fetching state for scraped RBI pages
+-- The scraper sends If-None-Match / If-Modified-Since from the last response and
+-- skips parsing when the server answers 304 or the body hash is unchanged.
+
+-- 1. Validators and body hash per source URL
+CREATE TABLE IF NOT EXISTS scraper_sources (
+    url TEXT PRIMARY KEY,
+    etag TEXT,                 -- ETag of the last 200 response
+    last_modified TEXT,        -- Last-Modified of the last 200 response (sent back verbatim)
+    content_hash TEXT,         -- SHA-256 of the last processed body
+    content_length INTEGER,    -- Body size, counted as saved when the server answers 304
+    checked_at TIMESTAMP WITH TIME ZONE,
+    changed_at TIMESTAMP WITH TIME ZONE
+);
+
+-- 2. Enable Row Level Security (RLS)
+ALTER TABLE scraper_sources ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON scraper_sources FOR SELECT USING (true);
+CREATE POLICY "Allow service role insert" ON scraper_sources FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow service role update" ON scraper_sources FOR UPDATE USING (true);
@@ -0,0 +1,17 @@
+-- 📝 Cache of generated update summaries
+-- Keyed by the SHA-256 of the text sent to the LLM (first 3,000 characters), so the
+-- same circular reached through a new URL is not summarized again.
+
+-- 1. Summary per content hash
+CREATE TABLE IF NOT EXISTS summary_cache (
+    content_hash TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    model TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+-- 2. Enable Row Level Security (RLS)
+ALTER TABLE summary_cache ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow public read access" ON summary_cache FOR SELECT USING (true);
+CREATE POLICY "Allow service role insert" ON summary_cache FOR INSERT WITH CHECK (true);
+CREATE POLICY "Allow service role update" ON summary_cache FOR UPDATE USING (true);
@@ -3,7 +3,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from routes import upload, notifications, documents, ask, rbi_updates
 from dotenv import load_dotenv
 import os
-from services.supabase_client import get_supabase
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -13,14 +12,29 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../../.env"))
 if not os.getenv("GROQ_API_KEY"):
     load_dotenv() # Fallback to standard
 
-from services.background_tasks import start_background_tasks
+from services.background_tasks import register_background_jobs
+from services.pdf_extraction import shutdown_extraction_executor
+from services.job_queue import get_job_queue
+from services.scheduler import get_scheduler
+from services.analytics import get_document_stats
 
 print("Starting RBI AI Backend...")
 app = FastAPI()
 print("FastAPI Instance Created")
 
-# Start Background Services
-start_background_tasks()
+# Background Services (scraper, cache warming, index maintenance) run on the app event loop
+register_background_jobs()
+
+@app.on_event("startup")
+async def start_ingestion_workers():
+    await get_job_queue().start()
+    await get_scheduler().start()
+
+@app.on_event("shutdown")
+async def stop_ingestion_workers():
+    await get_scheduler().stop()
+    await get_job_queue().stop()
+    shutdown_extraction_executor()
 
 # CORS Middleware
 app.add_middleware(
@@ -29,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 class ChatRequest(BaseModel):
@@ -44,33 +59,7 @@ def read_root():
 @app.get("/api/analytics")
 def get_analytics():
     try:
-        supabase = get_supabase()
-        response = supabase.table("documents").select("*").execute()
-        docs = response.data or []
-        
-        # Calculate Category Stats
-        category_counts = {}
-        total_pages = 0
-        for doc in docs:
-            cat = doc.get("category", "General")
-            category_counts[cat] = category_counts.get(cat, 0) + 1
-            total_pages += doc.get("total_pages", 0) or 0
-
-        # Format for frontend
-        categories = []
-        colors = ["#00FF88", "#3B82F6", "#F59E0B", "#EF4444", "#8B5CF6", "#EC4899"]
-        for i, (name, count) in enumerate(category_counts.items()):
-            categories.append({
-                "name": name,
-                "count": count,
-                "color": colors[i % len(colors)]
-            })
-
-        return {
-            "total_documents": len(docs),
-            "total_pages": total_pages,
-            "categories": categories
-        }
+        return get_document_stats()
     except Exception as e:
         print(f"Analytics Error: {e}")
         return {
@@ -1,5 +1,10 @@
-from fastapi import APIRouter, HTTPException, Body
+import os
+import json
+import base64
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Body, Query, Response
 from services.supabase_client import get_supabase
+from services.analytics import invalidate_document_stats
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -10,16 +15,82 @@ class DeleteDocumentsRequest(BaseModel):
 
 BUCKET_NAME = "rbi-documents"
 
+CIRCULARS_PAGE_SIZE = int(os.getenv("CIRCULARS_PAGE_SIZE", "100"))
+CIRCULARS_MAX_PAGE_SIZE = int(os.getenv("CIRCULARS_MAX_PAGE_SIZE", "500"))
+
+# Columns a client may project with ?fields= (the list view needs only these)
+CIRCULAR_FIELDS = ["id", "title", "filename", "category", "upload_date", "file_path", "total_pages", "file_size"]
+
+def encode_cursor(row: dict) -> str:
+    """Opaque keyset cursor: the (upload_date, id) of the last row of a page."""
+    raw = json.dumps([row["upload_date"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    (upload_date, id) from a cursor. Both end up inside a PostgREST filter string, so the date
+    must parse as a timestamp (re-serialized, never echoed) and the id must be an integer.
+    """
+    try:
+        upload_date, doc_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(upload_date, str) or type(doc_id) is not int:
+            raise ValueError("cursor holds [upload_date, id]")
+        return datetime.fromisoformat(upload_date).isoformat(), doc_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str]) -> str:
+    """Column list for select(); the keyset columns are always included so the next cursor can be built."""
+    if not fields:
+        return ",".join(CIRCULAR_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in CIRCULAR_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ",".join(dict.fromkeys(["id", "upload_date"] + requested))
+
 @router.get("/circulars")
-def get_circulars():
+def get_circulars(
+    response: Response,
+    limit: int = Query(CIRCULARS_PAGE_SIZE, ge=1, le=CIRCULARS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    One page of documents, newest first, as a JSON array.
+    Keyset-paginated on (upload_date, id): the next page's cursor is returned in the
+    X-Next-Cursor header (absent on the last page). `since` is inclusive, `until` exclusive.
+    `fields` is a comma-separated projection of CIRCULAR_FIELDS.
+    """
+    columns = parse_fields(fields)
     try:
         supabase = get_supabase()
-        response = supabase.table("documents").select("*").execute()
-        return response.data
+        query = supabase.table("documents").select(columns)
+        if category:
+            query = query.eq("category", category)
+        if since:
+            query = query.gte("upload_date", since)
+        if until:
+            query = query.lt("upload_date", until)
+        if cursor:
+            upload_date, doc_id = decode_cursor(cursor)
+            query = query.or_(f'upload_date.lt."{upload_date}",and(upload_date.eq."{upload_date}",id.lt.{doc_id})')
+        # One extra row tells whether another page follows
+        rows = query.order("upload_date", desc=True).order("id", desc=True).limit(limit + 1).execute().data or []
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching circulars: {e}")
         return []
 
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return rows
+
 @router.delete("/documents")
 def delete_documents(request: DeleteDocumentsRequest):
     """
@@ -57,6 +128,7 @@ def delete_documents(request: DeleteDocumentsRequest):
 
         # 3. Delete from Database
         supabase.table("documents").delete().in_("id", ids).execute()
+        invalidate_document_stats()
 
         return {"message": "Documents deleted successfully"}
 
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from services.supabase_client import get_supabase
+from services.notifications import get_notification_hub
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
 
 router = APIRouter()
 
@@ -30,30 +31,34 @@ def get_notifications():
 
 @router.get("/unread-count")
 def get_unread_count():
-    """Return count where is_read = false"""
+    """Return the number of unread notifications (kept in memory, see services/notifications.py)"""
     try:
-        supabase = get_supabase()
-        # count='exact' allows getting the count without data if head=True, 
-        # but supabase-py select(count='exact') returns count property
-        response = supabase.table("notifications")\
-            .select("*", count="exact")\
-            .eq("is_read", False)\
-            .execute()
-        
-        return {"count": response.count}
+        return {"count": get_notification_hub().unread_count()}
     except Exception as e:
         print(f"Error counting unread notifications: {e}")
         return {"count": 0}
 
+@router.get("/stream")
+def stream_notifications():
+    """Server-sent events: `unread-count` on connect and on every change, `notification` for new ones"""
+    return StreamingResponse(
+        get_notification_hub().subscribe(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/{id}/mark-read")
 def mark_read(id: int):
     """Update is_read = true for specific ID"""
     try:
         supabase = get_supabase()
-        supabase.table("notifications")\
+        response = supabase.table("notifications")\
             .update({"is_read": True})\
             .eq("id", id)\
+            .eq("is_read", False)\
             .execute()
+        if response.data:
+            get_notification_hub().adjust(-len(response.data))
         return {"message": "Marked as read"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -68,6 +73,7 @@ def mark_all_read():
             .update({"is_read": True})\
             .eq("is_read", False)\
             .execute()
+        get_notification_hub().set_unread(0)
         return {"message": "All marked as read"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
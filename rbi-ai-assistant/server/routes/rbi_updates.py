@@ -19,4 +19,9 @@ async def trigger_sync():
     """Manual trigger for RBI website synchronization."""
     scraper = RBIScraperService()
     count = await scraper.sync_updates()
-    return {"message": "Sync complete", "processed_count": count}
+    return {
+        "message": "Sync complete",
+        "processed_count": count,
+        "listing_changed": scraper.last_sync.get("listing_changed", False),
+        "bytes_saved": scraper.last_sync.get("bytes_saved", 0)
+    }
@@ -0,0 +1,236 @@
+"""
+Offline bulk ingester for the historical circular archive.
+
+Feeds local PDFs straight through the upload pipeline (dedupe, extraction, domain
+validation, boilerplate stripping, chunking, embedding, bulk writes) without going
+through /api/upload. Documents run concurrently (--workers); page extraction inside
+each document still fans out to the process pool (PDF_EXTRACT_WORKERS).
+
+Progress is kept in a JSON checkpoint file, updated after every document. Re-running
+the same command resumes: ingested, duplicate and rejected files are skipped, failed
+ones are retried.
+
+Input is a directory (searched recursively for *.pdf) or a manifest:
+  - .csv   with columns path,title,category (title/category optional)
+  - .jsonl with one {"path": ..., "title": ..., "category": ...} object per line
+Relative manifest paths are resolved against the manifest's directory.
+
+Usage:
+    python scripts/backfill_archive.py archive/circulars --workers 4
+    python scripts/backfill_archive.py archive/manifest.csv --checkpoint backfill.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import asyncio
+import argparse
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from services.job_queue import DATA_DIR, INGESTION_WORKERS, JobFailed
+from services.upload_pipeline import run_upload_pipeline, DomainValidationFailed
+from services.notifications import create_notification
+from services.pdf_extraction import shutdown_extraction_executor
+
+DEFAULT_CHECKPOINT = os.path.join(DATA_DIR, "backfill_checkpoint.json")
+# Statuses that are final: a resumed run skips these entries
+FINAL_STATUSES = ("ingested", "duplicate", "rejected")
+
+
+class BackfillProgress:
+    """In-memory stand-in for JobProgress (same update/increment interface, nothing persisted)."""
+
+    def __init__(self):
+        self.values = {}
+
+    def update(self, **values):
+        self.values.update(values)
+
+    def increment(self, key: str, amount: int = 1):
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def flush(self):
+        pass
+
+
+def load_entries(source: str, default_category: str) -> list:
+    """Returns [{path, title, category}] from a directory or a .csv/.jsonl manifest."""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".pdf"))
+        rows = [{"path": p} for p in sorted(paths)]
+        base_dir = source
+    elif source.lower().endswith(".csv"):
+        with open(source, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        base_dir = os.path.dirname(os.path.abspath(source))
+    elif source.lower().endswith(".jsonl"):
+        with open(source, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        base_dir = os.path.dirname(os.path.abspath(source))
+    else:
+        raise ValueError(f"Unsupported source '{source}': expected a directory, .csv or .jsonl manifest")
+
+    entries = []
+    for row in rows:
+        path = row.get("path")
+        if not path:
+            continue
+        path = os.path.abspath(path if os.path.isabs(path) else os.path.join(base_dir, path))
+        entries.append({
+            "path": path,
+            "title": row.get("title") or os.path.splitext(os.path.basename(path))[0],
+            "category": row.get("category") or default_category
+        })
+    return entries
+
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """Atomic replace, so an interrupted run never leaves a truncated checkpoint behind."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def ingest_entry(entry: dict, notify: bool = False) -> dict:
+    """
+    Runs one archive PDF through the upload pipeline; returns its checkpoint record.
+    No per-document notification by default: a backfill reports once (notify_archive_summary).
+    """
+    progress = BackfillProgress()
+    record = {"title": entry["title"]}
+    try:
+        payload = {
+            "spool_path": entry["path"],
+            "filename": os.path.basename(entry["path"]),
+            "title": entry["title"],
+            "category": entry["category"],
+            "sha256": await asyncio.to_thread(file_sha256, entry["path"]),
+            "file_size": os.path.getsize(entry["path"]),
+            "keep_source": True,
+            "notify": notify
+        }
+        result = await run_upload_pipeline(payload, progress)
+        document = result.get("document") or {}
+        record["status"] = "duplicate" if result.get("duplicate") else "ingested"
+        record["document_id"] = document.get("id")
+    except DomainValidationFailed as e:
+        # Not an RBI circular: final, a resumed run skips it
+        record["status"] = "rejected"
+        record["error"] = str(e)
+    except JobFailed as e:
+        # Other pipeline refusals (e.g. indexing rollback) are retried on the next run
+        record["status"] = "failed"
+        record["error"] = str(e)
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = str(e)
+    record["pages"] = progress.values.get("pages_extracted", 0)
+    record["chunks"] = progress.values.get("chunks_embedded", 0)
+    record["finished_at"] = datetime.utcnow().isoformat()
+    return record
+
+
+def notify_archive_summary(source: str, totals: dict):
+    """One notification for a whole archive run instead of one per historical circular."""
+    if not totals["ingested"]:
+        return
+    try:
+        create_notification(f"{totals['ingested']} archived circular(s) added from {source}", "upload")
+    except Exception as e:
+        print(f"WARNING: Failed to create notification (non-critical): {e}")
+
+
+async def run_backfill(entries: list, checkpoint_path: str, workers: int) -> dict:
+    checkpoint = load_checkpoint(checkpoint_path)
+    pending = [e for e in entries if checkpoint.get(e["path"], {}).get("status") not in FINAL_STATUSES]
+    print(f"INFO: {len(entries)} documents, {len(entries) - len(pending)} already done, {len(pending)} to process "
+          f"with {workers} workers.")
+
+    queue = asyncio.Queue()
+    for entry in pending:
+        queue.put_nowait(entry)
+    totals = {"ingested": 0, "duplicate": 0, "rejected": 0, "failed": 0, "pages": 0, "chunks": 0}
+    lock = asyncio.Lock()
+
+    async def worker():
+        while not queue.empty():
+            entry = queue.get_nowait()
+            record = await ingest_entry(entry)
+            async with lock:
+                checkpoint[entry["path"]] = record
+                save_checkpoint(checkpoint_path, checkpoint)
+                totals[record["status"]] += 1
+                if record["status"] == "ingested":
+                    totals["pages"] += record["pages"]
+                    totals["chunks"] += record["chunks"]
+                done = sum(totals[s] for s in ("ingested", "duplicate", "rejected", "failed"))
+            icon = {"ingested": "✅", "duplicate": "🔁", "rejected": "🚫", "failed": "❌"}[record["status"]]
+            print(f"{icon} [{done}/{len(pending)}] {os.path.basename(entry['path'])}: {record['status']}"
+                  + (f" ({record['error']})" if record.get("error") else ""))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(max(1, workers))])
+    totals["elapsed_s"] = time.perf_counter() - start
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest archived RBI circulars with resumable checkpoints")
+    parser.add_argument("source", help="Directory of PDFs, or a .csv/.jsonl manifest")
+    parser.add_argument("--workers", type=int, default=INGESTION_WORKERS, help="Documents processed concurrently")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint JSON file")
+    parser.add_argument("--category", default="General", help="Category for entries without one")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most N documents (smoke runs)")
+    args = parser.parse_args()
+
+    entries = load_entries(args.source, args.category)
+    if not entries:
+        print(f"❌ No PDFs found in {args.source}")
+        sys.exit(1)
+    if args.limit:
+        checkpoint = load_checkpoint(args.checkpoint)
+        entries = [e for e in entries if checkpoint.get(e["path"], {}).get("status") not in FINAL_STATUSES][:args.limit]
+
+    try:
+        totals = asyncio.run(run_backfill(entries, args.checkpoint, args.workers))
+    finally:
+        shutdown_extraction_executor()
+    notify_archive_summary("the archive backfill", totals)
+
+    elapsed = totals["elapsed_s"]
+    processed = sum(totals[s] for s in ("ingested", "duplicate", "rejected", "failed"))
+    print("\n📊 Backfill report")
+    print(f"   Ingested: {totals['ingested']}  Duplicates: {totals['duplicate']}  "
+          f"Rejected: {totals['rejected']}  Failed: {totals['failed']}")
+    print(f"   Pages: {totals['pages']}  Chunks: {totals['chunks']}  Elapsed: {elapsed:.1f}s")
+    if elapsed:
+        print(f"   Throughput: {processed / elapsed * 60:.1f} docs/min, {totals['pages'] / elapsed:.2f} pages/sec")
+    print(f"   Checkpoint: {args.checkpoint}")
+    if totals["failed"]:
+        print("   Re-run the same command to retry failed documents.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares the two extraction modes on a directory of PDFs:
+  hybrid  - Fitz text + pdfplumber tables (current default)
+  pymupdf - single parser, PyMuPDF's own table finder
+
+Reports pages/sec per mode and how closely the pymupdf tables match the
+hybrid ones (table count per page and cell-level agreement of table_to_json rows).
+
+Usage:
+    python scripts/benchmark_extraction_modes.py fixtures/rbi_circulars
+"""
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from services.pdf_extraction import extract_page_range, count_pages
+
+
+def table_cells(table_json) -> Counter:
+    cells = Counter(table_json["columns"])
+    for row in table_json["rows"]:
+        cells.update(" ".join(str(v).split()) for v in row.values())
+    return cells
+
+
+def cell_agreement(reference: list, candidate: list) -> float:
+    """Multiset overlap (0..1) between the cells of all tables on a page."""
+    ref = sum((table_cells(t) for t in reference), Counter())
+    cand = sum((table_cells(t) for t in candidate), Counter())
+    total = sum((ref | cand).values())
+    return sum((ref & cand).values()) / total if total else 1.0
+
+
+def run_mode(pdf_path: str, mode: str):
+    start = time.perf_counter()
+    pages = extract_page_range(pdf_path, 0, count_pages(pdf_path), os.path.basename(pdf_path), mode)
+    return pages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid vs single-parser extraction benchmark")
+    parser.add_argument("fixtures_dir", help="Directory of PDF fixtures (e.g. saved RBI circulars)")
+    args = parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(args.fixtures_dir) if f.lower().endswith(".pdf"))
+    if not pdfs:
+        print(f"❌ No PDFs found in {args.fixtures_dir}")
+        sys.exit(1)
+
+    totals = Counter()
+    agreements = []
+    print(f"{'file':40} {'pages':>6} {'hybrid p/s':>11} {'pymupdf p/s':>12} {'tables h/p':>11} {'cells':>6}")
+    for name in pdfs:
+        pdf_path = os.path.join(args.fixtures_dir, name)
+        hybrid_pages, hybrid_s = run_mode(pdf_path, "hybrid")
+        pymupdf_pages, pymupdf_s = run_mode(pdf_path, "pymupdf")
+
+        page_count = len(hybrid_pages)
+        hybrid_tables = sum(len(p["tables"]) for p in hybrid_pages)
+        pymupdf_tables = sum(len(p["tables"]) for p in pymupdf_pages)
+        doc_agreement = []
+        for h_page, p_page in zip(hybrid_pages, pymupdf_pages):
+            if h_page["tables"] or p_page["tables"]:
+                totals["table_pages"] += 1
+                totals["count_match"] += len(h_page["tables"]) == len(p_page["tables"])
+                doc_agreement.append(cell_agreement(h_page["tables"], p_page["tables"]))
+        agreements.extend(doc_agreement)
+
+        totals.update({"pages": page_count, "hybrid_tables": hybrid_tables, "pymupdf_tables": pymupdf_tables})
+        totals["hybrid_s"] += hybrid_s
+        totals["pymupdf_s"] += pymupdf_s
+        doc_cells = sum(doc_agreement) / len(doc_agreement) if doc_agreement else 1.0
+        print(f"{name[:40]:40} {page_count:>6} {page_count / hybrid_s:>11.1f} {page_count / pymupdf_s:>12.1f} "
+              f"{hybrid_tables:>5}/{pymupdf_tables:<5} {doc_cells:>6.0%}")
+
+    print("\n📊 Extraction mode report")
+    print(f"   Pages: {totals['pages']}  Pages with tables (either mode): {totals['table_pages']}")
+    print(f"   Throughput: hybrid {totals['pages'] / totals['hybrid_s']:.1f} pages/s, "
+          f"pymupdf {totals['pages'] / totals['pymupdf_s']:.1f} pages/s")
+    print(f"   Tables found: hybrid {totals['hybrid_tables']}, pymupdf {totals['pymupdf_tables']}")
+    if totals["table_pages"]:
+        print(f"   Pages with same table count: {totals['count_match'] / totals['table_pages']:.1%}")
+        print(f"   Mean cell agreement vs hybrid: {sum(agreements) / len(agreements):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+HTML parsing benchmark on saved RBI pages.
+
+Times the scraper's listing parser (parse_updates) and the archive crawler's page
+parser (parse_listing_page) on every parser backend, over the saved pages under
+fixtures/rbi, the saved pages at the server root and any extra --pages. A synthetic
+What's New listing with --rows rows stands in for archive-scale pages. Results of
+all backends are compared, so a backend that parses differently fails the run.
+
+Usage:
+    python scripts/benchmark_html_parsing.py
+    python scripts/benchmark_html_parsing.py --rows 5000 --repeat 20 --pages saved/*.html
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(SERVER_DIR)
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "benchmark")
+
+import services.html_parser as html_parser
+from services.scraper_service import parse_updates
+from scripts.crawl_rbi_archive import parse_listing_page
+
+BASE_URL = "https://www.rbi.org.in"
+SAVED_PAGES = [
+    os.path.join(SERVER_DIR, "fixtures", "rbi", "**", "*.aspx"),
+    os.path.join(SERVER_DIR, "fixtures", "rbi", "**", "*.html"),
+    os.path.join(SERVER_DIR, "*.html"),
+]
+
+
+def synthetic_listing(rows: int) -> str:
+    """What's New-style listing with `rows` update rows plus site navigation."""
+    nav = "".join(f'<li><a href="/Scripts/Menu{n}.aspx">Menu item {n}</a></li>' for n in range(200))
+    body = "".join(
+        f'<tr><td>Oct {n % 28 + 1:02d}, 2024</td><td><a class="link2" href="/Scripts/NotificationUser.aspx?Id={n}&amp;Mode=0">'
+        f'Reserve Bank of India (Regulatory Direction {n}) Amendment, 2024</a></td>'
+        f'<td><a href="/rdocs/notification/PDFs/NT{n}.PDF" title="PDF {n}"><img src="/images/pdf.gif" /></a></td></tr>'
+        for n in range(rows)
+    )
+    return (f'<html><head><title>What\'s New</title></head><body><div class="menu"><ul>{nav}</ul></div>'
+            f'<div class="content_area"><table class="tablebg">{body}</table></div></body></html>')
+
+
+def load_pages(extra: list, rows: int) -> dict:
+    pages = {}
+    for pattern in SAVED_PAGES + (extra or []):
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages[os.path.relpath(path, SERVER_DIR)] = f.read()
+    pages[f"synthetic listing ({rows} rows)"] = synthetic_listing(rows)
+    return pages
+
+
+def parse_page(html: str):
+    return parse_updates(html, BASE_URL, limit=10**6), parse_listing_page(html, BASE_URL + "/Scripts/BS_ViewWasNewResponse.aspx")
+
+
+def time_backend(backend: str, pages: dict, repeat: int) -> dict:
+    html_parser.HTML_PARSER_BACKEND = backend
+    results = {}
+    for name, html in pages.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parsed = parse_page(html)
+        results[name] = ((time.perf_counter() - start) / repeat * 1000, parsed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper's HTML parser backends on saved RBI pages")
+    parser.add_argument("--pages", nargs="*", help="Extra saved pages (globs)")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows in the synthetic listing")
+    parser.add_argument("--repeat", type=int, default=10, help="Parses per page and backend")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages, args.rows)
+    backends = ["bs4"] + (["lxml"] if html_parser.lxml else [])
+    timings = {backend: time_backend(backend, pages, args.repeat) for backend in backends}
+
+    print(f"\n📊 HTML parsing, ms per page (parse_updates + parse_listing_page, {args.repeat} runs)")
+    print(f"{'page':<48} {'KB':>7} " + " ".join(f"{b:>9}" for b in backends) + ("   speedup" if len(backends) > 1 else ""))
+    mismatches = []
+    for name, html in pages.items():
+        row = [timings[b][name][0] for b in backends]
+        line = f"{name[:48]:<48} {len(html) / 1024:>7.1f} " + " ".join(f"{ms:>9.2f}" for ms in row)
+        if len(backends) > 1:
+            line += f"   {row[0] / row[-1]:>6.1f}x"
+            if timings[backends[0]][name][1] != timings[backends[-1]][name][1]:
+                mismatches.append(name)
+        print(line)
+    totals = [sum(timings[b][name][0] for name in pages) for b in backends]
+    print(f"{'total':<48} {sum(len(h) for h in pages.values()) / 1024:>7.1f} " + " ".join(f"{ms:>9.2f}" for ms in totals)
+          + (f"   {totals[0] / totals[-1]:>6.1f}x" if len(backends) > 1 else ""))
+
+    if mismatches:
+        print(f"\n❌ Backends disagree on: {', '.join(mismatches)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
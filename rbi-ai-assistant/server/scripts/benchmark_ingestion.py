@@ -0,0 +1,258 @@
+"""
+Repeatable ingestion throughput benchmark.
+
+Generates synthetic RBI-like circulars with PyMuPDF (reference line, running header,
+numbered paragraphs, ruled tables on a configurable share of pages, page footers) and
+runs each through the upload pipeline against the local PostgREST stub (storage + DB).
+Every size runs in a fresh subprocess so peak RSS is per run; extraction workers are
+reported separately (children).
+
+Reports per-stage time, pages/sec and peak RSS. Stages overlap in the streaming
+pipeline (extraction runs ahead of embedding and writes), so stage times are
+cumulative busy time and can add up to more than the wall time.
+
+Embeddings use the real model by default; --embeddings fake swaps in a constant
+vector to measure everything else (e.g. when sentence-transformers is not installed).
+
+Usage:
+    python scripts/benchmark_ingestion.py --pages 10 100 1000 --table-density 0.2
+    python scripts/benchmark_ingestion.py --pages 200 --embeddings fake --output bench.json
+    python scripts/benchmark_ingestion.py --pages 200 --baseline bench.json   # exit 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(SERVER_DIR)
+
+SENTENCES = [
+    "All Scheduled Commercial Banks shall ensure compliance with the revised instructions.",
+    "The limits prescribed herein shall be reckoned on the basis of the latest audited balance sheet.",
+    "Regulated entities are advised to put in place a Board approved policy within three months.",
+    "Exposure to a single counterparty shall not exceed twenty per cent of the eligible capital base.",
+    "The provisions of this direction shall come into force with immediate effect.",
+    "Banks may refer to the Master Direction on Know Your Customer for due diligence requirements.",
+    "Any deviation from the prescribed norms shall be reported to the Department of Supervision.",
+    "The statement shall be furnished within fifteen days from the end of the relevant quarter.",
+]
+TABLE_HEADERS = ["Category", "Loan limit", "Maximum cost", "Risk weight"]
+
+
+def generate_synthetic_circular(path: str, pages: int, table_density: float = 0.2, seed: int = 7) -> int:
+    """Writes an RBI-like circular with `pages` pages; returns how many pages carry a ruled table."""
+    import fitz
+    rng = random.Random(seed)
+    doc = fitz.open()
+    table_pages = 0
+    for page_num in range(1, pages + 1):
+        page = doc.new_page()
+        page.insert_text((72, 40), "RBI/2024-25/118 DOR.CRE.REC.64/21.06.001/2024-25", fontsize=8)
+        page.insert_text((400, 40), "Reserve Bank of India", fontsize=8)
+        y = 80
+        if page_num == 1:
+            page.insert_text((72, y), "RBI Circular - Master Direction (Synthetic Benchmark)", fontsize=12)
+            page.insert_text((72, y + 16), "Ref.No. www.rbi.org.in/notifications", fontsize=9)
+            y += 44
+        for para in range(rng.randint(4, 7)):
+            text = f"{page_num}.{para + 1} " + " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 4)))
+            rect = fitz.Rect(72, y, 523, y + 90)
+            page.insert_textbox(rect, text, fontsize=9)
+            y += 70
+            if y > 600:
+                break
+        if rng.random() < table_density and y < 640:
+            table_pages += 1
+            rows = rng.randint(3, 6)
+            top = y + 10
+            for r in range(rows + 1):
+                page.draw_line((72, top + r * 20), (472, top + r * 20))
+            for c in range(len(TABLE_HEADERS) + 1):
+                page.draw_line((72 + c * 100, top), (72 + c * 100, top + rows * 20))
+            for r in range(rows):
+                for c, header in enumerate(TABLE_HEADERS):
+                    cell = header if r == 0 else f"{rng.randint(1, 500)}.{rng.randint(0, 99):02d}"
+                    page.insert_text((76 + c * 100, top + r * 20 + 14), cell, fontsize=8)
+        page.insert_text((280, 820), f"Page {page_num} of {pages}", fontsize=8)
+    doc.save(path)
+    doc.close()
+    return table_pages
+
+
+class StageTimer:
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, stage: str, elapsed: float):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+
+    def wrap_sync(self, stage: str, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+    def wrap_async(self, stage: str, fn):
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+
+class BenchmarkProgress:
+    def __init__(self):
+        self.values = {}
+
+    def update(self, **values):
+        self.values.update(values)
+
+    def increment(self, key: str, amount: int = 1):
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def flush(self):
+        pass
+
+
+def run_one(pages: int, table_density: float, embeddings: str) -> dict:
+    """Runs a single synthetic document through the pipeline in this process (fresh interpreter)."""
+    from scripts.postgrest_stub import PostgrestStub
+    stub = PostgrestStub().start()
+    stub.rpc_handlers["record_boilerplate_spans"] = lambda stub, payload: None
+    os.environ["SUPABASE_URL"] = stub.url
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "benchmark"
+    os.environ["EXTRACTION_CACHE"] = "0"  # measure extraction, not cache reads
+
+    import services.upload_pipeline as upload_pipeline
+    import services.pdf_extraction as pdf_extraction
+    import services.bulk_writer as bulk_writer
+
+    timer = StageTimer()
+    if embeddings == "fake":
+        upload_pipeline.generate_embedding = lambda text: [0.0] * 384
+    else:
+        upload_pipeline.generate_embedding("warm up")  # model load is not ingestion throughput
+    upload_pipeline.early_validate_pdf = timer.wrap_sync("validation", upload_pipeline.early_validate_pdf)
+    upload_pipeline.scan_text_layer = timer.wrap_sync("text_scan", upload_pipeline.scan_text_layer)
+    upload_pipeline.generate_embedding = timer.wrap_sync("embedding", upload_pipeline.generate_embedding)
+    upload_pipeline.chunk_text = timer.wrap_sync("chunking", upload_pipeline.chunk_text)
+    pdf_extraction._extract_batch = timer.wrap_async("extraction", pdf_extraction._extract_batch)
+    upload_pipeline.bulk_upsert = timer.wrap_async("db_writes", bulk_writer.bulk_upsert)
+
+    workdir = tempfile.mkdtemp(prefix="rbi_bench_")
+    pdf_path = os.path.join(workdir, f"synthetic_{pages}.pdf")
+    table_pages = generate_synthetic_circular(pdf_path, pages, table_density)
+    with open(pdf_path, "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+    payload = {"spool_path": pdf_path, "filename": os.path.basename(pdf_path), "title": f"Benchmark {pages}p",
+               "category": "Benchmark", "sha256": sha256, "file_size": os.path.getsize(pdf_path)}
+    progress = BenchmarkProgress()
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(upload_pipeline.run_upload_pipeline(payload, progress))
+    finally:
+        elapsed = time.perf_counter() - start
+        pdf_extraction.get_extraction_executor().shutdown(wait=True)
+        stub.stop()
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "pages": pages,
+        "table_pages": table_pages,
+        "chunks": len(stub.rows("document_chunks")),
+        "tables": len(stub.rows("document_tables")),
+        "elapsed_s": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "stages_s": timer.seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20,
+        "workers_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 2**20,
+    }
+
+
+def run_in_subprocess(pages: int, table_density: float, embeddings: str) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", "--pages", str(pages),
+           "--table-density", str(table_density), "--embeddings", embeddings]
+    proc = subprocess.run(cmd, cwd=SERVER_DIR, capture_output=True, text=True)
+    result_lines = [l for l in proc.stdout.splitlines() if l.startswith("BENCH_RESULT ")]
+    if proc.returncode != 0 or not result_lines:
+        print(proc.stdout[-2000:])
+        print(proc.stderr[-2000:])
+        raise RuntimeError(f"Benchmark run for {pages} pages failed (exit {proc.returncode})")
+    return json.loads(result_lines[-1][len("BENCH_RESULT "):])
+
+
+def compare_to_baseline(results: list, baseline_path: str, tolerance: float) -> bool:
+    """True if no run's pages/sec dropped more than `tolerance` below the baseline for the same size."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["pages"]: r for r in json.load(f)["results"]}
+    ok = True
+    for result in results:
+        base = baseline.get(result["pages"])
+        if not base:
+            continue
+        change = result["pages_per_sec"] / base["pages_per_sec"] - 1 if base["pages_per_sec"] else 0.0
+        flag = "REGRESSION" if change < -tolerance else "ok"
+        ok = ok and flag == "ok"
+        print(f"   {result['pages']:>5} pages: {base['pages_per_sec']:.2f} -> {result['pages_per_sec']:.2f} pages/sec "
+              f"({change:+.0%}) {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion pipeline benchmark on synthetic RBI-like PDFs")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000], help="Document sizes to run")
+    parser.add_argument("--table-density", type=float, default=0.2, help="Share of pages carrying a ruled table")
+    parser.add_argument("--embeddings", choices=["model", "fake"], default="model")
+    parser.add_argument("--output", help="Write results JSON here (usable as a later --baseline)")
+    parser.add_argument("--baseline", help="Results JSON from an earlier run to compare pages/sec against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed pages/sec drop vs baseline")
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        result = run_one(args.pages[0], args.table_density, args.embeddings)
+        print("BENCH_RESULT " + json.dumps(result))
+        return
+
+    results = []
+    for pages in args.pages:
+        print(f"🔹 Running {pages}-page synthetic circular...")
+        results.append(run_in_subprocess(pages, args.table_density, args.embeddings))
+
+    stages = sorted({stage for r in results for stage in r["stages_s"]})
+    print("\n📊 Ingestion benchmark "
+          f"(table density {args.table_density:.0%}, {args.embeddings} embeddings, stage times are cumulative)")
+    print(f"{'pages':>6} {'tables':>6} {'chunks':>6} {'total':>8} {'pages/s':>8} {'RSS MB':>7} {'workers':>8}  "
+          + " ".join(f"{s:>11}" for s in stages))
+    for r in results:
+        print(f"{r['pages']:>6} {r['tables']:>6} {r['chunks']:>6} {r['elapsed_s']:>7.2f}s {r['pages_per_sec']:>8.2f} "
+              f"{r['peak_rss_mb']:>7.0f} {r['workers_peak_rss_mb']:>8.0f}  "
+              + " ".join(f"{r['stages_s'].get(s, 0.0):>10.2f}s" for s in stages))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"table_density": args.table_density, "embeddings": args.embeddings, "results": results}, f, indent=1)
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        print(f"\nComparison with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        if not compare_to_baseline(results, args.baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Accuracy / speed report for the table-presence pre-filter.
+
+Runs over a directory of PDFs (real RBI circulars), comparing the PyMuPDF
+ruling-line pre-pass against pdfplumber's extract_tables() on every page.
+
+Usage:
+    python scripts/benchmark_table_prefilter.py fixtures/rbi_circulars
+"""
+import os
+import sys
+import time
+import argparse
+import fitz
+import pdfplumber
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from services.pdf_extraction import page_may_contain_tables, table_to_json
+
+
+def benchmark_pdf(pdf_path: str) -> dict:
+    stats = {"pages": 0, "true_pos": 0, "false_pos": 0, "false_neg": 0, "true_neg": 0,
+             "prefilter_s": 0.0, "tables_all_s": 0.0, "tables_candidates_s": 0.0, "missed_pages": []}
+    with fitz.open(pdf_path) as fitz_doc, pdfplumber.open(pdf_path) as plub_doc:
+        for page_num in range(len(fitz_doc)):
+            stats["pages"] += 1
+
+            start = time.perf_counter()
+            candidate = page_may_contain_tables(fitz_doc[page_num])
+            stats["prefilter_s"] += time.perf_counter() - start
+
+            plub_page = plub_doc.pages[page_num]
+            start = time.perf_counter()
+            tables = plub_page.extract_tables()
+            elapsed = time.perf_counter() - start
+            plub_page.flush_cache()
+            stats["tables_all_s"] += elapsed
+            if candidate:
+                stats["tables_candidates_s"] += elapsed
+
+            # Ground truth: pages where the current pipeline stores at least one structured table
+            has_tables = any(table_to_json(t, page_num + 1, i, "") for i, t in enumerate(tables))
+            if candidate and has_tables:
+                stats["true_pos"] += 1
+            elif candidate:
+                stats["false_pos"] += 1
+            elif has_tables:
+                stats["false_neg"] += 1
+                stats["missed_pages"].append(page_num + 1)
+            else:
+                stats["true_neg"] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table pre-filter accuracy/speed report")
+    parser.add_argument("fixtures_dir", help="Directory of PDF fixtures (e.g. saved RBI circulars)")
+    args = parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(args.fixtures_dir) if f.lower().endswith(".pdf"))
+    if not pdfs:
+        print(f"❌ No PDFs found in {args.fixtures_dir}")
+        sys.exit(1)
+
+    totals = {}
+    print(f"{'file':40} {'pages':>6} {'cand':>5} {'miss':>5} {'plumber all':>12} {'prefilter+cand':>15}")
+    for name in pdfs:
+        stats = benchmark_pdf(os.path.join(args.fixtures_dir, name))
+        for key, value in stats.items():
+            if key != "missed_pages":
+                totals[key] = totals.get(key, 0) + value
+        candidates = stats["true_pos"] + stats["false_pos"]
+        print(f"{name[:40]:40} {stats['pages']:>6} {candidates:>5} {stats['false_neg']:>5} "
+              f"{stats['tables_all_s']:>11.2f}s {stats['prefilter_s'] + stats['tables_candidates_s']:>14.2f}s"
+              + (f"  missed pages: {stats['missed_pages']}" if stats["missed_pages"] else ""))
+
+    table_pages = totals["true_pos"] + totals["false_neg"]
+    candidates = totals["true_pos"] + totals["false_pos"]
+    recall = totals["true_pos"] / table_pages if table_pages else 1.0
+    precision = totals["true_pos"] / candidates if candidates else 1.0
+    before = totals["tables_all_s"]
+    after = totals["prefilter_s"] + totals["tables_candidates_s"]
+
+    print("\n📊 Table pre-filter report")
+    print(f"   Documents: {len(pdfs)}  Pages: {totals['pages']}  Pages with tables: {table_pages}")
+    print(f"   Candidate pages sent to pdfplumber: {candidates} ({candidates / totals['pages']:.0%})")
+    print(f"   Recall (table pages kept): {recall:.1%}   Precision: {precision:.1%}")
+    print(f"   Table extraction time: {before:.2f}s -> {after:.2f}s "
+          f"(pre-pass {totals['prefilter_s']:.2f}s, speed-up x{before / after if after else 0:.1f})")
+
+
+if __name__ == "__main__":
+    main()
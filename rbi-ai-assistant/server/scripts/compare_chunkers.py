@@ -0,0 +1,97 @@
+"""
+Compares the structure-aware chunker with the previous fixed-size chunker
+(1,200 characters, 200 overlap) on a directory of PDFs.
+
+Reports chunk counts, characters sent to the embedder, overlap redundancy and
+how many markdown tables were cut in half. With --queries it also measures
+retrieval recall@k: a JSONL file of {"query": ..., "answer": ...} lines, where a
+hit is a top-k chunk containing the answer text (needs sentence-transformers).
+
+Usage:
+    python scripts/compare_chunkers.py fixtures/rbi_circulars --queries fixtures/queries.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from services.pdf_extraction import extract_page_range, count_pages
+from services.chunking import chunk_text, TABLE_MARKER
+
+
+def legacy_chunk_text(text, chunk_size=1200, overlap=200):
+    """The fixed-size chunker previously copied in routes/upload.py and ingestion_service.py."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        chunks.append(text[start:end])
+        if end == len(text):
+            break
+        start += (chunk_size - overlap)
+    return chunks
+
+
+def split_tables(chunks) -> int:
+    """Chunks holding a table fragment without its marker, or a marker whose table runs past the end."""
+    broken = 0
+    for chunk in chunks:
+        lines = chunk.strip().split("\n")
+        if lines and lines[0].startswith("|") and TABLE_MARKER not in chunk:
+            broken += 1
+        elif TABLE_MARKER in chunk and lines[-1].startswith("|") and not lines[-1].rstrip().endswith("|"):
+            broken += 1
+    return broken
+
+
+def recall_at_k(chunks, queries, k):
+    from sentence_transformers import SentenceTransformer, util
+    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    texts = [c["text"] for c in chunks]
+    corpus = model.encode(texts, convert_to_tensor=True, batch_size=64)
+    hits = 0
+    for q in queries:
+        query_embedding = model.encode(q["query"], convert_to_tensor=True)
+        top = util.semantic_search(query_embedding, corpus, top_k=k)[0]
+        answer = " ".join(q["answer"].lower().split())
+        if any(answer in " ".join(texts[h["corpus_id"]].lower().split()) for h in top):
+            hits += 1
+    return hits / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Structure-aware vs fixed-size chunker report")
+    parser.add_argument("fixtures_dir", help="Directory of PDF fixtures (e.g. saved RBI circulars)")
+    parser.add_argument("--queries", help="JSONL of {query, answer} pairs for recall@k")
+    parser.add_argument("--k", type=int, default=8, help="Top-k for recall (match_documents uses 8)")
+    args = parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(args.fixtures_dir) if f.lower().endswith(".pdf"))
+    results = {"legacy": [], "structured": []}
+    source_chars = 0
+    for name in pdfs:
+        path = os.path.join(args.fixtures_dir, name)
+        for page in extract_page_range(path, 0, count_pages(path), name):
+            source_chars += len(page["text"])
+            for label, chunker in (("legacy", legacy_chunk_text), ("structured", chunk_text)):
+                results[label].extend({"text": c, "page": page["page_number"], "file": name} for c in chunker(page["text"]))
+
+    print(f"\n📊 Chunker comparison over {len(pdfs)} document(s), {source_chars} source characters")
+    queries = []
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [json.loads(line) for line in f if line.strip()]
+
+    for label, chunks in results.items():
+        embedded_chars = sum(len(c["text"]) for c in chunks)
+        redundancy = (embedded_chars - source_chars) / source_chars if source_chars else 0
+        line = (f"   {label:10} chunks={len(chunks):6}  embedded chars={embedded_chars:9}  "
+                f"redundancy={redundancy:+.1%}  split tables={split_tables(c['text'] for c in chunks)}")
+        if queries:
+            line += f"  recall@{args.k}={recall_at_k(chunks, queries, args.k):.1%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
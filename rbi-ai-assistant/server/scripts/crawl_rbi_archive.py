@@ -0,0 +1,323 @@
+"""
+Historical RBI archive crawler.
+
+Walks the monthly archive listings (one seed per section, year and month), follows
+"Next" pagination, opens each notification's detail page when the listing does not
+link the PDF directly, and feeds every PDF through the upload pipeline (the same
+path as scripts/backfill_archive.py: dedupe, validation, extraction, embedding).
+
+Politeness: request starts are spaced at least --interval seconds apart across all
+workers, at most --fetch-concurrency requests are in flight, and 429/503 answers are
+retried after their Retry-After delay. PDFs are downloaded to a spool directory and
+ingested by --workers concurrent ingestion workers.
+
+The frontier (pages to visit, documents found and their status) is kept in a JSON
+file updated after every page and document. Re-running the same command resumes:
+visited pages are not fetched again, finished documents are skipped, failed pages
+and documents are retried (pages up to MAX_PAGE_ATTEMPTS times).
+
+The live site selects the month through a form postback; the section templates use
+the equivalent GET form (?Year=&Month=). Point RBI_BASE_URL at a local mirror to
+crawl offline, e.g. recorded pages served by scripts/rbi_fixture_server.py.
+
+Usage:
+    python scripts/crawl_rbi_archive.py --from 2019-01 --to 2024-12 --interval 1.5
+    python scripts/crawl_rbi_archive.py --sections notifications --from 2024-01 --to 2024-03 --limit 20
+"""
+import os
+import sys
+import time
+import asyncio
+import hashlib
+import argparse
+from datetime import date, datetime
+from urllib.parse import urljoin, urlparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from services.job_queue import DATA_DIR, INGESTION_WORKERS
+from services.html_parser import parse_html
+from services.scraper_service import RBI_BASE_URL, create_http_client
+from services.pdf_extraction import shutdown_extraction_executor
+from scripts.backfill_archive import FINAL_STATUSES, ingest_entry, load_checkpoint, save_checkpoint, notify_archive_summary
+
+DEFAULT_FRONTIER = os.path.join(DATA_DIR, "archive_frontier.json")
+SPOOL_DIR = os.path.join(DATA_DIR, "crawl_spool")
+# Monthly archive listing per section: (URL template, category given to its documents)
+ARCHIVE_SECTIONS = {
+    "notifications": ("/Scripts/NotificationUser.aspx?Year={year}&Month={month}", "Notification"),
+    "master_directions": ("/Scripts/BS_ViewMasterDirections.aspx?Year={year}&Month={month}", "Master Direction"),
+}
+MAX_PAGE_ATTEMPTS = 3
+MAX_FETCH_RETRIES = 3
+RETRY_STATUSES = (429, 503)
+NEXT_LINK_TEXTS = ("next", ">", ">>", "»")
+
+
+class RateLimiter:
+    """Spaces request starts at least `interval` seconds apart, shared by every worker."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            # Re-check after sleeping: pause() may have pushed the next start back meanwhile
+            while True:
+                now = time.monotonic()
+                if self._next_start <= now:
+                    break
+                await asyncio.sleep(self._next_start - now)
+            self._next_start = now + self.interval
+
+    def pause(self, seconds: float):
+        """Server asked us to back off: no request starts for `seconds`."""
+        self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+
+def month_range(start: str, end: str) -> list:
+    """[(year, month)] from 'YYYY-MM' to 'YYYY-MM' inclusive, never past the current month."""
+    year, month = (int(x) for x in start.split("-"))
+    end_year, end_month = (int(x) for x in end.split("-"))
+    today = date.today()
+    months = []
+    while (year, month) <= (end_year, end_month) and (year, month) <= (today.year, today.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def is_pdf_link(href: str) -> bool:
+    return href.split("#", 1)[0].split("?", 1)[0].lower().endswith(".pdf")
+
+
+def parse_listing_page(html: str, page_url: str) -> dict:
+    """
+    One archive listing page -> {"documents": [{url, title}], "details": [{url, title}], "next": url or None}.
+    A row linking its PDF directly becomes a document; otherwise its notification link is a detail page.
+    """
+    page = parse_html(html)
+    documents, details = [], []
+    for _, links in page.rows():
+        pdf = next((a for a in links if is_pdf_link(a.href)), None)
+        item = next((a for a in links if not is_pdf_link(a.href) and a.text), None)
+        title = (item.text if item else "") or (pdf.title if pdf else "")
+        if pdf:
+            documents.append({"url": urljoin(page_url, pdf.href), "title": title})
+        elif item and len(title) > 10:
+            details.append({"url": urljoin(page_url, item.href), "title": title})
+
+    next_url = next((urljoin(page_url, a.href) for a in page.links()
+                     if a.rel == "next" or a.text.lower() in NEXT_LINK_TEXTS), None)
+    return {"documents": documents, "details": details, "next": next_url}
+
+
+def parse_detail_page(html: str, page_url: str):
+    """PDF URL linked from a notification's detail page, or None."""
+    return next((urljoin(page_url, a.href) for a in parse_html(html).links() if is_pdf_link(a.href)), None)
+
+
+class ArchiveCrawler:
+    def __init__(self, frontier_path: str = DEFAULT_FRONTIER, base_url: str = None, interval: float = 1.0,
+                 fetch_concurrency: int = 2, workers: int = INGESTION_WORKERS, spool_dir: str = SPOOL_DIR,
+                 limit: int = None):
+        self.frontier_path = frontier_path
+        self.base_url = (base_url or RBI_BASE_URL).rstrip("/")
+        self.rate_limiter = RateLimiter(interval)
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.workers = max(1, workers)
+        self.spool_dir = spool_dir
+        self.limit = limit
+        self.frontier = load_checkpoint(frontier_path) or {"pages": {}, "documents": {}}
+        self.totals = {"pages": 0, "ingested": 0, "duplicate": 0, "rejected": 0, "failed": 0, "pages_failed": 0}
+        self._lock = asyncio.Lock()
+
+    # --- frontier --------------------------------------------------------
+    def seed(self, sections: list, months: list):
+        for section in sections:
+            template, category = ARCHIVE_SECTIONS[section]
+            for year, month in months:
+                url = self.base_url + template.format(year=year, month=month)
+                self.frontier["pages"].setdefault(url, {"kind": "listing", "category": category, "status": "pending"})
+
+    def add_page(self, url: str, kind: str, category: str, title: str = None) -> bool:
+        if url in self.frontier["pages"]:
+            return False
+        self.frontier["pages"][url] = {"kind": kind, "category": category, "title": title, "status": "pending"}
+        return True
+
+    def add_document(self, url: str, title: str, category: str) -> bool:
+        if url in self.frontier["documents"]:
+            return False
+        self.frontier["documents"][url] = {"title": title, "category": category, "status": "pending"}
+        return True
+
+    def pending_pages(self) -> list:
+        return [url for url, page in self.frontier["pages"].items()
+                if page["status"] != "done" and page.get("attempts", 0) < MAX_PAGE_ATTEMPTS]
+
+    def pending_documents(self) -> list:
+        return [url for url, doc in self.frontier["documents"].items() if doc["status"] not in FINAL_STATUSES]
+
+    def save(self):
+        save_checkpoint(self.frontier_path, self.frontier)
+
+    # --- fetching --------------------------------------------------------
+    async def fetch(self, client, url: str, fetch_slots) -> bytes:
+        for attempt in range(MAX_FETCH_RETRIES + 1):
+            # Rate slot only once a connection is free, so queued requests do not start back to back
+            async with fetch_slots:
+                await self.rate_limiter.wait()
+                response = await client.get(url)
+            if response.status_code in RETRY_STATUSES and attempt < MAX_FETCH_RETRIES:
+                try:
+                    retry_after = float(response.headers.get("Retry-After", ""))
+                except ValueError:
+                    retry_after = 2 ** attempt * self.rate_limiter.interval
+                print(f"WARNING: {response.status_code} for {url}; backing off {retry_after:.1f}s.")
+                self.rate_limiter.pause(retry_after)
+                continue
+            response.raise_for_status()
+            return response.content
+
+    # --- crawl -----------------------------------------------------------
+    async def crawl_page(self, client, url: str, fetch_slots, page_queue, document_queue):
+        page = self.frontier["pages"][url]
+        try:
+            body = await self.fetch(client, url, fetch_slots)
+            html = body.decode("utf-8", errors="replace")
+            if page["kind"] == "listing":
+                parsed = await asyncio.to_thread(parse_listing_page, html, url)
+                found = [(d["url"], d["title"]) for d in parsed["documents"]]
+                details = parsed["details"]
+                next_url = parsed["next"]
+            else:
+                pdf_url = await asyncio.to_thread(parse_detail_page, html, url)
+                found = [(pdf_url, page.get("title"))] if pdf_url else []
+                details, next_url = [], None
+        except Exception as e:
+            async with self._lock:
+                page["attempts"] = page.get("attempts", 0) + 1
+                page["status"] = "failed"
+                page["error"] = str(e)
+                self.totals["pages_failed"] += 1
+                self.save()
+            print(f"❌ {url}: {e}")
+            return
+
+        async with self._lock:
+            for detail in details:
+                if self.add_page(detail["url"], "detail", page["category"], detail["title"]):
+                    page_queue.put_nowait(detail["url"])
+            if next_url and self.add_page(next_url, "listing", page["category"]):
+                page_queue.put_nowait(next_url)
+            for pdf_url, title in found:
+                if self.add_document(pdf_url, title or os.path.basename(urlparse(pdf_url).path), page["category"]):
+                    document_queue.put_nowait(pdf_url)
+            page.update(status="done", error=None, crawled_at=datetime.utcnow().isoformat())
+            self.totals["pages"] += 1
+            self.save()
+        print(f"🔎 {url}: {len(found)} PDF(s), {len(details)} notification page(s)" + (", next page" if next_url else ""))
+
+    async def ingest_document(self, client, url: str, fetch_slots) -> dict:
+        doc = self.frontier["documents"][url]
+        os.makedirs(self.spool_dir, exist_ok=True)
+        spool_path = os.path.join(self.spool_dir, hashlib.sha256(url.encode("utf-8")).hexdigest()[:24] + ".pdf")
+        try:
+            body = await self.fetch(client, url, fetch_slots)
+            with open(spool_path, "wb") as f:
+                f.write(body)
+            # Historical circulars: one summary notification per crawl, not one per document
+            return await ingest_entry({"path": spool_path, "title": doc["title"], "category": doc["category"]}, notify=False)
+        except Exception as e:
+            return {"title": doc["title"], "status": "failed", "error": str(e),
+                    "finished_at": datetime.utcnow().isoformat()}
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+
+    async def run(self) -> dict:
+        page_queue, document_queue = asyncio.Queue(), asyncio.Queue()
+        for url in self.pending_pages():
+            page_queue.put_nowait(url)
+        for url in self.pending_documents():
+            document_queue.put_nowait(url)
+        print(f"INFO: Frontier: {page_queue.qsize()} page(s) to crawl, {document_queue.qsize()} document(s) to ingest.")
+
+        fetch_slots = asyncio.Semaphore(self.fetch_concurrency)
+        started = {"documents": 0}
+
+        async def page_worker(client):
+            while True:
+                url = await page_queue.get()
+                try:
+                    await self.crawl_page(client, url, fetch_slots, page_queue, document_queue)
+                finally:
+                    page_queue.task_done()
+
+        async def document_worker(client):
+            while True:
+                url = await document_queue.get()
+                try:
+                    if self.limit is not None and started["documents"] >= self.limit:
+                        continue
+                    started["documents"] += 1
+                    record = await self.ingest_document(client, url, fetch_slots)
+                    async with self._lock:
+                        self.frontier["documents"][url].update(record)
+                        self.totals[record["status"]] += 1
+                        self.save()
+                    print(f"{'✅' if record['status'] in FINAL_STATUSES else '❌'} {record['title']}: {record['status']}"
+                          + (f" ({record['error']})" if record.get("error") else ""))
+                finally:
+                    document_queue.task_done()
+
+        start = time.perf_counter()
+        async with create_http_client(self.fetch_concurrency) as client:
+            tasks = [asyncio.create_task(page_worker(client)) for _ in range(self.fetch_concurrency)]
+            tasks += [asyncio.create_task(document_worker(client)) for _ in range(self.workers)]
+            try:
+                # Pages feed the document queue, so drain pages first
+                await page_queue.join()
+                await document_queue.join()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        self.totals["elapsed_s"] = time.perf_counter() - start
+        return self.totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the RBI archives and ingest historical PDFs (resumable)")
+    parser.add_argument("--from", dest="start", required=True, help="First month, YYYY-MM")
+    parser.add_argument("--to", dest="end", default=date.today().strftime("%Y-%m"), help="Last month, YYYY-MM")
+    parser.add_argument("--sections", nargs="+", choices=sorted(ARCHIVE_SECTIONS), default=sorted(ARCHIVE_SECTIONS))
+    parser.add_argument("--interval", type=float, default=1.0, help="Minimum seconds between request starts")
+    parser.add_argument("--fetch-concurrency", type=int, default=2, help="Requests in flight at once")
+    parser.add_argument("--workers", type=int, default=INGESTION_WORKERS, help="Documents ingested concurrently")
+    parser.add_argument("--frontier", default=DEFAULT_FRONTIER, help="Frontier JSON file")
+    parser.add_argument("--limit", type=int, default=None, help="Ingest at most N documents this run")
+    args = parser.parse_args()
+
+    crawler = ArchiveCrawler(args.frontier, interval=args.interval, fetch_concurrency=args.fetch_concurrency,
+                             workers=args.workers, limit=args.limit)
+    crawler.seed(args.sections, month_range(args.start, args.end))
+    try:
+        totals = asyncio.run(crawler.run())
+    finally:
+        shutdown_extraction_executor()
+    notify_archive_summary("the RBI archive crawl", totals)
+
+    print("\n📊 Archive crawl report")
+    print(f"   Pages crawled: {totals['pages']}  Page failures: {totals['pages_failed']}")
+    print(f"   Ingested: {totals['ingested']}  Duplicates: {totals['duplicate']}  "
+          f"Rejected: {totals['rejected']}  Failed: {totals['failed']}")
+    print(f"   Elapsed: {totals['elapsed_s']:.1f}s  Frontier: {args.frontier}")
+    if crawler.pending_pages() or crawler.pending_documents():
+        print("   Re-run the same command to continue (pending pages/documents remain).")
+
+
+if __name__ == "__main__":
+    main()
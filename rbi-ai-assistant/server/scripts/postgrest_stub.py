@@ -0,0 +1,314 @@
+"""
+Local PostgREST-compatible stub for offline testing and benchmarks.
+
+Implements the subset of the Supabase REST surface this server uses:
+  /rest/v1/<table>   GET / POST (insert + upsert via on_conflict) / PATCH / DELETE
+                     filters: eq, neq, in, is, gt, gte, lt, lte, or=(...) with nested and(...);
+                     order, limit, select, count=exact
+  /rest/v1/rpc/<fn>  POST, dispatched to handlers registered in `rpc_handlers`
+  /storage/v1/object/<bucket>/<path>   POST / PUT uploads, DELETE removal
+Rows live in memory. `unique_keys[table]` lists columns with a unique index: a plain insert
+that repeats a non-null value gets the 409 / 23505 Postgres would return. `fail_next(n)` makes the next n write requests return 503
+to exercise retry paths.
+
+Usage (standalone):
+    python scripts/postgrest_stub.py --port 54321
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_ROLE_KEY=stub python main.py
+"""
+import json
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qsl, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def _coerce(value: str):
+    if value == "null":
+        return None
+    if value in ("true", "false"):
+        return value == "true"
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def _split_in_list(value: str) -> list:
+    inner = value[1:-1] if value.startswith("(") and value.endswith(")") else value
+    return [_coerce(v.strip().strip('"')) for v in inner.split(",") if v.strip()]
+
+
+def _split_top_level(value: str) -> list:
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in value:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    return parts + [current] if current else parts
+
+
+def _parse_logic(op: str, value: str) -> tuple:
+    """or=(a.eq.1,and(b.gt.2,c.lt.3)) -> ("or", [("a", "eq", "1"), ("and", [...])])."""
+    conditions = []
+    for part in _split_top_level(value[1:-1]):
+        if part.startswith(("and(", "or(")):
+            name, _, inner = part.partition("(")
+            conditions.append(_parse_logic(name, "(" + inner))
+        else:
+            column, op_name, operand = part.split(".", 2)
+            conditions.append((column, op_name, operand.strip('"')))
+    return (op, conditions)
+
+
+def _matches(row: dict, filters: list) -> bool:
+    for condition in filters:
+        if len(condition) == 2:
+            logic, conditions = condition
+            results = [_matches(row, [c]) for c in conditions]
+            if not (any(results) if logic == "or" else all(results)):
+                return False
+            continue
+        column, op, value = condition
+        current = row.get(column)
+        if op == "eq" and current != _coerce(value) and str(current) != value:
+            return False
+        if op == "neq" and (current == _coerce(value) or str(current) == value):
+            return False
+        if op == "in" and current not in _split_in_list(value) and str(current) not in [str(v) for v in _split_in_list(value)]:
+            return False
+        if op == "is" and current is not _coerce(value):
+            return False
+        if op in ("gt", "gte", "lt", "lte"):
+            if current is None:
+                return False
+            target = _coerce(value)
+            if isinstance(current, str) and not isinstance(target, str):
+                target = str(target)
+            if op == "gt" and not current > target: return False
+            if op == "gte" and not current >= target: return False
+            if op == "lt" and not current < target: return False
+            if op == "lte" and not current <= target: return False
+    return True
+
+
+class PostgrestStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.tables = {}
+        self.storage = {}
+        self.rpc_handlers = {}
+        self.unique_keys = {}
+        self.requests = []
+        self._next_id = {}
+        self._failures = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=None, headers=None):
+                payload = b"" if body is None else json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def do_GET(self):
+                stub._dispatch(self, "GET")
+
+            def do_POST(self):
+                stub._dispatch(self, "POST")
+
+            def do_PUT(self):
+                stub._dispatch(self, "PUT")
+
+            def do_PATCH(self):
+                stub._dispatch(self, "PATCH")
+
+            def do_DELETE(self):
+                stub._dispatch(self, "DELETE")
+
+            def do_HEAD(self):
+                stub._dispatch(self, "HEAD")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    # --- lifecycle -------------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fail_next(self, count: int = 1):
+        with self._lock:
+            self._failures += count
+
+    def rows(self, table: str) -> list:
+        return self.tables.get(table, [])
+
+    # --- request handling ------------------------------------------------
+    def _dispatch(self, handler, method):
+        parsed = urlparse(handler.path)
+        path = unquote(parsed.path)
+        body = handler._body() if method in ("POST", "PUT", "PATCH", "DELETE") else b""
+        with self._lock:
+            self.requests.append((method, path, len(body)))
+            if method in ("POST", "PUT", "PATCH", "DELETE") and self._failures > 0:
+                self._failures -= 1
+                return handler._send(503, {"message": "stub: injected failure"})
+
+        if path.startswith("/storage/v1/object/"):
+            return self._storage(handler, method, path[len("/storage/v1/object/"):], body)
+        if path.startswith("/rest/v1/rpc/"):
+            name = path[len("/rest/v1/rpc/"):]
+            rpc = self.rpc_handlers.get(name)
+            if not rpc:
+                return handler._send(404, {"message": f"function {name} not found"})
+            with self._lock:
+                result = rpc(self, json.loads(body or b"{}"))
+            return handler._send(200, result)
+        if path.startswith("/rest/v1/"):
+            table = path[len("/rest/v1/"):].strip("/")
+            params = parse_qsl(parsed.query, keep_blank_values=True)
+            with self._lock:
+                return self._table(handler, method, table, params, body)
+        return handler._send(404, {"message": "not found"})
+
+    def _storage(self, handler, method, key, body):
+        if method in ("POST", "PUT"):
+            self.storage[key] = len(body)
+            return handler._send(200, {"Key": key, "Id": key})
+        if method == "DELETE":
+            removed = []
+            for prefix in json.loads(body or b"{}").get("prefixes", []) or [key]:
+                full = f"{key.rstrip('/')}/{prefix}" if prefix != key else key
+                if self.storage.pop(full, None) is not None:
+                    removed.append({"name": full})
+            return handler._send(200, removed)
+        return handler._send(200, {})
+
+    def _table(self, handler, method, table, params, body):
+        rows = self.tables.setdefault(table, [])
+        prefer = handler.headers.get("Prefer", "")
+        filters = []
+        order = None
+        limit = None
+        offset = 0
+        select = None
+        on_conflict = None
+        for key, value in params:
+            if key == "order":
+                order = value
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            elif key == "select":
+                select = value
+            elif key == "on_conflict":
+                on_conflict = [c.strip() for c in value.split(",")]
+            elif key == "columns":
+                continue
+            elif key in ("or", "and"):
+                filters.append(_parse_logic(key, value))
+            elif "." in value:
+                op, _, operand = value.partition(".")
+                filters.append((key, op, operand))
+
+        if method in ("GET", "HEAD"):
+            matched = [r for r in rows if _matches(r, filters)]
+            if order:
+                for part in reversed(order.split(",")):
+                    column, _, direction = part.partition(".")
+                    descending = direction.startswith("desc")
+                    matched.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else 0), reverse=descending)
+            total = len(matched)
+            matched = matched[offset:offset + limit if limit is not None else None]
+            if select and select != "*":
+                columns = [c.strip() for c in select.split(",")]
+                matched = [{c: r.get(c) for c in columns} for r in matched]
+            headers = {"Content-Range": f"0-{max(len(matched) - 1, 0)}/{total if 'count=' in prefer else '*'}"}
+            return handler._send(200, [] if method == "HEAD" else matched, headers)
+
+        if method == "POST":
+            payload = json.loads(body or b"[]")
+            incoming = payload if isinstance(payload, list) else [payload]
+            written = []
+            for row in incoming:
+                row = dict(row)
+                existing = None
+                if on_conflict:
+                    key = tuple(row.get(c) for c in on_conflict)
+                    existing = next((r for r in rows if tuple(r.get(c) for c in on_conflict) == key), None)
+                if existing is not None:
+                    if "resolution=ignore-duplicates" in prefer:
+                        continue
+                    if "resolution=merge-duplicates" in prefer:
+                        existing.update(row)
+                        written.append(existing)
+                        continue
+                    return handler._send(409, {"code": "23505", "message": "duplicate key value violates unique constraint"})
+                for column in self.unique_keys.get(table, []):
+                    if row.get(column) is not None and any(r.get(column) == row[column] for r in rows):
+                        return handler._send(409, {"code": "23505", "message": "duplicate key value violates unique constraint "
+                                                   f'"idx_{table}_{column}"'})
+                if "id" not in row:
+                    self._next_id[table] = self._next_id.get(table, 0) + 1
+                    row["id"] = self._next_id[table]
+                rows.append(row)
+                written.append(row)
+            return handler._send(201, written if "return=representation" in prefer else None)
+
+        if method == "PATCH":
+            changes = json.loads(body or b"{}")
+            updated = []
+            for row in rows:
+                if _matches(row, filters):
+                    row.update(changes)
+                    updated.append(row)
+            return handler._send(200, updated if "return=representation" in prefer else None)
+
+        if method == "DELETE":
+            kept = [r for r in rows if not _matches(r, filters)]
+            deleted = [r for r in rows if _matches(r, filters)]
+            self.tables[table] = kept
+            return handler._send(200, deleted if "return=representation" in prefer else None)
+
+        return handler._send(405, {"message": "method not allowed"})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local PostgREST-compatible stub")
+    parser.add_argument("--port", type=int, default=54321)
+    args = parser.parse_args()
+    stub = PostgrestStub(port=args.port)
+    print(f"INFO: PostgREST stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,170 @@
+"""
+Local stand-in for www.rbi.org.in, serving saved pages and PDFs for scraper tests.
+
+Routes map a request path (including query string) to a body and content type;
+`add_directory` serves saved files under a URL prefix. Every request is logged,
+`delay` adds per-request latency, and `max_in_flight` records the peak number of
+concurrent requests so tests can assert on fetch parallelism. Routes added with an
+ETag or Last-Modified header answer matching conditional requests with 304;
+`bytes_sent` totals the response bodies served. `throttle_next(n)` answers the next n
+requests with 429 + Retry-After, and `add_manifest` serves recorded pages whose URLs
+carry query strings (JSON {"/path?query": "file"}).
+
+Usage (standalone, serving a directory of saved pages):
+    python scripts/rbi_fixture_server.py fixtures/rbi --port 8765
+    python scripts/rbi_fixture_server.py fixtures/rbi --manifest fixtures/rbi/archive/routes.json
+    RBI_BASE_URL=http://127.0.0.1:8765 python manual_sync_debug.py
+"""
+import os
+import json
+import time
+import argparse
+import mimetypes
+import threading
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CONTENT_TYPES = {".aspx": "text/html; charset=utf-8", ".html": "text/html; charset=utf-8", ".pdf": "application/pdf"}
+
+
+class RBIFixtureServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.routes = {}
+        self.requests = []
+        self.request_times = []
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.bytes_sent = 0
+        self.throttled = 0
+        self.retry_after = 1
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    # --- lifecycle -------------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- content ---------------------------------------------------------
+    def add(self, path: str, body, content_type: str = None, headers: dict = None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        extension = os.path.splitext(urlparse(path).path)[1].lower()
+        content_type = content_type or CONTENT_TYPES.get(extension) or mimetypes.guess_type(path)[0] or "text/html"
+        self.routes[path] = {"body": body, "content_type": content_type, "headers": dict(headers or {})}
+
+    def add_directory(self, directory: str, prefix: str = "/"):
+        for root, _, files in os.walk(directory):
+            for name in files:
+                full_path = os.path.join(root, name)
+                relative = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    self.add(prefix.rstrip("/") + "/" + relative, f.read())
+
+    def add_manifest(self, manifest_path: str):
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        for path, file_name in manifest.items():
+            with open(os.path.join(base_dir, file_name), "rb") as f:
+                self.add(path, f.read(), content_type=CONTENT_TYPES.get(os.path.splitext(file_name)[1].lower()))
+
+    def throttle_next(self, count: int = 1, retry_after: float = 1):
+        self.throttled = count
+        self.retry_after = retry_after
+
+    def paths_requested(self) -> list:
+        return [path for _, path in self.requests]
+
+    # --- request handling ------------------------------------------------
+    @staticmethod
+    def _not_modified(handler, headers: dict) -> bool:
+        etag = headers.get("ETag")
+        if_none_match = handler.headers.get("If-None-Match")
+        if etag and if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(",")]
+        last_modified = headers.get("Last-Modified")
+        return bool(last_modified) and handler.headers.get("If-Modified-Since") == last_modified
+
+    def _handle(self, handler):
+        with self._lock:
+            self.requests.append(("GET", handler.path))
+            self.request_times.append(time.monotonic())
+            throttle = self.throttled > 0
+            if throttle:
+                self.throttled -= 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if throttle:
+                handler.send_response(429)
+                handler.send_header("Retry-After", str(self.retry_after))
+                handler.send_header("Content-Length", "0")
+                handler.end_headers()
+                return
+            route = self.routes.get(handler.path) or self.routes.get(urlparse(handler.path).path)
+            if route is None:
+                body = b"Not Found"
+                handler.send_response(404)
+                handler.send_header("Content-Type", "text/plain")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+                return
+            if self._not_modified(handler, route["headers"]):
+                handler.send_response(304)
+                for key, value in route["headers"].items():
+                    handler.send_header(key, value)
+                handler.end_headers()
+                return
+            handler.send_response(200)
+            handler.send_header("Content-Type", route["content_type"])
+            handler.send_header("Content-Length", str(len(route["body"])))
+            for key, value in route["headers"].items():
+                handler.send_header(key, value)
+            handler.end_headers()
+            handler.wfile.write(route["body"])
+            with self._lock:
+                self.bytes_sent += len(route["body"])
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved RBI pages locally")
+    parser.add_argument("directory", help="Directory of saved pages (mirrors the site's paths)")
+    parser.add_argument("--manifest", help="JSON map of URL (with query string) to recorded file")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    fixture_server = RBIFixtureServer(port=args.port)
+    fixture_server.add_directory(args.directory)
+    if args.manifest:
+        fixture_server.add_manifest(args.manifest)
+    print(f"INFO: RBI fixture server listening on {fixture_server.url} ({len(fixture_server.routes)} routes)")
+    try:
+        fixture_server.server.serve_forever()
+    except KeyboardInterrupt:
+        fixture_server.stop()
@@ -0,0 +1,107 @@
+"""
+Helpers shared by the server tests (test_*.py): a job progress recorder, attribute patching,
+the PostgREST stub wired into services.supabase_client, offline pipeline settings (fake
+embeddings, throwaway extraction cache) and small RBI circular PDFs built with PyMuPDF.
+"""
+import os
+import asyncio
+import tempfile
+import contextlib
+import fitz
+import services.extraction_cache as extraction_cache
+from services.pdf_extraction import iter_pdf_pages
+from scripts.postgrest_stub import PostgrestStub
+
+CIRCULAR_REFERENCE = "RBI/2024-25/77 DOR.STR.REC.12/21.04.048/2024-25"
+
+
+class Progress:
+    """In-memory stand-in for the job queue's progress object."""
+
+    def __init__(self):
+        self.values = {}
+
+    def update(self, **values):
+        self.values.update(values)
+
+    def increment(self, key, amount=1):
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def flush(self):
+        pass
+
+
+@contextlib.contextmanager
+def patched(target, **attributes):
+    """Sets attributes of a module or class for the duration of the block, then restores them."""
+    originals = {name: getattr(target, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield target
+    finally:
+        for name, value in originals.items():
+            setattr(target, name, value)
+
+
+def fake_embedding(text):
+    return [0.0] * 384
+
+
+@contextlib.contextmanager
+def offline_pipeline(pipeline_module):
+    """Fake embeddings in pipeline_module and a fresh extraction cache directory, restored afterwards."""
+    with patched(pipeline_module, generate_embedding=fake_embedding), \
+            patched(extraction_cache, EXTRACTION_CACHE_DIR=tempfile.mkdtemp()):
+        yield
+
+
+def extracted_pages(pdf_path: str, content_hash: str = None) -> list:
+    """Every page of pdf_path through the streaming extractor (process pool + cache), in page order."""
+    async def collect():
+        return [page async for batch in iter_pdf_pages(pdf_path, os.path.basename(pdf_path), content_hash)
+                for page in batch]
+    return asyncio.run(collect())
+
+
+@contextlib.contextmanager
+def stubbed_supabase(**rpc_handlers):
+    """Starts a PostgrestStub and points the shared Supabase client at it until the block exits."""
+    # Imported here: services.supabase_client needs SUPABASE_URL, which only some tests set
+    import services.supabase_client as supabase_client
+    from supabase import create_client
+
+    stub = PostgrestStub().start()
+    stub.rpc_handlers.update(rpc_handlers)
+    original_client = supabase_client.supabase
+    supabase_client.supabase = create_client(stub.url, "test-key")
+    try:
+        yield stub
+    finally:
+        supabase_client.supabase = original_client
+        stub.stop()
+
+
+def pdf_bytes(pages: list) -> bytes:
+    """Builds a PDF with one page per entry; each entry is a line or a list of lines, top to bottom."""
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        for i, line in enumerate([lines] if isinstance(lines, str) else lines):
+            page.insert_text((72, 72 + 20 * i), line)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def write_pdf(pages: list, path: str = None) -> str:
+    """Writes pdf_bytes(pages) to path (a new temp file by default) and returns the path."""
+    path = path or os.path.join(tempfile.mkdtemp(), "circular.pdf")
+    with open(path, "wb") as f:
+        f.write(pdf_bytes(pages))
+    return path
+
+
+def circular_pages(paragraphs: list, reference: str = CIRCULAR_REFERENCE) -> list:
+    """Pages of a circular: running reference header, one paragraph per page, "Page n of m" footer."""
+    return [[reference, paragraph, f"Page {n} of {len(paragraphs)}"] for n, paragraph in enumerate(paragraphs, start=1)]
@@ -0,0 +1,67 @@
+import os
+import time
+import threading
+from services.supabase_client import get_supabase
+
+# Dashboard polls within this window are answered from memory; writes in this worker invalidate it
+ANALYTICS_CACHE_SECONDS = float(os.getenv("ANALYTICS_CACHE_SECONDS", "60"))
+
+CATEGORY_COLORS = ["#00FF88", "#3B82F6", "#F59E0B", "#EF4444", "#8B5CF6", "#EC4899"]
+
+_cache = {"stats": None, "expires": 0.0, "generation": 0}
+_lock = threading.Lock()
+
+
+def load_category_stats() -> list:
+    """[{category, documents, pages}] aggregated by document_category_stats() (db/schema_analytics.sql).
+
+    Falls back to counting a two-column projection in Python when the function is not migrated yet.
+    """
+    supabase = get_supabase()
+    try:
+        return supabase.rpc("document_category_stats", {}).execute().data or []
+    except Exception as e:
+        print(f"WARNING: document_category_stats RPC unavailable, aggregating in Python: {e}")
+
+    stats = {}
+    for doc in supabase.table("documents").select("category,total_pages").execute().data or []:
+        entry = stats.setdefault(doc.get("category") or "General", {"documents": 0, "pages": 0})
+        entry["documents"] += 1
+        entry["pages"] += doc.get("total_pages") or 0
+    ordered = sorted(stats.items(), key=lambda item: (-item[1]["documents"], item[0]))
+    return [{"category": name, **counts} for name, counts in ordered]
+
+
+def format_analytics(rows: list) -> dict:
+    categories = [
+        {"name": row["category"], "count": row["documents"], "color": CATEGORY_COLORS[i % len(CATEGORY_COLORS)]}
+        for i, row in enumerate(rows)
+    ]
+    return {
+        "total_documents": sum(row["documents"] for row in rows),
+        "total_pages": sum(row["pages"] or 0 for row in rows),
+        "categories": categories,
+    }
+
+
+def get_document_stats(refresh: bool = False) -> dict:
+    """Analytics payload for the dashboard, cached for ANALYTICS_CACHE_SECONDS."""
+    with _lock:
+        if not refresh and _cache["stats"] is not None and time.monotonic() < _cache["expires"]:
+            return _cache["stats"]
+        generation = _cache["generation"]
+
+    stats = format_analytics(load_category_stats())
+    with _lock:
+        # A write that landed while we were querying may not be counted: do not cache it
+        if _cache["generation"] == generation:
+            _cache["stats"] = stats
+            _cache["expires"] = time.monotonic() + ANALYTICS_CACHE_SECONDS
+    return stats
+
+
+def invalidate_document_stats():
+    """Called after documents are added or removed so the next poll recounts."""
+    with _lock:
+        _cache["stats"] = None
+        _cache["generation"] += 1
@@ -1,24 +1,52 @@
+import os
 import asyncio
-import threading
-import time
+from services.scheduler import get_scheduler
 from services.scraper_service import RBIScraperService
+from services.supabase_client import get_supabase
+from services.extraction_cache import prune_extraction_cache
+from services.analytics import get_document_stats
+from services.notifications import get_notification_hub
 
-def run_scraper_loop():
-    """Loops every 24 hours to scrape RBI updates."""
-    scraper = RBIScraperService()
-    while True:
-        try:
-            print("INFO: Background Scraper started...")
-            asyncio.run(scraper.sync_updates())
-            print("SUCCESS: Background Scraper cycle complete.")
-        except Exception as e:
-            print(f"ERROR: Background Scraper failed: {e}")
-        
-        # Sleep for 24 hours
-        time.sleep(24 * 60 * 60)
+SCRAPER_INTERVAL_HOURS = float(os.getenv("SCRAPER_INTERVAL_HOURS", "24"))
+SCRAPER_JITTER_MINUTES = float(os.getenv("SCRAPER_JITTER_MINUTES", "30"))
+CACHE_WARM_INTERVAL_MINUTES = float(os.getenv("CACHE_WARM_INTERVAL_MINUTES", "30"))
+INDEX_MAINTENANCE_INTERVAL_HOURS = float(os.getenv("INDEX_MAINTENANCE_INTERVAL_HOURS", "24"))
 
-def start_background_tasks():
-    """Starts background threads for daily tasks."""
-    thread = threading.Thread(target=run_scraper_loop, daemon=True)
-    thread.start()
-    print("INFO: Background tasks (RBI Scraper) started.")
+async def sync_rbi_updates():
+    """Scrapes RBI 'What's New' into rbi_updates."""
+    await RBIScraperService().sync_updates()
+
+async def warm_caches():
+    """Loads the embedding model, dashboard stats and unread count in this worker so requests do not pay for them."""
+    try:
+        await asyncio.to_thread(get_document_stats, True)
+    except Exception as e:
+        print(f"WARNING: Failed to warm analytics cache (non-critical): {e}")
+    try:
+        # Picks up notifications written or read through other workers
+        await asyncio.to_thread(get_notification_hub().refresh)
+    except Exception as e:
+        print(f"WARNING: Failed to refresh unread notification count (non-critical): {e}")
+    from services.embedding_service import get_model
+    await asyncio.to_thread(get_model)
+
+async def maintain_indexes():
+    """Prunes the local extraction cache and refreshes planner statistics of the search tables."""
+    await asyncio.to_thread(prune_extraction_cache)
+    supabase = get_supabase()
+    try:
+        await asyncio.to_thread(lambda: supabase.rpc("run_index_maintenance", {}).execute())
+    except Exception as e:
+        print(f"WARNING: Index maintenance RPC failed (non-critical): {e}")
+
+def register_background_jobs(scheduler=None):
+    """Registers the periodic jobs; the scheduler itself is started with the app."""
+    scheduler = scheduler or get_scheduler()
+    scheduler.add_job("rbi_scraper", sync_rbi_updates,
+                      interval=SCRAPER_INTERVAL_HOURS * 3600, jitter=SCRAPER_JITTER_MINUTES * 60)
+    # In-memory caches belong to each worker process, so every worker warms its own
+    scheduler.add_job("cache_warming", warm_caches,
+                      interval=CACHE_WARM_INTERVAL_MINUTES * 60, exclusive=False)
+    scheduler.add_job("index_maintenance", maintain_indexes,
+                      interval=INDEX_MAINTENANCE_INTERVAL_HOURS * 3600, jitter=3600)
+    return scheduler
@@ -0,0 +1,174 @@
+import os
+import re
+import time
+import hashlib
+from services.supabase_client import get_supabase
+from services.chunking import TABLE_MARKER
+from services.dedupe import PAGE_NUMBER_LINE
+
+# A line repeated on this many pages (and this share of pages) of one document is a running header/footer
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", "3"))
+BOILERPLATE_MIN_PAGE_SHARE = float(os.getenv("BOILERPLATE_MIN_PAGE_SHARE", "0.3"))
+# A header/footer-zone line seen in this many documents is corpus boilerplate (addresses, sign-offs...)
+BOILERPLATE_MIN_DOCS = int(os.getenv("BOILERPLATE_MIN_DOCS", "5"))
+# Lines this close to the top/bottom of a page are tracked in the corpus index
+HEADER_ZONE_LINES = 5
+FOOTER_ZONE_LINES = 8
+MIN_SPAN_CHARS = 8
+CORPUS_CACHE_SECONDS = 600
+
+_DIGITS = re.compile(r"\d+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+_corpus_cache = {"hashes": set(), "loaded_at": 0.0}
+
+
+def span_hash(line: str):
+    """
+    Shingle hash of one text line. Digits are folded only in page-number lines, so
+    "Page 3 of 12" and "Page 4 of 12" hash the same; every other line keeps its numbers,
+    so reference numbers ("RBI/2024-25/12"), dates and figures are never merged.
+    Returns None for lines too short to judge.
+    """
+    text = line.lower()
+    if PAGE_NUMBER_LINE.match(text):
+        text = _DIGITS.sub("0", text)
+    normalized = _NON_WORD.sub(" ", text).strip()
+    if len(normalized) < MIN_SPAN_CHARS:
+        return None
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def zone_positions(lines: list) -> set:
+    """
+    Indices of a page's header/footer-zone lines: the first HEADER_ZONE_LINES and last
+    FOOTER_ZONE_LINES non-empty prose lines (markdown tables excluded). On short pages each zone
+    is capped at a third of the lines, so titles and headings in the middle are never zone lines.
+    """
+    prose = []
+    in_table = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped == TABLE_MARKER:
+            in_table = True
+        elif in_table and not stripped.startswith("|"):
+            in_table = False
+        if not in_table and stripped:
+            prose.append(i)
+    header = min(HEADER_ZONE_LINES, len(prose) // 3)
+    footer = min(FOOTER_ZONE_LINES, len(prose) // 3)
+    return set(prose[:header] + prose[len(prose) - footer:])
+
+
+class SpanCounter:
+    """Accumulates span statistics one page at a time, so a single streaming text pass can feed them."""
+
+    def __init__(self):
+        self.page_counts = {}
+        self.zone_spans = {}
+        self.pages = 0
+
+    def add_page(self, text: str):
+        self.pages += 1
+        lines = text.split("\n")
+        zone_lines = [lines[i] for i in sorted(zone_positions(lines))]
+        for h in {span_hash(line) for line in zone_lines}:
+            if h:
+                self.page_counts[h] = self.page_counts.get(h, 0) + 1
+        for line in zone_lines:
+            h = span_hash(line)
+            if h and h not in self.zone_spans:
+                self.zone_spans[h] = " ".join(line.split())[:200]
+
+    def repeated(self) -> set:
+        """Header/footer-zone span hashes that recur across pages of the document."""
+        threshold = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_PAGE_SHARE * self.pages)
+        return {h for h, count in self.page_counts.items() if count >= threshold}
+
+
+def collect_zone_spans(page_texts) -> dict:
+    """Distinct header/footer-zone span hashes for a document -> sample text (for the corpus index)."""
+    counter = SpanCounter()
+    for text in page_texts:
+        counter.add_page(text)
+    return counter.zone_spans
+
+
+def find_repeated_spans(page_texts) -> set:
+    """Header/footer-zone span hashes that recur across pages of the same document."""
+    counter = SpanCounter()
+    for text in page_texts:
+        counter.add_page(text)
+    return counter.repeated()
+
+
+def load_corpus_boilerplate() -> set:
+    """Span hashes seen in at least BOILERPLATE_MIN_DOCS documents (cached in-process)."""
+    if time.monotonic() - _corpus_cache["loaded_at"] < CORPUS_CACHE_SECONDS:
+        return _corpus_cache["hashes"]
+    try:
+        supabase = get_supabase()
+        res = supabase.table("boilerplate_spans").select("span_hash").gte("document_count", BOILERPLATE_MIN_DOCS).execute()
+        _corpus_cache["hashes"] = {row["span_hash"] for row in res.data or []}
+    except Exception as e:
+        print(f"WARNING: Could not load corpus boilerplate spans: {e}")
+    _corpus_cache["loaded_at"] = time.monotonic()
+    return _corpus_cache["hashes"]
+
+
+class BoilerplateFilter:
+    """
+    Strips boilerplate page by page, in page order, from header/footer-zone lines only (where
+    the spans were learned): body text that happens to match is never removed. Spans repeated within the document are kept once, on
+    the first page they appear; corpus-wide boilerplate is dropped from every page's zones
+    (one copy lives in boilerplate_spans). Markdown tables are left untouched.
+    """
+
+    def __init__(self, repeated: set, corpus_hashes: set = None):
+        self.repeated = repeated
+        self.corpus_hashes = corpus_hashes or set()
+        self.seen = set()
+        self.stats = {"lines_removed": 0, "chars_removed": 0, "document_spans": len(repeated)}
+
+    def strip(self, page: dict):
+        """Removes boilerplate lines from page["text"] in place."""
+        kept = []
+        lines = page["text"].split("\n")
+        zone = zone_positions(lines)
+        for i, line in enumerate(lines):
+            h = span_hash(line) if i in zone else None
+            if h and (h in self.corpus_hashes or (h in self.repeated and h in self.seen)):
+                self.stats["lines_removed"] += 1
+                self.stats["chars_removed"] += len(line)
+                continue
+            if h:
+                self.seen.add(h)
+            kept.append(line)
+        page["text"] = "\n".join(kept)
+
+    def report(self):
+        if self.stats["lines_removed"]:
+            print(f"INFO: Boilerplate stripped: {self.stats['lines_removed']} lines ({self.stats['chars_removed']} chars).")
+
+
+def strip_boilerplate(pages_content: list, corpus_hashes: set = None) -> dict:
+    """Removes repeated spans from each page's text (in place) before chunking. Returns stripping stats."""
+    boilerplate_filter = BoilerplateFilter(find_repeated_spans(page["text"] for page in pages_content), corpus_hashes)
+    for page in pages_content:
+        boilerplate_filter.strip(page)
+    boilerplate_filter.report()
+    return boilerplate_filter.stats
+
+
+def record_document_spans(spans: dict):
+    """Adds one document's header/footer-zone spans to the corpus index (non-critical)."""
+    if not spans:
+        return
+    try:
+        supabase = get_supabase()
+        supabase.rpc("record_boilerplate_spans", {
+            "span_hashes": list(spans.keys()),
+            "samples": list(spans.values())
+        }).execute()
+    except Exception as e:
+        print(f"WARNING: Failed to record boilerplate spans (non-critical): {e}")
@@ -0,0 +1,80 @@
+import os
+import json
+import random
+import asyncio
+from postgrest.types import ReturnMethod
+from services.supabase_client import get_supabase
+
+# Batches are sized by serialized payload, not row count: chunk rows carry 384-float embeddings,
+# table rows carry arbitrary JSON, so a fixed row count is either too small or too large.
+BULK_MAX_BATCH_BYTES = int(os.getenv("BULK_MAX_BATCH_BYTES", str(1024 * 1024)))  # 1MB
+BULK_MAX_BATCH_ROWS = int(os.getenv("BULK_MAX_BATCH_ROWS", "500"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "4"))
+BULK_MAX_RETRIES = int(os.getenv("BULK_MAX_RETRIES", "4"))
+BULK_BACKOFF_SECONDS = float(os.getenv("BULK_BACKOFF_SECONDS", "0.5"))
+
+# Idempotency keys: retries upsert on these, so a replayed batch never duplicates rows
+CHUNK_CONFLICT_KEY = "document_id,chunk_index"
+TABLE_CONFLICT_KEY = "document_id,page_number,table_index"
+
+
+class BulkWriteError(Exception):
+    """Raised when a batch still fails after all retries."""
+
+
+def plan_batches(rows: list, max_bytes: int = BULK_MAX_BATCH_BYTES, max_rows: int = BULK_MAX_BATCH_ROWS) -> list:
+    """Greedily groups rows so each batch stays under max_bytes of JSON and max_rows rows."""
+    batches = []
+    current = []
+    current_bytes = 2  # "[]"
+    for row in rows:
+        row_bytes = len(json.dumps(row, default=str)) + 1
+        if current and (current_bytes + row_bytes > max_bytes or len(current) >= max_rows):
+            batches.append(current)
+            current, current_bytes = [], 2
+        current.append(row)
+        current_bytes += row_bytes
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def bulk_upsert(table: str, rows: list, on_conflict: str, progress=None, client=None,
+                      concurrency: int = BULK_CONCURRENCY, max_retries: int = BULK_MAX_RETRIES) -> int:
+    """
+    Writes rows to `table` in byte-sized batches, at most `concurrency` batches in flight.
+    Each batch is an upsert on `on_conflict`, retried with exponential backoff + jitter.
+    Returns the number of rows written; raises BulkWriteError if any batch gives up.
+    """
+    if not rows:
+        return 0
+    client = client or get_supabase()
+    batches = plan_batches(rows)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def write_batch(batch):
+        client.table(table).upsert(batch, on_conflict=on_conflict, returning=ReturnMethod.minimal).execute()
+
+    async def run_batch(batch_idx, batch):
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                try:
+                    await asyncio.to_thread(write_batch, batch)
+                    if progress:
+                        progress.increment("rows_inserted", len(batch))
+                    return len(batch)
+                except Exception as e:
+                    if attempt == max_retries:
+                        print(f"ERROR: [{table}] Batch {batch_idx + 1} failed after {attempt + 1} attempts: {e}")
+                        raise BulkWriteError(f"{table} batch {batch_idx + 1}/{len(batches)}: {e}") from e
+                    delay = BULK_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random())
+                    print(f"WARNING: [{table}] Batch {batch_idx + 1} failed ({e}); retrying in {delay:.1f}s...")
+                    await asyncio.sleep(delay)
+
+    results = await asyncio.gather(*[run_batch(i, b) for i, b in enumerate(batches)], return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        raise errors[0]
+    written = sum(results)
+    print(f"SUCCESS: [{table}] {written} rows written in {len(batches)} batch(es).")
+    return written
@@ -0,0 +1,181 @@
+import os
+import re
+
+# Sizing is in (approximate) model tokens: all-MiniLM-L6-v2 truncates input at 256 word pieces
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "30"))
+
+TABLE_MARKER = "### [Tabular Data extracted]"
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+# New paragraph on lines opening a numbered clause: "1.", "2.3", "(a)", "(iv)", "a)"
+_CLAUSE_START_RE = re.compile(r"\n(?=\s*(?:\d+(?:\.\d+)*\.?\s|\([a-z0-9]{1,4}\)\s|[a-z]\)\s))", re.I)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?;])\s+(?=[\"'(\[]?[A-Z0-9])")
+_CLAUSE_LABEL_RE = re.compile(r"\(?[0-9a-z]{1,4}(?:\.[0-9]+)*[.)]?", re.I)
+_ABBREVIATIONS = ("no.", "nos.", "rs.", "ref.", "dt.", "dated.", "viz.", "e.g.", "i.e.", "etc.", "sr.", "para.", "mr.", "ms.", "dr.", "vol.", "st.")
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (words + punctuation), close to the embedding tokenizer for English prose."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def split_blocks(text: str) -> list:
+    """
+    Splits page text into ("table", block) and ("text", paragraph) pieces in order.
+    A table block is the [Tabular Data extracted] marker plus its markdown rows.
+    """
+    blocks = []
+    prose_lines = []
+    table_lines = []
+
+    def flush_prose():
+        if prose_lines:
+            blocks.append(("text", "\n".join(prose_lines)))
+            prose_lines.clear()
+
+    def flush_table():
+        if table_lines:
+            blocks.append(("table", "\n".join(table_lines)))
+            table_lines.clear()
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped == TABLE_MARKER:
+            flush_prose()
+            flush_table()
+            table_lines.append(stripped)
+        elif table_lines and stripped.startswith("|"):
+            table_lines.append(stripped)
+        else:
+            flush_table()
+            prose_lines.append(line)
+    flush_prose()
+    flush_table()
+    return [(kind, block) for kind, block in blocks if block.strip()]
+
+
+def split_paragraphs(text: str) -> list:
+    paragraphs = []
+    for part in _PARAGRAPH_BREAK_RE.split(text):
+        paragraphs.extend(_CLAUSE_START_RE.split(part))
+    # PyMuPDF emits one line per visual line: re-flow each paragraph
+    return [" ".join(p.split()) for p in paragraphs if p.strip()]
+
+
+def split_sentences(paragraph: str) -> list:
+    sentences = []
+    pending = ""
+    for piece in _SENTENCE_END_RE.split(paragraph):
+        pending = f"{pending} {piece}" if pending else piece
+        last_word = pending.rsplit(None, 1)[-1].lower()
+        if last_word in _ABBREVIATIONS or re.fullmatch(r"[a-z]\.", last_word) or _CLAUSE_LABEL_RE.fullmatch(pending):
+            continue
+        sentences.append(pending)
+        pending = ""
+    if pending:
+        sentences.append(pending)
+    return sentences
+
+
+def split_long_sentence(sentence: str, max_tokens: int) -> list:
+    """Last resort for run-on text (e.g. lists without punctuation): split on word boundaries."""
+    pieces = []
+    current = []
+    current_tokens = 0
+    for word in sentence.split():
+        word_tokens = count_tokens(word)
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> list:
+    """
+    Structure-aware chunker shared by uploads and live-update ingestion.
+    Packs whole sentences into chunks of up to max_tokens, closing chunks on paragraph
+    boundaries where possible. Each appended [Tabular Data extracted] table is kept
+    whole (own chunk if it does not fit). Consecutive chunks share at most
+    overlap_tokens worth of trailing sentences.
+    """
+    if not text or not text.strip():
+        return []
+
+    chunks = []
+    current = []  # list of (kind, unit_text, tokens, paragraph_end)
+    current_tokens = 0
+    carried_count = 0
+
+    def flush(carry_overlap=True):
+        nonlocal current, current_tokens, carried_count
+        if not current:
+            return
+        parts = []
+        for i, (kind, unit, _, _) in enumerate(current):
+            if i:
+                prev_kind, _, _, prev_par_end = current[i - 1]
+                parts.append("\n\n" if kind == "table" or prev_kind == "table" or prev_par_end else " ")
+            parts.append(unit)
+        chunks.append("".join(parts))
+
+        carried = []
+        carried_tokens = 0
+        if carry_overlap and overlap_tokens > 0:
+            for item in reversed(current):
+                if item[0] == "table" or carried_tokens + item[2] > overlap_tokens:
+                    break
+                carried.insert(0, item)
+                carried_tokens += item[2]
+        current = carried
+        current_tokens = carried_tokens
+        carried_count = len(carried)
+
+    for kind, block in split_blocks(text):
+        if kind == "table":
+            block_tokens = count_tokens(block)
+            if current_tokens + block_tokens > max_tokens:
+                flush()
+                if current_tokens + block_tokens > max_tokens:
+                    current, current_tokens, carried_count = [], 0, 0
+            current.append(("table", block, block_tokens, True))
+            current_tokens += block_tokens
+            if current_tokens >= max_tokens:
+                flush(carry_overlap=False)
+            continue
+
+        for paragraph in split_paragraphs(block):
+            sentences = []
+            for sentence in split_sentences(paragraph):
+                if count_tokens(sentence) > max_tokens:
+                    sentences.extend(split_long_sentence(sentence, max_tokens))
+                else:
+                    sentences.append(sentence)
+
+            # Prefer to start a paragraph in a fresh chunk rather than split it across two
+            paragraph_tokens = sum(count_tokens(sentence) for sentence in sentences)
+            if (len(current) > carried_count and paragraph_tokens <= max_tokens
+                    and current_tokens + paragraph_tokens > max_tokens and current_tokens >= max_tokens // 2):
+                flush()
+                if current_tokens + paragraph_tokens > max_tokens:
+                    current, current_tokens, carried_count = [], 0, 0
+
+            for i, sentence in enumerate(sentences):
+                sentence_tokens = count_tokens(sentence)
+                if current and current_tokens + sentence_tokens > max_tokens:
+                    flush()
+                    # Carried overlap must never push a sentence over the limit
+                    if current_tokens + sentence_tokens > max_tokens:
+                        current, current_tokens, carried_count = [], 0, 0
+                current.append(("text", sentence, sentence_tokens, i == len(sentences) - 1))
+                current_tokens += sentence_tokens
+
+    # Final chunk, unless it would only repeat the overlap carried from the previous one
+    if len(current) > carried_count:
+        flush(carry_overlap=False)
+    return chunks
@@ -0,0 +1,78 @@
+import re
+import hashlib
+from services.supabase_client import get_supabase
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# "Page 3" / "Page 3 of 12" lines: pagination, not content
+PAGE_NUMBER_LINE = re.compile(r"^\s*page\s+\d+(\s+of\s+\d+)?\s*$", re.IGNORECASE)
+
+def normalize_text(text: str) -> str:
+    """Lowercases and strips everything but letters/digits so layout and whitespace changes hash the same."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def compute_text_hash(page_texts):
+    """
+    SHA-256 over the normalized text of each page (streamed, nothing is accumulated).
+    None when there is no text at all (scanned PDF): such files cannot be matched by text.
+    """
+    digest = hashlib.sha256()
+    has_text = False
+    for text in page_texts:
+        normalized = normalize_text(text)
+        if normalized:
+            has_text = True
+            digest.update(normalized.encode("utf-8"))
+            digest.update(b"\n")
+    return digest.hexdigest() if has_text else None
+
+def compute_page_hash(text: str):
+    """
+    Fingerprint of one page for incremental re-ingestion: SHA-256 over its normalized text with
+    every figure kept, so an amended limit, rate or table cell is a change. Only "Page n of m"
+    lines are left out, as inserting a page renumbers the footer of every page.
+    Returns None for a page without text (blank, scanned or footer only): such pages all look
+    alike, so they must never match pages of another document.
+    """
+    lines = [line for line in text.split("\n") if not PAGE_NUMBER_LINE.match(line)]
+    normalized = normalize_text("\n".join(lines))
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def find_duplicate_document(content_hash: str = None, text_hash: str = None):
+    """
+    Returns the existing documents row matching the raw content hash (checked first)
+    or the normalized-text hash, else None.
+    """
+    supabase = get_supabase()
+    for column, value in (("content_hash", content_hash), ("text_hash", text_hash)):
+        if not value:
+            continue
+        try:
+            res = supabase.table("documents").select("*").eq(column, value).limit(1).execute()
+            if res.data:
+                print(f"INFO: Duplicate document detected by {column}: ID {res.data[0]['id']}")
+                return res.data[0]
+        except Exception as e:
+            # Hash columns not migrated yet (db/schema_document_hashes.sql): behave as before
+            print(f"WARNING: Duplicate lookup by {column} failed: {e}")
+            return None
+    return None
+
+def is_duplicate_key_error(error) -> bool:
+    """Unique violation (Postgres 23505), e.g. idx_documents_content_hash when the same PDF is inserted twice."""
+    return "23505" in str(error) or "duplicate key" in str(error)
+
+def is_missing_column_error(error) -> bool:
+    """Unknown column (PostgREST PGRST204 / Postgres 42703): the hash columns are not migrated yet."""
+    return "PGRST204" in str(error) or "42703" in str(error)
+
+def record_page_hashes(document_id: int, page_hashes: list):
+    """Stores the indexed version's per-page hashes (db/schema_page_revisions.sql). Non-critical."""
+    if not page_hashes:
+        return
+    rows = [{"document_id": document_id, "page_number": n, "page_hash": h} for n, h in enumerate(page_hashes, start=1)]
+    try:
+        get_supabase().table("document_pages").upsert(rows, on_conflict="document_id,page_number").execute()
+    except Exception as e:
+        print(f"WARNING: Failed to record page hashes (non-critical): {e}")
@@ -0,0 +1,86 @@
+import os
+import json
+import time
+import shutil
+from services.job_queue import DATA_DIR
+
+# Per-page extraction results on local disk, keyed by PDF content hash + page number + extractor version
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join(DATA_DIR, "extraction_cache"))
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE", "1") != "0"
+EXTRACTION_CACHE_TTL_DAYS = float(os.getenv("EXTRACTION_CACHE_TTL_DAYS", "30"))
+
+
+def _document_dir(pdf_hash: str, version: str) -> str:
+    return os.path.join(EXTRACTION_CACHE_DIR, pdf_hash[:2], pdf_hash, version)
+
+
+def load_cached_pages(pdf_hash: str, version: str, last_page: int, filename: str = None, first_page: int = 1) -> dict:
+    """Returns {page_number: page} for pages first_page..last_page already cached for this PDF and extractor version."""
+    if not (EXTRACTION_CACHE_ENABLED and pdf_hash):
+        return {}
+    doc_dir = _document_dir(pdf_hash, version)
+    if not os.path.isdir(doc_dir):
+        return {}
+    pages = {}
+    for page_number in range(first_page, last_page + 1):
+        path = os.path.join(doc_dir, f"{page_number}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                page = json.load(f)
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Ignoring unreadable extraction cache entry {path}: {e}")
+            continue
+        if filename:
+            # Same bytes may arrive under another name: table JSON carries the current one
+            for table in page.get("tables", []):
+                table["filename"] = filename
+        pages[page_number] = page
+    if pages:
+        # Refresh the document's age so pruning evicts least recently used entries
+        os.utime(os.path.dirname(doc_dir))
+    return pages
+
+
+def store_pages(pdf_hash: str, version: str, pages: list) -> int:
+    """Writes extracted pages to the cache (atomic per page). Degraded fallback pages are not cached."""
+    if not (EXTRACTION_CACHE_ENABLED and pdf_hash):
+        return 0
+    doc_dir = _document_dir(pdf_hash, version)
+    stored = 0
+    try:
+        os.makedirs(doc_dir, exist_ok=True)
+        for page in pages:
+            if page.get("extraction_fallback"):
+                continue
+            path = os.path.join(doc_dir, f"{page['page_number']}.json")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(page, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            stored += 1
+        os.utime(os.path.dirname(doc_dir))
+    except OSError as e:
+        print(f"WARNING: Failed to write extraction cache (non-critical): {e}")
+    return stored
+
+
+def prune_extraction_cache(max_age_days: float = EXTRACTION_CACHE_TTL_DAYS) -> int:
+    """Removes cached documents not read or written for max_age_days. Returns the number of entries removed."""
+    if not os.path.isdir(EXTRACTION_CACHE_DIR):
+        return 0
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for prefix in os.listdir(EXTRACTION_CACHE_DIR):
+        prefix_dir = os.path.join(EXTRACTION_CACHE_DIR, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for pdf_hash in os.listdir(prefix_dir):
+            doc_dir = os.path.join(prefix_dir, pdf_hash)
+            if os.path.getmtime(doc_dir) < cutoff:
+                shutil.rmtree(doc_dir, ignore_errors=True)
+                removed += 1
+    if removed:
+        print(f"INFO: Pruned {removed} stale extraction cache entries.")
+    return removed
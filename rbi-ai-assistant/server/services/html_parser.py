@@ -0,0 +1,111 @@
+import os
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # lxml not installed: BeautifulSoup's html.parser only
+    lxml = None
+
+# "lxml" (C parser, XPath selectors) or "bs4" (pure-Python html.parser); default: lxml when installed
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "lxml" if lxml else "bs4")
+
+
+def normalize_space(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+class Link:
+    """An <a href> of a parsed page; `element` is backend-specific (for context lookups)."""
+    __slots__ = ("href", "text", "title", "rel", "element")
+
+    def __init__(self, href: str, text: str, title: str, rel: str, element):
+        self.href = href
+        self.text = text
+        self.title = title
+        self.rel = rel
+        self.element = element
+
+
+class LxmlPage:
+    """Targeted XPath lookups on lxml's C parser: only anchors and table rows are materialized."""
+    if lxml:
+        _enclosing_cell = lxml.etree.XPath("ancestor::td[1]")
+        _enclosing_div = lxml.etree.XPath("ancestor::div[1]")
+        _row_cells = lxml.etree.XPath("./td | ./th")
+        _row_links = lxml.etree.XPath(".//a[@href]")
+
+    def __init__(self, html):
+        try:
+            self.root = lxml.html.fromstring(html)
+        except ValueError:  # str carrying an <?xml encoding=...?> declaration
+            self.root = lxml.html.fromstring(html.encode("utf-8"))
+        except lxml.etree.ParserError:  # empty document
+            self.root = lxml.html.fromstring("<html></html>")
+
+    @staticmethod
+    def _link(a) -> Link:
+        return Link(a.get("href"), normalize_space(a.text_content()), a.get("title") or "", a.get("rel") or "", a)
+
+    def links(self) -> list:
+        return [self._link(a) for a in self.root.iter("a") if a.get("href") is not None]
+
+    def context_text(self, link: Link) -> str:
+        """Text of the link's enclosing table cell, else of its enclosing div."""
+        container = self._enclosing_cell(link.element) or self._enclosing_div(link.element)
+        return container[0].text_content() if container else ""
+
+    def rows(self) -> list:
+        """[(cell texts, links)] per <tr>; cells are the row's own td/th, not nested tables'."""
+        rows = []
+        for tr in self.root.iter("tr"):
+            cells = [normalize_space(td.text_content()) for td in self._row_cells(tr)]
+            links = [self._link(a) for a in self._row_links(tr)]
+            rows.append((cells, links))
+        return rows
+
+    def text(self) -> str:
+        for element in self.root.xpath("//script | //style"):
+            element.drop_tree()
+        return self.root.text_content()
+
+
+class SoupPage:
+    """Reference backend on BeautifulSoup's html.parser (no compiled dependency)."""
+
+    def __init__(self, html):
+        from bs4 import BeautifulSoup
+        self.soup = BeautifulSoup(html or "", "html.parser")
+
+    @staticmethod
+    def _link(a) -> Link:
+        rel = a.get("rel") or ""
+        return Link(a["href"], normalize_space(a.get_text()), a.get("title") or "",
+                    " ".join(rel) if isinstance(rel, list) else rel, a)
+
+    def links(self) -> list:
+        return [self._link(a) for a in self.soup.find_all("a", href=True)]
+
+    def context_text(self, link: Link) -> str:
+        container = link.element.find_parent("td") or link.element.find_parent("div")
+        return container.get_text() if container else ""
+
+    def rows(self) -> list:
+        rows = []
+        for tr in self.soup.find_all("tr"):
+            cells = [normalize_space(td.get_text()) for td in tr.find_all(["td", "th"], recursive=False)]
+            links = [self._link(a) for a in tr.find_all("a", href=True)]
+            rows.append((cells, links))
+        return rows
+
+    def text(self) -> str:
+        for element in self.soup(["script", "style"]):
+            element.decompose()
+        return self.soup.get_text()
+
+
+def parse_html(html, backend: str = None):
+    """Parsed page on the configured backend (HTML_PARSER_BACKEND), falling back to bs4 without lxml."""
+    backend = backend or HTML_PARSER_BACKEND
+    if backend == "lxml" and lxml:
+        return LxmlPage(html)
+    return SoupPage(html)
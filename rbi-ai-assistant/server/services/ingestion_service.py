@@ -1,40 +1,56 @@
-import os
 import uuid
-import io
+import hashlib
 import asyncio
 from datetime import datetime
 import fitz
-import pdfplumber
 from services.supabase_client import get_supabase
 from services.embedding_service import generate_embedding
+from services.dedupe import find_duplicate_document, compute_text_hash, is_duplicate_key_error, is_missing_column_error
+from services.chunking import chunk_text
+from services.bulk_writer import bulk_upsert, CHUNK_CONFLICT_KEY
+from services.analytics import invalidate_document_stats
+from services.boilerplate import collect_zone_spans, strip_boilerplate, load_corpus_boilerplate, record_document_spans
+
+def extract_pages(file_content: bytes) -> list:
+    with fitz.open(stream=file_content, filetype="pdf") as doc:
+        return [{"text": page.get_text(), "page_number": page_num + 1} for page_num, page in enumerate(doc)]
 
 async def ingest_rbi_document(file_content: bytes, filename: str, title: str, category: str = "Live Update"):
     """
     Ingests a document bytes into the system (Storage, DB, Chunks, Embeddings).
     Specifically for the live update scraper.
     """
+    supabase = get_supabase()
+    BUCKET_NAME = "rbi-documents"
+    unique_filename = None
+    document_id = None
     try:
-        supabase = get_supabase()
-        BUCKET_NAME = "rbi-documents"
-        
-        # 1. Upload to Storage
+        # 1. Duplicate Check by raw content hash (before any extraction)
+        content_hash = hashlib.sha256(file_content).hexdigest()
+        existing = await asyncio.to_thread(find_duplicate_document, content_hash=content_hash)
+        if existing:
+            return existing['id']
+
+        # 2. Extract Text (off the event loop: the scraper ingests several updates at once)
+        pages_content = await asyncio.to_thread(extract_pages, file_content)
+        total_pages = len(pages_content)
+
+        # 2.5 Duplicate Check by normalized text (same circular, different file); scanned PDFs have none
+        text_hash = compute_text_hash(page['text'] for page in pages_content)
+        if text_hash:
+            existing = await asyncio.to_thread(find_duplicate_document, text_hash=text_hash)
+            if existing:
+                return existing['id']
+
+        # 2.6 Upload to Storage
         unique_filename = f"live_{uuid.uuid4()}.pdf"
-        supabase.storage.from_(BUCKET_NAME).upload(
+        await asyncio.to_thread(
+            supabase.storage.from_(BUCKET_NAME).upload,
             path=unique_filename,
             file=file_content,
             file_options={"content-type": "application/pdf"}
         )
         public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(unique_filename)
-        
-        # 2. Extract Text
-        full_text = ""
-        pages_content = []
-        with fitz.open(stream=file_content, filetype="pdf") as doc:
-            total_pages = len(doc)
-            for page_num, page in enumerate(doc):
-                text = page.get_text()
-                full_text += text
-                pages_content.append({"text": text, "page_number": page_num + 1})
 
         # 3. Insert Document Record
         doc_data = {
@@ -43,37 +59,54 @@ async def ingest_rbi_document(file_content: bytes, filename: str, title: str, ca
             "upload_date": datetime.utcnow().isoformat(),
             "category": category,
             "title": title,
-            "total_pages": total_pages
+            "total_pages": total_pages,
+            "content_hash": content_hash,
+            "text_hash": text_hash
         }
-        res = supabase.table("documents").insert(doc_data).execute()
+        try:
+            res = await asyncio.to_thread(lambda: supabase.table("documents").insert(doc_data).execute())
+        except Exception as insert_error:
+            if is_duplicate_key_error(insert_error):
+                # Same PDF committed concurrently (another link in this sync): reuse that document
+                existing = await asyncio.to_thread(find_duplicate_document, content_hash=content_hash)
+                if not existing:
+                    raise insert_error
+                await asyncio.to_thread(supabase.storage.from_(BUCKET_NAME).remove, [unique_filename])
+                return existing['id']
+            if not is_missing_column_error(insert_error):
+                raise insert_error
+            # Hash columns not migrated yet: store without them
+            doc_data.pop("content_hash")
+            doc_data.pop("text_hash")
+            res = await asyncio.to_thread(lambda: supabase.table("documents").insert(doc_data).execute())
         if not res.data:
             raise Exception("Failed to insert document record")
         
         document_id = res.data[0]['id']
+        invalidate_document_stats()
         
-        # 4. Process Chunks (Parallel)
+        # 4. Strip repeated boilerplate, then Process Chunks (Parallel)
+        zone_spans = collect_zone_spans(page['text'] for page in pages_content)
+        strip_boilerplate(pages_content, load_corpus_boilerplate())
         await process_chunks(document_id, pages_content)
+        record_document_spans(zone_spans)
         
         return document_id
 
     except Exception as e:
         print(f"ERROR: Ingestion failed: {e}")
+        # Never leave a half-indexed document behind: its hashes would mark the circular as ingested
+        try:
+            if document_id:
+                await asyncio.to_thread(lambda: supabase.table("documents").delete().eq("id", document_id).execute())
+                invalidate_document_stats()
+            if unique_filename:
+                await asyncio.to_thread(supabase.storage.from_(BUCKET_NAME).remove, [unique_filename])
+        except Exception as rollback_error:
+            print(f"ERROR: Rollback of failed ingestion failed: {rollback_error}")
         return None
 
 async def process_chunks(document_id: int, pages_content: list):
-    supabase = get_supabase()
-    all_chunks = []
-    
-    def chunk_text(text, size=1200, overlap=200):
-        chunks = []
-        start = 0
-        while start < len(text):
-            end = min(start + size, len(text))
-            chunks.append(text[start:end])
-            if end == len(text): break
-            start += (size - overlap)
-        return chunks
-
     idx = 0
     tasks = []
     for page in pages_content:
@@ -85,9 +118,8 @@ async def process_chunks(document_id: int, pages_content: list):
     chunk_rows = await asyncio.gather(*tasks)
     chunk_rows = [r for r in chunk_rows if r]
     
-    # Batch Insert
-    for i in range(0, len(chunk_rows), 50):
-        supabase.table("document_chunks").insert(chunk_rows[i:i+50]).execute()
+    # Idempotent bulk upsert (retries never duplicate chunks)
+    await bulk_upsert("document_chunks", chunk_rows, CHUNK_CONFLICT_KEY)
 
 async def process_single_chunk(doc_id, text, page_num, idx):
     try:
@@ -0,0 +1,313 @@
+import os
+import json
+import uuid
+import time
+import socket
+import sqlite3
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+# Persistent local job store (survives restarts; queued work is picked up again on startup)
+DATA_DIR = os.getenv("INGESTION_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(DATA_DIR, "ingestion_jobs.db"))
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+PROGRESS_FLUSH_SECONDS = 0.5
+# Running jobs refresh their heartbeat this often; one silent for JOB_STALE_SECONDS lost its worker
+JOB_HEARTBEAT_SECONDS = 10
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class JobStore:
+    """Small SQLite-backed store for ingestion jobs."""
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            # Claim bookkeeping (added after the first release: migrate existing stores)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column in ("owner", "heartbeat_at"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+            self._conn.commit()
+
+    def create(self, kind: str, payload: dict) -> str:
+        job_id = str(uuid.uuid4())
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, JOB_QUEUED, json.dumps(payload), now, now)
+            )
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]),
+            "progress": json.loads(row["progress"] or "{}"),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def update(self, job_id: str, **fields):
+        if not fields:
+            return
+        for key in ("payload", "progress", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """Atomically moves a queued job to running for `owner`; False if another worker got it first."""
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat_at = ?, error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (JOB_RUNNING, owner, now, now, job_id, JOB_QUEUED)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, owner: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (datetime.utcnow().isoformat(), job_id, owner, JOB_RUNNING)
+            )
+            self._conn.commit()
+
+    def take_over_stale(self, owner: str, stale_seconds: float = JOB_STALE_SECONDS) -> list:
+        """
+        Running jobs whose worker stopped heartbeating, now owned by `owner` (still running, with
+        a fresh heartbeat, so no other worker recovers them too). Call requeue() once cleaned up.
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=stale_seconds)).isoformat()
+        stale_clause = "status = ? AND COALESCE(heartbeat_at, updated_at) < ?"
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id FROM jobs WHERE {stale_clause} ORDER BY created_at, rowid",
+                                      (JOB_RUNNING, cutoff)).fetchall()
+        taken = []
+        for row in rows:
+            with self._lock:
+                cursor = self._conn.execute(
+                    f"UPDATE jobs SET owner = ?, heartbeat_at = ? WHERE id = ? AND {stale_clause}",
+                    (owner, datetime.utcnow().isoformat(), row["id"], JOB_RUNNING, cutoff)
+                )
+                self._conn.commit()
+            if cursor.rowcount == 1:
+                taken.append(self.get(row["id"]))
+        return taken
+
+    def requeue(self, job_id: str):
+        """Queues an interrupted job again; it restarts from scratch, so its progress is reset."""
+        self.update(job_id, status=JOB_QUEUED, owner=None, heartbeat_at=None, progress={})
+
+    def pending_ids(self) -> list:
+        """Jobs waiting to run, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at, rowid", (JOB_QUEUED,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class JobProgress:
+    """Progress counters for a running job, persisted to the store at most every PROGRESS_FLUSH_SECONDS."""
+
+    def __init__(self, store: JobStore, job_id: str, initial: dict = None):
+        self.store = store
+        self.job_id = job_id
+        self.values = dict(initial or {})
+        self._last_flush = 0.0
+
+    def update(self, **values):
+        self.values.update(values)
+        self._maybe_flush()
+
+    def increment(self, key: str, amount: int = 1):
+        self.values[key] = self.values.get(key, 0) + amount
+        self._maybe_flush()
+
+    def flush(self):
+        self.store.update(self.job_id, progress=self.values)
+        self._last_flush = time.monotonic()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= PROGRESS_FLUSH_SECONDS:
+            self.flush()
+
+
+class JobFailed(Exception):
+    """Raised by a job handler for expected failures; the message is shown to the client."""
+
+
+class IngestionJobQueue:
+    """
+    Runs queued jobs on a pool of asyncio workers inside the app event loop.
+    Handlers are registered per job kind: async handler(payload, progress) -> result dict.
+    A kind may also register on_interrupted(payload, progress_values), called (in a thread) before
+    a job whose worker died is run again, to undo what the interrupted run left behind.
+    Several processes may share one store: jobs are claimed atomically and heartbeat while running.
+    """
+
+    def __init__(self, store: JobStore = None, workers: int = INGESTION_WORKERS):
+        self._store = store
+        self.workers = workers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers = {}
+        self.interrupted_hooks = {}
+        self._queue = None
+        self._tasks = []
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    def register(self, kind: str, handler, on_interrupted=None):
+        self.handlers[kind] = handler
+        if on_interrupted:
+            self.interrupted_hooks[kind] = on_interrupted
+
+    def submit(self, kind: str, payload: dict) -> str:
+        job_id = self.store.create(kind, payload)
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+        return job_id
+
+    def get(self, job_id: str):
+        return self.store.get(job_id)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        await self.recover_interrupted()
+        pending = self.store.pending_ids()
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._watch_stale_jobs()))
+        print(f"INFO: Ingestion job queue started with {self.workers} workers ({len(pending)} pending job(s)).")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def recover_interrupted(self) -> list:
+        """Re-queues running jobs whose worker stopped heartbeating, after their cleanup hook ran."""
+        recovered = []
+        for job in self.store.take_over_stale(self.worker_id):
+            hook = self.interrupted_hooks.get(job["kind"])
+            if hook:
+                try:
+                    await asyncio.to_thread(hook, job["payload"], job["progress"])
+                except Exception as e:
+                    print(f"WARNING: Cleanup of interrupted job {job['id']} failed: {e}")
+            self.store.requeue(job["id"])
+            recovered.append(job["id"])
+            print(f"INFO: Re-queued interrupted {job['kind']} job {job['id']}.")
+        return recovered
+
+    async def _watch_stale_jobs(self):
+        # Jobs left running by a worker process that died while this one keeps serving
+        while True:
+            await asyncio.sleep(JOB_STALE_SECONDS)
+            try:
+                for job_id in await self.recover_interrupted():
+                    self._queue.put_nowait(job_id)
+            except Exception as e:
+                print(f"ERROR: Stale job recovery failed: {e}")
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            self.store.heartbeat(job_id, self.worker_id)
+
+    async def _worker(self, worker_idx: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"ERROR: Job worker {worker_idx} crashed on job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        if not job or job["status"] != JOB_QUEUED:
+            return
+        handler = self.handlers.get(job["kind"])
+        if not handler:
+            self.store.update(job_id, status=JOB_FAILED, error=f"No handler for job kind '{job['kind']}'")
+            return
+
+        if not self.store.claim(job_id, self.worker_id):
+            return  # another worker process claimed it first
+
+        print(f"INFO: Running {job['kind']} job {job_id}...")
+        progress = JobProgress(self.store, job_id, job["progress"])
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            result = await handler(job["payload"], progress)
+            progress.flush()
+            self.store.update(job_id, status=JOB_COMPLETED, result=result or {})
+            print(f"SUCCESS: Job {job_id} completed.")
+        except JobFailed as e:
+            progress.flush()
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+            print(f"ERROR: Job {job_id} failed: {e}")
+        except Exception as e:
+            progress.flush()
+            self.store.update(job_id, status=JOB_FAILED, error=f"Upload failed: {str(e)}")
+            print(f"ERROR: Job {job_id} crashed: {e}")
+        finally:
+            heartbeat.cancel()
+
+
+job_queue = IngestionJobQueue()
+
+def get_job_queue() -> IngestionJobQueue:
+    return job_queue
@@ -0,0 +1,125 @@
+import os
+import json
+import asyncio
+import threading
+from datetime import datetime
+from services.supabase_client import get_supabase
+
+# Comment line sent on idle streams so proxies keep the connection open
+NOTIFICATION_KEEPALIVE_SECONDS = float(os.getenv("NOTIFICATION_KEEPALIVE_SECONDS", "15"))
+# Events buffered per subscriber; a client that falls further behind loses the oldest ones
+NOTIFICATION_QUEUE_SIZE = 100
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class NotificationHub:
+    """
+    Unread counter and live (SSE) subscribers of this worker. The counter is read from the
+    database once and then kept up to date by the write paths, so polls and idle streams cost
+    no queries. Writes from other workers show up when the counter is refreshed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._unread = None
+        self._version = 0
+        self._subscribers = set()  # (event loop, queue)
+
+    def load_unread_count(self) -> int:
+        res = get_supabase().table("notifications").select("id", count="exact", head=True).eq("is_read", False).execute()
+        return res.count or 0
+
+    def unread_count(self) -> int:
+        with self._lock:
+            if self._unread is not None:
+                return self._unread
+            version = self._version
+        count = self.load_unread_count()
+        with self._lock:
+            # A change that landed while we were counting may be missing: do not keep it
+            if self._unread is None and self._version == version:
+                self._unread = count
+            return self._unread if self._unread is not None else count
+
+    def refresh(self) -> int:
+        """Re-reads the counter from the database (notifications written by other workers)."""
+        count = self.load_unread_count()
+        self.set_unread(count)
+        return count
+
+    def adjust(self, delta: int):
+        with self._lock:
+            self._version += 1
+            if self._unread is None:
+                return  # not counted yet: the first read includes this change
+            self._unread = max(0, self._unread + delta)
+            count = self._unread
+        self.publish("unread-count", {"count": count})
+
+    def set_unread(self, count: int):
+        with self._lock:
+            self._version += 1
+            self._unread = count
+        self.publish("unread-count", {"count": count})
+
+    def publish(self, event: str, data):
+        message = format_event(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, message)
+            except RuntimeError:  # subscriber's loop already closed
+                with self._lock:
+                    self._subscribers.discard((loop, queue))
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: str):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    async def subscribe(self):
+        """Server-sent event stream: the current unread count, then every change as it happens."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(NOTIFICATION_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            count = await asyncio.to_thread(self.unread_count)
+            yield format_event("unread-count", {"count": count})
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), NOTIFICATION_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+_hub = None
+
+
+def get_notification_hub() -> NotificationHub:
+    global _hub
+    if _hub is None:
+        _hub = NotificationHub()
+    return _hub
+
+
+def create_notification(message: str, type: str = "upload") -> dict:
+    """Stores an unread notification and pushes it, with the new unread count, to live subscribers."""
+    row = {"message": message, "type": type, "is_read": False, "created_at": datetime.utcnow().isoformat()}
+    res = get_supabase().table("notifications").insert(row).execute()
+    notification = res.data[0] if res.data else row
+    hub = get_notification_hub()
+    hub.adjust(1)
+    hub.publish("notification", notification)
+    return notification
@@ -0,0 +1,407 @@
+import os
+import asyncio
+import multiprocessing
+import contextlib
+import collections
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import fitz # PyMuPDF
+import pdfplumber
+from services.extraction_cache import load_cached_pages, store_pages
+
+# Process pool sizing (override per deployment)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+MIN_PAGES_PER_WORKER = int(os.getenv("PDF_MIN_PAGES_PER_WORKER", "8"))
+# "hybrid" = Fitz text + pdfplumber tables; "pymupdf" = single parser using PyMuPDF's table finder
+EXTRACTION_MODE = os.getenv("PDF_EXTRACTION_MODE", "hybrid").lower()
+# Skip table extraction on pages without ruling lines (set to "0" to parse every page)
+TABLE_PREFILTER = os.getenv("TABLE_PREFILTER", "1") != "0"
+# Bump whenever extraction output changes (text, markdown tables or table_to_json shape):
+# cached pages from other versions are then ignored
+EXTRACTOR_VERSION = "1"
+# Streaming ingestion: pages per extraction batch and batches extracted ahead of the consumer
+STREAM_BATCH_PAGES = int(os.getenv("PDF_STREAM_BATCH_PAGES", "8"))
+STREAM_BATCHES_IN_FLIGHT = int(os.getenv("PDF_STREAM_BATCHES_IN_FLIGHT", str(PDF_EXTRACT_WORKERS)))
+# Workers must not fork the server: a forked child inherits the event loop, the job queue's
+# threads and held locks (e.g. the Supabase HTTP pool), and can deadlock on them
+PDF_EXTRACT_START_METHOD = os.getenv("PDF_EXTRACT_START_METHOD", "spawn")
+
+_executor = None
+
+def get_extraction_executor() -> ProcessPoolExecutor:
+    """Lazily creates the shared process pool used for page extraction."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context(PDF_EXTRACT_START_METHOD),
+        )
+        print(f"INFO: PDF extraction pool started with {PDF_EXTRACT_WORKERS} workers.")
+    return _executor
+
+def shutdown_extraction_executor():
+    """Stops the extraction pool (called on app shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def table_to_markdown(table):
+    """Converts a pdfplumber table (list of lists) to a GitHub-flavored Markdown table string."""
+    if not table:
+        return ""
+
+    # Filter out empty rows and ensure all cells are strings
+    clean_table = []
+    for row in table:
+        if any(row):  # Row has at least one non-None/non-empty cell
+            clean_table.append([str(cell).strip() if cell is not None else "" for cell in row])
+
+    if len(clean_table) < 2:  # Need at least a header and one row
+        return ""
+
+    md = "\n### [Tabular Data extracted]\n"
+    # Header Row
+    md += "| " + " | ".join(clean_table[0]) + " |\n"
+    # Alignment/Separator Row
+    md += "| " + " | ".join(["---"] * len(clean_table[0])) + " |\n"
+    # Data Rows
+    for row in clean_table[1:]:
+        md += "| " + " | ".join(row) + " |\n"
+
+    return md + "\n"
+
+
+def table_to_json(table, page_num, table_idx, filename):
+    """
+    Converts a pdfplumber table into a structured JSON-like dict with enhanced cleaning.
+    Structure: { table_id, page, columns, rows, metadata }
+    """
+    if not table:
+        return None
+
+    # 1. Cleaning: Convert all to string and strip, handle None
+    sanitized_table = []
+    for row in table:
+        # Check if row is effectively empty (all cells are None or empty strings)
+        if not any(cell for cell in row if cell and str(cell).strip()):
+            continue
+        sanitized_row = [str(cell).strip() if cell is not None else "" for cell in row]
+        sanitized_table.append(sanitized_row)
+
+    if len(sanitized_table) < 2: # Need at least header + 1 row of data
+        return None
+
+    # 2. Smart Header Detection & Merging
+    if len(sanitized_table) < 2:
+        return None
+
+    # Requirement 1: Patterns to look for in headers
+    target_header_patterns = ["category", "loan limit", "maximum cost", "(amount in ₹ lakh)"]
+
+    header_row_idx = 0
+    headers = []
+    header_rows_count = 1
+
+    # Try to find the actual header row if row 0 is noise
+    for i in range(min(3, len(sanitized_table))):
+        row_str = " ".join(sanitized_table[i]).lower()
+        if any(p in row_str for p in target_header_patterns):
+            header_row_idx = i
+            break
+
+    row0 = sanitized_table[header_row_idx]
+    row1 = sanitized_table[header_row_idx+1] if len(sanitized_table) > header_row_idx+1 else None
+
+    # Check for multiline headers
+    row0_empty = sum(1 for c in row0 if not c)
+    if row1 and row0_empty > len(row0) / 2:
+        combined_headers = []
+        current_parent = ""
+        for i in range(len(row0)):
+            h1 = row0[i]
+            if h1: current_parent = h1
+            h2 = row1[i] if i < len(row1) else ""
+            combined = f"{current_parent} {h2}".strip()
+            combined_headers.append(combined if combined else f"Header_{i+1}")
+        headers = combined_headers
+        header_rows_count = 2
+    else:
+        headers = [h if h else f"Header_{i+1}" for i, h in enumerate(row0)]
+        header_rows_count = 1
+
+    # 3. Final Header Normalization
+    final_headers = []
+    header_counts = {}
+    for h in headers:
+        clean_h = h.replace("\n", " ").strip()
+        if not clean_h: clean_h = "Column"
+
+        if clean_h not in header_counts:
+            header_counts[clean_h] = 1
+            final_headers.append(clean_h)
+        else:
+            header_counts[clean_h] += 1
+            final_headers.append(f"{clean_h}_{header_counts[clean_h]}")
+
+    # 4. Row Construction
+    rows = []
+    for row in sanitized_table[header_row_idx + header_rows_count:]:
+        row_dict = {}
+        for i, header in enumerate(final_headers):
+            # Requirement 4: Preserve numeric values exactly
+            val = row[i] if i < len(row) else ""
+            row_dict[header] = val
+        rows.append(row_dict)
+
+    # 5. Final Object Construction
+    return {
+        "table_id": f"Page{page_num}_T{table_idx + 1}",
+        "page": page_num,
+        "filename": filename,
+        "scanned_at": datetime.utcnow().isoformat(),
+        "metadata": {
+            "row_count": len(rows),
+            "col_count": len(final_headers),
+            "is_structured": True,
+            "header_rows_used": header_rows_count,
+            "header_start_idx": header_row_idx
+        },
+        "columns": final_headers,
+        "rows": rows
+    }
+
+
+def count_ruling_edges(fitz_page, tolerance: float = 1.0, min_length: float = 3.0):
+    """
+    Counts horizontal and vertical vector segments on a page using PyMuPDF's drawing list.
+    Lines, rectangle sides, quads and curve chords are considered - the same primitives
+    pdfplumber turns into edges for its default "lines" table strategy.
+    Returns (horizontal_count, vertical_count).
+    """
+    horizontal = 0
+    vertical = 0
+
+    def add_segment(p1, p2):
+        nonlocal horizontal, vertical
+        dx = abs(p1.x - p2.x)
+        dy = abs(p1.y - p2.y)
+        if dy <= tolerance and dx >= min_length:
+            horizontal += 1
+        elif dx <= tolerance and dy >= min_length:
+            vertical += 1
+
+    for path in fitz_page.get_drawings():
+        for item in path["items"]:
+            kind = item[0]
+            if kind == "l":
+                add_segment(item[1], item[2])
+            elif kind == "c":
+                add_segment(item[1], item[4])
+            elif kind == "re":
+                rect = item[1]
+                add_segment(rect.tl, rect.tr)
+                add_segment(rect.bl, rect.br)
+                add_segment(rect.tl, rect.bl)
+                add_segment(rect.tr, rect.br)
+            elif kind == "qu":
+                quad = item[1]
+                add_segment(quad.ul, quad.ur)
+                add_segment(quad.ll, quad.lr)
+                add_segment(quad.ul, quad.ll)
+                add_segment(quad.ur, quad.lr)
+    return horizontal, vertical
+
+
+def page_may_contain_tables(fitz_page) -> bool:
+    """
+    Cheap pre-pass deciding whether pdfplumber's extract_tables() can find anything.
+    Its default "lines" strategy needs at least two horizontal and two vertical ruling
+    edges to form a cell, so pages without them (pure prose) are skipped.
+    """
+    horizontal, vertical = count_ruling_edges(fitz_page)
+    return horizontal >= 2 and vertical >= 2
+
+
+def extract_page_tables(fitz_page, plub_page=None) -> list:
+    """
+    Returns the page's tables as lists of rows (the shape table_to_markdown/table_to_json expect).
+    Uses pdfplumber when a pdfplumber page is given (hybrid mode), otherwise PyMuPDF's own table finder.
+    """
+    # Only pages with ruling lines can yield tables
+    if TABLE_PREFILTER and not page_may_contain_tables(fitz_page):
+        return []
+    if plub_page is not None:
+        return plub_page.extract_tables()
+    return [table.extract() for table in fitz_page.find_tables().tables]
+
+
+def extract_page_range(pdf_path: str, start: int, end: int, filename: str, mode: str = None) -> list:
+    """
+    Worker entry point: opens the PDF from disk once and extracts pages [start, end).
+    The parsers read the file lazily, so worker memory does not scale with file size.
+    Text always comes from Fitz; tables come from pdfplumber ("hybrid") or from
+    PyMuPDF's table finder ("pymupdf", single parser).
+    Returns a list of {text, page_number, tables} dicts in page order.
+    """
+    mode = mode or EXTRACTION_MODE
+    pages = []
+    try:
+        with contextlib.ExitStack() as stack:
+            fitz_doc = stack.enter_context(fitz.open(pdf_path))
+            plub_doc = stack.enter_context(pdfplumber.open(pdf_path)) if mode == "hybrid" else None
+            for page_num in range(start, end):
+                # Get page from the active parser(s)
+                fitz_page = fitz_doc[page_num]
+                plub_page = plub_doc.pages[page_num] if plub_doc else None
+
+                # 1. Base text from Fitz (fast and accurate for text)
+                text = fitz_page.get_text()
+
+                # 2. Extract Tables
+                tables = extract_page_tables(fitz_page, plub_page)
+                table_md = ""
+                page_json_tables = []
+
+                for idx, table in enumerate(tables):
+                    # Generate Markdown
+                    table_md += table_to_markdown(table)
+                    # Generate Structured JSON
+                    json_table = table_to_json(table, page_num + 1, idx, filename)
+                    if json_table:
+                        page_json_tables.append(json_table)
+
+                # 3. Append Markdown tables to text for indexing
+                if table_md:
+                    print(f"   TABLES: {len(page_json_tables)} Table(s) found on page {page_num + 1}")
+                    text += "\n" + table_md
+
+                pages.append({
+                    "text": text,
+                    "page_number": page_num + 1,
+                    "tables": page_json_tables # Store structured objects
+                })
+                if plub_page is not None:
+                    # Drop pdfplumber's cached layout objects so memory stays per-page
+                    plub_page.flush_cache()
+    except Exception as e:
+        print(f"ERROR: Enhanced extraction failed for pages {start + 1}-{end}: {e}. Falling back to standard text extraction.")
+        pages = []
+        with fitz.open(pdf_path) as doc:
+            for page_num in range(start, end):
+                pages.append({
+                    "text": doc[page_num].get_text(),
+                    "page_number": page_num + 1,
+                    "tables": [],
+                    "extraction_fallback": True # Degraded result: never cached
+                })
+    return pages
+
+
+def plan_page_ranges(total_pages: int, workers: int = PDF_EXTRACT_WORKERS, min_pages: int = MIN_PAGES_PER_WORKER) -> list:
+    """Splits [0, total_pages) into contiguous ranges, one per worker, never smaller than min_pages."""
+    if total_pages <= 0:
+        return []
+    range_count = max(1, min(workers, total_pages // max(1, min_pages)))
+    size, remainder = divmod(total_pages, range_count)
+    ranges = []
+    start = 0
+    for i in range(range_count):
+        end = start + size + (1 if i < remainder else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def count_pages(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+
+def extractor_version(mode: str = None) -> str:
+    """Cache key component: code version plus the settings that change extraction output."""
+    return f"v{EXTRACTOR_VERSION}-{mode or EXTRACTION_MODE}-{'prefilter' if TABLE_PREFILTER else 'all'}"
+
+
+def missing_page_ranges(end: int, cached_pages, start: int = 0) -> list:
+    """Splits the pages of [start, end) not in cached_pages (1-based numbers) into worker ranges."""
+    ranges = []
+    run_start = None
+    for page_num in range(start, end + 1):
+        missing = page_num < end and (page_num + 1) not in cached_pages
+        if missing and run_start is None:
+            run_start = page_num
+        elif not missing and run_start is not None:
+            ranges.extend((run_start + s, run_start + e) for s, e in plan_page_ranges(page_num - run_start))
+            run_start = None
+    return ranges
+
+
+async def _extract_batch(pdf_path: str, filename: str, content_hash: str, start: int, end: int) -> list:
+    """Pages [start, end) in order: cached pages are reused, the rest run in the process pool and get cached."""
+    version = extractor_version()
+    cached = await asyncio.to_thread(load_cached_pages, content_hash, version, end, filename, start + 1)
+    ranges = missing_page_ranges(end, cached, start)
+    if not ranges:
+        return [cached[n] for n in range(start + 1, end + 1)]
+
+    loop = asyncio.get_running_loop()
+    try:
+        executor = get_extraction_executor()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, extract_page_range, pdf_path, s, e, filename, EXTRACTION_MODE)
+            for s, e in ranges
+        ])
+    except BrokenProcessPool as e:
+        print(f"WARNING: Extraction pool unavailable ({e}). Extracting in a thread instead.")
+        shutdown_extraction_executor()
+        results = [await asyncio.to_thread(extract_page_range, pdf_path, s, e, filename, EXTRACTION_MODE)
+                   for s, e in ranges]
+
+    extracted = [page for chunk in results for page in chunk]
+    await asyncio.to_thread(store_pages, content_hash, version, extracted)
+    pages_by_number = dict(cached)
+    pages_by_number.update((page["page_number"], page) for page in extracted)
+    return [pages_by_number[n] for n in sorted(pages_by_number)]
+
+
+def plan_page_batches(page_numbers, batch_pages: int = STREAM_BATCH_PAGES) -> list:
+    """Groups 1-based page numbers into [start, end) ranges of consecutive pages, at most batch_pages long."""
+    batches = []
+    for page_number in sorted(set(page_numbers)):
+        if batches and batches[-1][1] == page_number - 1 and batches[-1][1] - batches[-1][0] < max(1, batch_pages):
+            batches[-1] = (batches[-1][0], page_number)
+        else:
+            batches.append((page_number - 1, page_number))
+    return batches
+
+
+async def iter_pdf_pages(pdf_path: str, filename: str, content_hash: str = None, total_pages: int = None,
+                         batch_pages: int = STREAM_BATCH_PAGES, max_in_flight: int = STREAM_BATCHES_IN_FLIGHT,
+                         page_numbers=None):
+    """
+    Async generator yielding extracted pages in page order, one batch (list of pages) at a time.
+    At most max_in_flight batches are extracted ahead of the consumer, so memory stays bounded
+    by batch size rather than document size while extraction overlaps downstream work.
+    page_numbers (1-based) restricts extraction to those pages (incremental re-ingestion).
+    """
+    if page_numbers is None:
+        if total_pages is None:
+            total_pages = await asyncio.to_thread(count_pages, pdf_path)
+        page_numbers = range(1, total_pages + 1)
+    batches = plan_page_batches(page_numbers, batch_pages)
+    pending = collections.deque()
+    next_batch = 0
+    try:
+        while pending or next_batch < len(batches):
+            while next_batch < len(batches) and len(pending) < max(1, max_in_flight):
+                start, end = batches[next_batch]
+                pending.append(asyncio.ensure_future(_extract_batch(pdf_path, filename, content_hash, start, end)))
+                next_batch += 1
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
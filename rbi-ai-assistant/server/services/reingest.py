@@ -0,0 +1,229 @@
+import os
+import uuid
+import asyncio
+from services.supabase_client import get_supabase
+from services.pdf_extraction import iter_pdf_pages
+from services.boilerplate import BoilerplateFilter, load_corpus_boilerplate
+from services.dedupe import find_duplicate_document
+from services.upload_pipeline import BUCKET_NAME, DomainValidationFailed, early_validate_pdf, scan_text_layer, embed_page_chunks, build_table_rows
+from services.job_queue import JobFailed
+from services.notifications import create_notification
+
+# A new PDF is matched to the existing document sharing at least this share of its pages
+REINGEST_MIN_PAGE_OVERLAP = float(os.getenv("REINGEST_MIN_PAGE_OVERLAP", "0.5"))
+HASH_LOOKUP_BATCH = 100
+PAGE_FETCH_SIZE = 1000
+
+
+def load_page_hashes(document_id: int) -> dict:
+    """{page_number: page_hash} of the currently indexed version (empty if never recorded)."""
+    supabase = get_supabase()
+    hashes = {}
+    offset = 0
+    while True:
+        res = supabase.table("document_pages").select("page_number,page_hash") \
+            .eq("document_id", document_id).order("page_number") \
+            .range(offset, offset + PAGE_FETCH_SIZE - 1).execute()
+        rows = res.data or []
+        hashes.update((row["page_number"], row["page_hash"]) for row in rows)
+        if len(rows) < PAGE_FETCH_SIZE:
+            return hashes
+        offset += PAGE_FETCH_SIZE
+
+
+def find_amended_document(page_hashes: list):
+    """
+    Finds the indexed document the new PDF is a revision of: the one sharing the most page
+    hashes, if that covers at least REINGEST_MIN_PAGE_OVERLAP of the new pages with text.
+    Pages without text (None hash) neither match nor count towards the overlap.
+    Returns (document_id, overlap) or (None, best_overlap).
+    """
+    distinct = list({h for h in page_hashes if h})
+    if not distinct:
+        return None, 0.0
+    supabase = get_supabase()
+    shared = {}
+    for i in range(0, len(distinct), HASH_LOOKUP_BATCH):
+        res = supabase.table("document_pages").select("document_id,page_hash") \
+            .in_("page_hash", distinct[i:i + HASH_LOOKUP_BATCH]).execute()
+        for row in res.data or []:
+            shared.setdefault(row["document_id"], set()).add(row["page_hash"])
+    if not shared:
+        return None, 0.0
+    document_id, hashes = max(shared.items(), key=lambda item: len(item[1]))
+    overlap = len(hashes) / len(distinct)
+    return (document_id, overlap) if overlap >= REINGEST_MIN_PAGE_OVERLAP else (None, overlap)
+
+
+def diff_pages(old_hashes: dict, new_hashes: list) -> dict:
+    """
+    Compares the indexed version ({page_number: hash}) with the new one (hashes of pages 1..n).
+    Unchanged pages keep their chunks; pages whose content only shifted position are moved
+    (chunks renumbered, no re-embedding); everything else is changed and re-embedded.
+    Old pages matched by nothing are removed, unless a changed page takes their place.
+    Pages without text (None hash) stay in place when blank in both versions but are never moved.
+    """
+    in_place = {n for n, h in enumerate(new_hashes, start=1) if n in old_hashes and old_hashes[n] == h}
+    available = {}
+    for n, h in sorted(old_hashes.items()):
+        if n not in in_place and h:
+            available.setdefault(h, []).append(n)
+
+    unchanged, moved, changed = [], [], []
+    for n, h in enumerate(new_hashes, start=1):
+        if n in in_place:
+            unchanged.append(n)
+        elif h and available.get(h):
+            moved.append({"from": available[h].pop(0), "to": n})
+        else:
+            changed.append(n)
+    changed_set = set(changed)
+    used = in_place | {m["from"] for m in moved}
+    removed = sorted(n for n in old_hashes if n not in used and n not in changed_set)
+    return {"unchanged": unchanged, "moved": moved, "changed": changed, "removed": removed}
+
+
+def storage_key_from_url(public_url: str):
+    """Object path inside BUCKET_NAME for a public URL stored in documents.file_path."""
+    marker = f"/{BUCKET_NAME}/"
+    if not public_url or marker not in public_url:
+        return None
+    return public_url.split(marker, 1)[1].split("?", 1)[0]
+
+
+async def run_reingest_pipeline(payload: dict, progress):
+    """
+    Job handler for amended circulars: matches the new PDF to an existing document (payload
+    document_id, else by shared page hashes), re-extracts and re-embeds only pages whose hash
+    changed, then swaps their chunks and tables atomically (swap_document_pages RPC) and logs
+    the revision. Changed pages' rows are held in memory until the swap.
+    payload: {spool_path, filename, sha256, file_size, document_id (optional), keep_source}
+    """
+    spool_path = payload["spool_path"]
+    filename = payload["filename"]
+    content_hash = payload.get("sha256")
+    supabase = get_supabase()
+
+    try:
+        # 1. Byte-identical re-upload: nothing to do
+        existing = await asyncio.to_thread(find_duplicate_document, content_hash=content_hash)
+        if existing:
+            print(f"INFO: '{filename}' is byte-identical to document ID {existing['id']}; nothing to re-ingest.")
+            return {"document": existing, "changed_pages": [], "duplicate": True}
+
+        # 2. Validate RBI Domain Policy on the leading pages' text
+        passed, signals, pages_read = await asyncio.to_thread(early_validate_pdf, spool_path)
+        print(f"🕵️ Domain Security Audit: Found {len(signals)} validation signals in the first {pages_read} page(s).")
+        if not passed:
+            raise DomainValidationFailed("Only authentic official RBI circular documents are allowed.")
+
+        # 3. Hash every page (text-only pass) and find the document being amended
+        text_hash, span_counter, page_hashes = await asyncio.to_thread(scan_text_layer, spool_path)
+        document_id = payload.get("document_id")
+        if not document_id:
+            document_id, overlap = await asyncio.to_thread(find_amended_document, page_hashes)
+            if not document_id:
+                raise JobFailed(f"No existing circular shares enough pages with '{filename}' "
+                                f"(best overlap {overlap:.0%}); upload it as a new circular.")
+            print(f"INFO: '{filename}' matched document ID {document_id} ({overlap:.0%} of pages shared).")
+        res = await asyncio.to_thread(lambda: supabase.table("documents").select("*").eq("id", document_id).limit(1).execute())
+        if not res.data:
+            raise JobFailed(f"Document {document_id} not found.")
+        document = res.data[0]
+
+        # 4. Page diff against the indexed version
+        old_hashes = await asyncio.to_thread(load_page_hashes, document_id)
+        if not old_hashes:
+            # Indexed before page hashes were recorded: a marker no page hash equals, so every page is replaced
+            print(f"WARNING: No page hashes for document {document_id}; re-indexing all pages.")
+            old_total = document.get("total_pages") or len(page_hashes)
+            old_hashes = {n: "unrecorded" for n in range(1, max(old_total, len(page_hashes)) + 1)}
+        diff = diff_pages(old_hashes, page_hashes)
+        total_pages = len(page_hashes)
+        progress.update(total_pages=total_pages, pages_changed=len(diff["changed"]), pages_extracted=0)
+        print(f"🔹 Revision of document {document_id}: {len(diff['changed'])} changed, {len(diff['moved'])} moved, "
+              f"{len(diff['removed'])} removed, {len(diff['unchanged'])} unchanged page(s).")
+        if not (diff["changed"] or diff["moved"] or diff["removed"]):
+            return {"document": document, "changed_pages": [], "removed_pages": [], "moved_pages": []}
+
+        # 5. Extract, strip and embed only the changed pages
+        corpus_hashes = await asyncio.to_thread(load_corpus_boilerplate)
+        boilerplate_filter = BoilerplateFilter(span_counter.repeated(), corpus_hashes)
+        if diff["unchanged"] or diff["moved"]:
+            # Retained pages already hold the one indexed copy of in-document repeats
+            boilerplate_filter.seen.update(boilerplate_filter.repeated)
+        chunk_rows, table_rows = [], []
+        next_index = 0
+        async for batch in iter_pdf_pages(spool_path, filename, content_hash, total_pages, page_numbers=diff["changed"]):
+            progress.increment("pages_extracted", len(batch))
+            for page in batch:
+                boilerplate_filter.strip(page)
+            rows, next_index = await embed_page_chunks(document_id, batch, progress, next_index)
+            chunk_rows.extend({k: r[k] for k in ("content", "embedding", "page_number")} for r in rows)
+            table_rows.extend({k: r[k] for k in ("page_number", "table_index", "table_data", "summary")}
+                              for r in build_table_rows(document_id, batch))
+
+        # 6. Store the new PDF, then swap pages in one transaction
+        unique_filename = f"{uuid.uuid4()}{os.path.splitext(filename)[1] or '.pdf'}"
+        with open(spool_path, "rb") as pdf_file:
+            await asyncio.to_thread(
+                supabase.storage.from_(BUCKET_NAME).upload,
+                path=unique_filename,
+                file=pdf_file,
+                file_options={"content-type": "application/pdf"}
+            )
+        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(unique_filename)
+        document_update = {
+            "file_path": public_url,
+            "filename": filename,
+            "total_pages": total_pages,
+            "file_size": round(payload.get("file_size", os.path.getsize(spool_path)) / 1024, 2),
+            "content_hash": content_hash,
+            "text_hash": text_hash
+        }
+        try:
+            res = await asyncio.to_thread(lambda: supabase.rpc("swap_document_pages", {
+                "p_document_id": document_id,
+                "p_replaced_pages": diff["changed"],
+                "p_removed_pages": diff["removed"],
+                "p_moves": diff["moved"],
+                "p_chunks": chunk_rows,
+                "p_tables": table_rows,
+                "p_pages": [{"page_number": n, "page_hash": h} for n, h in enumerate(page_hashes, start=1)],
+                "p_document": document_update
+            }).execute())
+        except Exception as e:
+            print(f"ERROR: Page swap failed for document {document_id}: {e}")
+            await asyncio.to_thread(supabase.storage.from_(BUCKET_NAME).remove, [unique_filename])
+            raise JobFailed(f"Re-ingestion failed, the indexed version is unchanged: {e}")
+        revision_id = res.data
+        print(f"SUCCESS: Document {document_id} revised (revision {revision_id}): pages {diff['changed']} re-embedded.")
+
+        # 7. Old PDF is no longer referenced
+        old_key = storage_key_from_url(document.get("file_path"))
+        if old_key:
+            try:
+                await asyncio.to_thread(supabase.storage.from_(BUCKET_NAME).remove, [old_key])
+            except Exception as e:
+                print(f"WARNING: Failed to remove previous PDF '{old_key}' (non-critical): {e}")
+
+        # 8. Create Notification
+        try:
+            await asyncio.to_thread(
+                create_notification,
+                f"Circular updated: {document.get('title') or filename} ({len(diff['changed'])} page(s) changed)", "upload"
+            )
+        except Exception as notif_error:
+            print(f"WARNING: Failed to create notification (non-critical): {notif_error}")
+
+        document.update(document_update)
+        return {
+            "document": document,
+            "revision_id": revision_id,
+            "changed_pages": diff["changed"],
+            "removed_pages": diff["removed"],
+            "moved_pages": diff["moved"]
+        }
+    finally:
+        if not payload.get("keep_source") and os.path.exists(spool_path):
+            os.remove(spool_path)
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import random
+import asyncio
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+    import msvcrt
+
+# Periodic background jobs on the app event loop. State and locks live on local disk,
+# shared by every worker process of the deployment (gunicorn workers on one host).
+DATA_DIR = os.getenv("INGESTION_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+SCHEDULER_STATE_DIR = os.getenv("SCHEDULER_STATE_DIR", os.path.join(DATA_DIR, "scheduler"))
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+
+
+class JobLock:
+    """Non-blocking exclusive file lock; released by the OS if the holding process dies."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class ScheduledJob:
+    """
+    async func() run every `interval` seconds plus a random delay of up to `jitter` seconds.
+    Exclusive jobs run in one worker at a time and their schedule is persisted; the others
+    (per-process work such as warming in-memory caches) run in every worker.
+    """
+
+    def __init__(self, name: str, func, interval: float, jitter: float = 0.0, exclusive: bool = True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.exclusive = exclusive
+
+
+class Scheduler:
+    def __init__(self, state_dir: str = SCHEDULER_STATE_DIR, tick_seconds: float = SCHEDULER_TICK_SECONDS):
+        self.state_dir = state_dir
+        self.tick_seconds = tick_seconds
+        self.jobs = {}
+        self._local_state = {}
+        self._running = {}
+        self._task = None
+
+    def add_job(self, name: str, func, interval: float, jitter: float = 0.0, exclusive: bool = True):
+        self.jobs[name] = ScheduledJob(name, func, interval, jitter, exclusive)
+
+    # --- persisted state -------------------------------------------------
+    def _state_path(self, name: str) -> str:
+        return os.path.join(self.state_dir, f"{name}.json")
+
+    def load_state(self, name: str) -> dict:
+        """{last_run, next_run (epoch seconds), last_status, last_error, last_duration_s}; {} if never run."""
+        job = self.jobs.get(name)
+        if job and not job.exclusive:
+            return dict(self._local_state.get(name, {}))
+        try:
+            with open(self._state_path(name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, name: str, state: dict):
+        if not self.jobs[name].exclusive:
+            self._local_state[name] = state
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = self._state_path(name) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path(name))
+
+    def is_due(self, name: str, now: float = None) -> bool:
+        return (now or time.time()) >= self.load_state(name).get("next_run", 0)
+
+    # --- running ---------------------------------------------------------
+    async def run_job(self, name: str) -> bool:
+        """Runs `name` if it is due and no other worker holds its lock. True if it ran."""
+        job = self.jobs[name]
+        lock = JobLock(os.path.join(self.state_dir, f"{name}.lock")) if job.exclusive else None
+        if lock and not lock.acquire():
+            return False
+        try:
+            # Re-checked under the lock: another worker may have just run it
+            if not self.is_due(name):
+                return False
+            print(f"INFO: Scheduler running '{name}'...")
+            started = time.time()
+            status, error = "completed", None
+            try:
+                await job.func()
+                print(f"SUCCESS: Scheduled job '{name}' completed in {time.time() - started:.1f}s.")
+            except Exception as e:
+                status, error = "failed", str(e)
+                print(f"ERROR: Scheduled job '{name}' failed: {e}")
+            finished = time.time()
+            self._save_state(name, {
+                "last_run": datetime.utcfromtimestamp(started).isoformat(),
+                "next_run": finished + job.interval + random.uniform(0, job.jitter),
+                "last_status": status,
+                "last_error": error,
+                "last_duration_s": round(finished - started, 3)
+            })
+            return True
+        finally:
+            if lock:
+                lock.release()
+
+    async def run_due_jobs(self) -> list:
+        """One scheduler pass: starts every due job not already running here. Returns their names."""
+        started = []
+        for name in self.jobs:
+            task = self._running.get(name)
+            if task and not task.done():
+                continue
+            if self.is_due(name):
+                self._running[name] = asyncio.create_task(self.run_job(name))
+                started.append(name)
+        return started
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_due_jobs()
+            except Exception as e:
+                print(f"ERROR: Scheduler pass failed: {e}")
+            await asyncio.sleep(self.tick_seconds)
+
+    async def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._loop())
+        print(f"INFO: Scheduler started with {len(self.jobs)} job(s): {', '.join(self.jobs)}.")
+
+    async def stop(self):
+        tasks = [t for t in self._running.values() if not t.done()]
+        if self._task:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running = {}
+
+
+scheduler = Scheduler()
+
+def get_scheduler() -> Scheduler:
+    return scheduler
@@ -1,153 +1,389 @@
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
 import os
+import re
 import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import datetime
+import httpx
 import fitz # PyMuPDF
 from services.supabase_client import get_supabase
+from services.html_parser import parse_html
 from services.ingestion_service import ingest_rbi_document
+from services.notifications import create_notification
+from services.summary_cache import SUMMARY_INPUT_CHARS, summary_key, load_cached_summary, store_cached_summary
 from groq import Groq
 
+RBI_BASE_URL = os.getenv("RBI_BASE_URL", "https://www.rbi.org.in").rstrip("/")
+# Simultaneous requests to the RBI site (also the client's connection pool size)
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "4"))
+SCRAPER_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_TIMEOUT_SECONDS", "15"))
+# Listing links considered per cycle; known ones cost a share of one batched lookup
+SCRAPER_MAX_UPDATES = int(os.getenv("SCRAPER_MAX_UPDATES", "100"))
+URL_LOOKUP_BATCH = 100
+# Simultaneous LLM summary requests
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "3"))
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+SUMMARY_UNAVAILABLE = "No summary available."
+SUMMARY_FAILED = "Summary generation failed."
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+# Listing links that look like regulatory documents, and the date format next to them
+UPDATE_LINK_MARKERS = ("display.aspx", "notification", "circular", "pressrelease", "master")
+DATE_PATTERN = re.compile(r'([A-Z][a-z]{2}\s+\d{1,2},\s+\d{4})')
+
+
+def create_http_client(concurrency: int = SCRAPER_CONCURRENCY) -> httpx.AsyncClient:
+    """Pooled async client: keep-alive connections are reused across the listing, pages and PDFs."""
+    return httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        timeout=SCRAPER_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    )
+
+
+def load_source_state(url: str) -> dict:
+    """Validators and body hash stored for a scraped URL (db/schema_scraper_sources.sql); {} if none."""
+    try:
+        res = get_supabase().table("scraper_sources").select("*").eq("url", url).limit(1).execute()
+        return res.data[0] if res.data else {}
+    except Exception as e:
+        print(f"WARNING: Failed to load scraper state for {url} (non-critical): {e}")
+        return {}
+
+
+def save_source_state(state: dict):
+    try:
+        get_supabase().table("scraper_sources").upsert(state, on_conflict="url").execute()
+    except Exception as e:
+        print(f"WARNING: Failed to save scraper state for {state.get('url')} (non-critical): {e}")
+
+
+def find_known_urls(urls: list) -> set:
+    """The subset of `urls` already stored in rbi_updates (one query per URL_LOOKUP_BATCH links)."""
+    supabase = get_supabase()
+    known = set()
+    for i in range(0, len(urls), URL_LOOKUP_BATCH):
+        res = supabase.table("rbi_updates").select("pdf_url").in_("pdf_url", urls[i:i + URL_LOOKUP_BATCH]).execute()
+        known.update(row["pdf_url"] for row in res.data or [])
+    return known
+
+
+def store_update(update_row: dict):
+    """Inserts an rbi_updates row; a row for the same link stored meanwhile wins (no duplicate)."""
+    supabase = get_supabase()
+    try:
+        supabase.table("rbi_updates").upsert(update_row, on_conflict="pdf_url", ignore_duplicates=True).execute()
+    except Exception as e:
+        if "ON CONFLICT" not in str(e) and "42P10" not in str(e):
+            raise
+        # Unique index not migrated yet (db/schema_rbi_updates_dedupe.sql): plain insert
+        supabase.table("rbi_updates").insert(update_row).execute()
+
+
+def set_update_summary(pdf_url: str, summary: str):
+    get_supabase().table("rbi_updates").update({"summary": summary}).eq("pdf_url", pdf_url).execute()
+
+
+def format_bytes(size: int) -> str:
+    return f"{size / 1024:.1f} KB" if size >= 1024 else f"{size} B"
+
+
+def absolute_url(base_url: str, href: str) -> str:
+    return href if href.startswith("http") else base_url + (href if href.startswith("/") else "/" + href)
+
+
+def parse_updates(html: str, base_url: str, limit: int = 5) -> list:
+    """Extracts update links (title, url, date) from the RBI 'What's New' listing."""
+    page = parse_html(html)
+    updates = []
+    seen = set()
+    # Aggregate all content links
+    for link in page.links():
+        href = link.href
+        text = link.text
+
+        # Extremely broad filters for regulatory documents
+        if len(text) > 10 and any(x in href.lower() for x in UPDATE_LINK_MARKERS):
+            full_link = absolute_url(base_url, href)
+            if full_link in seen:
+                continue
+            seen.add(full_link)
+
+            # Try to capture date from parent context
+            date_match = DATE_PATTERN.search(page.context_text(link))
+            updates.append({
+                "title": text,
+                "url": full_link,
+                "date": date_match.group(1) if date_match else "",
+                "pdf_url": full_link
+            })
+            if len(updates) >= limit: break
+
+    # Fallback if no specific links found: look for common table rows
+    if not updates:
+        for cells, links in page.rows():
+            if links and len(links[0].text) > 20:
+                full_link = absolute_url(base_url, links[0].href)
+                updates.append({
+                    "title": links[0].text,
+                    "url": full_link,
+                    "date": cells[0] if cells else "",
+                    "pdf_url": full_link
+                })
+            if len(updates) >= limit: break
+
+    return updates
+
+
+def extract_summary_text(content: bytes, content_type: str, url: str):
+    """Returns (text for the summary, pdf bytes or None) for a fetched update resource."""
+    if url.lower().endswith(".pdf") or "application/pdf" in content_type:
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            return doc[0].get_text()[:SUMMARY_INPUT_CHARS], content
+    return parse_html(content).text()[:SUMMARY_INPUT_CHARS], None
+
+
 class RBIScraperService:
-    def __init__(self):
-        self.base_url = "https://www.rbi.org.in"
-        self.notifications_url = "https://www.rbi.org.in/Scripts/Notifications.aspx"
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+    def __init__(self, base_url: str = None, client: httpx.AsyncClient = None, concurrency: int = SCRAPER_CONCURRENCY):
+        self.base_url = (base_url or RBI_BASE_URL).rstrip("/")
+        self.notifications_url = f"{self.base_url}/Scripts/Notifications.aspx"
+        self.listing_url = f"{self.base_url}/Scripts/BS_ViewWasNewResponse.aspx"
+        self.concurrency = max(1, concurrency)
+        self.client = client
+        self._fetch_slots = None
+        self._summary_slots = None
+        self._summaries_in_flight = {}
+        self._summary_writes = []
+        self.last_sync = {}
         api_key = os.getenv("GROQ_API_KEY")
         self.groq_client = Groq(api_key=api_key) if api_key else None
 
+    @asynccontextmanager
+    async def http_session(self):
+        """
+        One pooled client for a whole sync run. Nested calls (and an injected client) reuse
+        the open one; a client opened here is closed on exit, so no connection outlives
+        the event loop it was created on (the background scraper runs a new loop per cycle).
+        """
+        if self.client is not None:
+            if self._fetch_slots is None:
+                self._fetch_slots = asyncio.Semaphore(self.concurrency)
+            yield self.client
+            return
+        async with create_http_client(self.concurrency) as client:
+            self.client = client
+            self._fetch_slots = asyncio.Semaphore(self.concurrency)
+            try:
+                yield client
+            finally:
+                self.client = None
+                self._fetch_slots = None
+
+    async def fetch(self, url: str, headers: dict = None) -> httpx.Response:
+        """GET through the shared client, at most `concurrency` requests in flight."""
+        async with self._fetch_slots:
+            response = await self.client.get(url, headers=headers)
+        if response.status_code != 304:  # Not Modified is an answer to a conditional request
+            response.raise_for_status()
+        return response
+
+    async def fetch_if_changed(self, url: str) -> dict:
+        """
+        Conditional GET using the validators stored for `url`.
+        Returns {"response": httpx.Response or None, "state", "bytes_downloaded", "bytes_saved"}.
+        The response is None when the server answers 304 or the body hash is unchanged;
+        `state` is the row to save once the content has been processed.
+        """
+        state = await asyncio.to_thread(load_source_state, url)
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        response = await self.fetch(url, headers=headers)
+        now = datetime.utcnow().isoformat()
+        new_state = {key: state.get(key) for key in ("etag", "last_modified", "content_hash", "content_length", "changed_at")}
+        new_state.update(url=url, checked_at=now)
+        if response.status_code == 304:
+            return {"response": None, "state": new_state, "bytes_downloaded": 0,
+                    "bytes_saved": state.get("content_length") or 0}
+
+        body = response.content
+        content_hash = hashlib.sha256(body).hexdigest()
+        new_state.update(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_length=len(body)
+        )
+        if content_hash == state.get("content_hash"):
+            return {"response": None, "state": new_state, "bytes_downloaded": len(body), "bytes_saved": 0}
+        new_state.update(content_hash=content_hash, changed_at=now)
+        return {"response": response, "state": new_state, "bytes_downloaded": len(body), "bytes_saved": 0}
+
     async def get_latest_updates(self, limit=5):
         """Scrapes RBI 'What's New' page with improved selectors."""
         try:
-            url = f"{self.base_url}/Scripts/BS_ViewWasNewResponse.aspx"
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            updates = []
-            # Aggregate all content links
-            links = soup.find_all("a", href=True)
-            
-            for a in links:
-                href = a['href']
-                text = a.get_text(strip=True)
-                
-                # Extremely broad filters for regulatory documents
-                if any(x.lower() in href.lower() for x in ["display.aspx", "notification", "circular", "pressrelease", "master"]) and len(text) > 10:
-                    full_link = href if href.startswith("http") else self.base_url + (href if href.startswith("/") else "/" + href)
-                    
-                    # Try to capture date from parent context
-                    date_str = ""
-                    context_area = a.find_parent("td") or a.find_parent("div")
-                    if context_area:
-                        date_match = re.search(r'([A-Z][a-z]{2}\s+\d{1,2},\s+\d{4})', context_area.get_text())
-                        if date_match:
-                            date_str = date_match.group(1)
-                    
-                    if not any(u['url'] == full_link for u in updates):
-                        updates.append({
-                            "title": text,
-                            "url": full_link,
-                            "date": date_str,
-                            "pdf_url": full_link
-                        })
-                
-                if len(updates) >= limit: break
-            
-            # Fallback if no specific links found: look for common table rows
-            if not updates:
-                rows = soup.find_all("tr")
-                for row in rows:
-                    a = row.find("a", href=True)
-                    if a and len(a.text.strip()) > 20:
-                        href = a['href']
-                        full_link = href if href.startswith("http") else self.base_url + (href if href.startswith("/") else "/" + href)
-                        updates.append({
-                            "title": a.text.strip(),
-                            "url": full_link,
-                            "date": row.find_all("td")[0].text.strip() if row.find_all("td") else "",
-                            "pdf_url": full_link
-                        })
-                    if len(updates) >= limit: break
-
-            return updates
+            async with self.http_session():
+                response = await self.fetch(self.listing_url)
+            return await asyncio.to_thread(parse_updates, response.text, self.base_url, limit)
         except Exception as e:
             print(f"ERROR: Scraper failed: {e}")
             return []
 
     async def generate_summary(self, text):
         """Uses Groq to generate a 2-sentence summary of the update."""
-        if not self.groq_client: return "No summary available."
-        
-        prompt = f"Summarize this RBI notification in exactly 2 concise sentences for a compliance officer:\n\n{text[:3000]}"
+        if not self.groq_client: return SUMMARY_UNAVAILABLE
+
+        prompt = f"Summarize this RBI notification in exactly 2 concise sentences for a compliance officer:\n\n{text[:SUMMARY_INPUT_CHARS]}"
         try:
-            res = self.groq_client.chat.completions.create(
+            res = await asyncio.to_thread(
+                self.groq_client.chat.completions.create,
                 messages=[{"role": "user", "content": prompt}],
-                model="llama-3.1-8b-instant",
+                model=SUMMARY_MODEL,
                 temperature=0.3,
                 max_tokens=150
             )
             return res.choices[0].message.content.strip()
         except:
-            return "Summary generation failed."
+            return SUMMARY_FAILED
+
+    async def summarize(self, text: str) -> str:
+        """
+        Summary of `text`, reused when the same content (first SUMMARY_INPUT_CHARS characters)
+        was summarized before, e.g. a circular republished under a new URL. Identical content
+        in flight at the same time is summarized once; at most SUMMARY_CONCURRENCY LLM calls run.
+        """
+        key = summary_key(text)
+        if key not in self._summaries_in_flight:
+            self._summaries_in_flight[key] = asyncio.ensure_future(self._summarize_uncached(key, text))
+        return await asyncio.shield(self._summaries_in_flight[key])
+
+    async def _summarize_uncached(self, key: str, text: str) -> str:
+        cached = await asyncio.to_thread(load_cached_summary, key)
+        if cached:
+            self.last_sync["summaries_cached"] = self.last_sync.get("summaries_cached", 0) + 1
+            return cached
+        if self._summary_slots is None:
+            self._summary_slots = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+        async with self._summary_slots:
+            summary = await self.generate_summary(text)
+        if summary not in (SUMMARY_UNAVAILABLE, SUMMARY_FAILED):
+            self.last_sync["summaries_generated"] = self.last_sync.get("summaries_generated", 0) + 1
+            await asyncio.to_thread(store_cached_summary, key, summary, SUMMARY_MODEL)
+        return summary
+
+    async def _write_summary(self, pdf_url: str, summary_task):
+        summary = await summary_task
+        await asyncio.to_thread(set_update_summary, pdf_url, summary)
+
+    async def process_update(self, up: dict):
+        """
+        Fetches one new update, ingests its PDF and records it in rbi_updates. The summary is
+        generated alongside and written to the row when ready, so the LLM never delays storing.
+        """
+        print(f"INFO: New Update Found: {up['title']}")
+
+        # 1. Fetch content for summary
+        content_text = up['title'] # Fallback
+        pdf_bytes = None
+        try:
+            resp = await self.fetch(up['url'])
+            content_text, pdf_bytes = await asyncio.to_thread(
+                extract_summary_text, resp.content, resp.headers.get("Content-Type", ""), up['url']
+            )
+        except Exception as inner_e:
+            print(f"WARNING: Resource fetch failed for {up['title']}: {inner_e}")
+
+        summary_task = asyncio.ensure_future(self.summarize(content_text))
+        try:
+            # 2. Ingest if PDF exists
+            doc_id = None
+            if pdf_bytes:
+                doc_id = await ingest_rbi_document(pdf_bytes, f"rbi_update_{datetime.now().strftime('%Y%m%d')}.pdf", up['title'])
+
+            # 3. Store in rbi_updates (with the summary only if it is already there, e.g. cached)
+            update_row = {
+                "title": up['title'],
+                "url": up['url'],
+                "pdf_url": up['pdf_url'],
+                "publish_date": datetime.now().strftime("%Y-%m-%d"), # Approximation if parsing fails
+                "summary": summary_task.result() if summary_task.done() else None,
+                "document_id": doc_id
+            }
+            await asyncio.to_thread(store_update, update_row)
+        except BaseException:
+            summary_task.cancel()
+            raise
+        if update_row["summary"] is None:
+            self._summary_writes.append(asyncio.ensure_future(self._write_summary(up['pdf_url'], summary_task)))
+        print(f"SUCCESS: Ingested update: {up['title']}")
 
     async def sync_updates(self):
         """Main loop to sync latest RBI updates into the database."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] INFO: Synchronizing RBI Updates...")
-        
+
+        self.last_sync = {"listing_changed": False, "bytes_downloaded": 0, "bytes_saved": 0, "new_updates": 0}
         try:
-            updates = await self.get_latest_updates(limit=3)
-            supabase = get_supabase()
-            
-            for up in updates:
-                # Check if already exists (by URL or PDF URL)
-                existing = supabase.table("rbi_updates").select("id").eq("pdf_url", up['pdf_url']).execute()
-                if existing.data:
-                    print(f"INFO: Duplicate skipped: {up['title']}")
-                    continue
-                
-                print(f"INFO: New Update Found: {up['title']}")
-                
-                # 1. Fetch content for summary
-                content_text = up['title'] # Fallback
-                pdf_bytes = None
-                try:
-                    # If it's a PDF or page, try to get some text
-                    resp = requests.get(up['url'], headers=self.headers, timeout=10)
-                    if up['url'].endswith(".pdf") or "application/pdf" in resp.headers.get("Content-Type", ""):
-                        pdf_bytes = resp.content
-                        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-                            content_text = doc[0].get_text()[:3000]
-                    else:
-                        s = BeautifulSoup(resp.text, "html.parser")
-                        content_text = s.get_text()[:3000]
-                except Exception as inner_e:
-                    print(f"WARNING: Resource fetch failed for {up['title']}: {inner_e}")
-
-                summary = await self.generate_summary(content_text)
-                
-                # 2. Ingest if PDF exists
-                doc_id = None
-                if pdf_bytes:
-                    doc_id = await ingest_rbi_document(pdf_bytes, f"rbi_update_{datetime.now().strftime('%Y%m%d')}.pdf", up['title'])
-                
-                # 3. Store in rbi_updates
-                update_row = {
-                    "title": up['title'],
-                    "url": up['url'],
-                    "pdf_url": up['pdf_url'],
-                    "publish_date": datetime.now().strftime("%Y-%m-%d"), # Approximation if parsing fails
-                    "summary": summary,
-                    "document_id": doc_id
-                }
-                supabase.table("rbi_updates").insert(update_row).execute()
-                print(f"SUCCESS: Ingested update: {up['title']}")
+            async with self.http_session():
+                # Unchanged listing (304 or same body hash): no parsing, no dedupe queries
+                listing = await self.fetch_if_changed(self.listing_url)
+                self.last_sync.update(bytes_downloaded=listing["bytes_downloaded"], bytes_saved=listing["bytes_saved"])
+                if listing["response"] is None:
+                    await asyncio.to_thread(save_source_state, listing["state"])
+                    print(f"INFO: RBI listing unchanged; skipped parsing "
+                          f"({format_bytes(listing['bytes_saved'])} saved, {format_bytes(listing['bytes_downloaded'])} downloaded).")
+                    return 0
+                self.last_sync["listing_changed"] = True
+                updates = await asyncio.to_thread(
+                    parse_updates, listing["response"].text, self.base_url, SCRAPER_MAX_UPDATES
+                )
+
+                # One set-based lookup for every candidate link
+                known = await asyncio.to_thread(find_known_urls, [up['pdf_url'] for up in updates])
+                new_updates = [up for up in updates if up['pdf_url'] not in known]
+                print(f"INFO: {len(updates)} listed update(s), {len(known)} already stored, {len(new_updates)} new.")
+
+                # Updates are independent: fetch and ingest them concurrently, `concurrency` at a time
+                update_slots = asyncio.Semaphore(self.concurrency)
+
+                async def process_bounded(up):
+                    async with update_slots:
+                        await self.process_update(up)
+
+                results = await asyncio.gather(*(process_bounded(up) for up in new_updates), return_exceptions=True)
+                failed = 0
+                for up, result in zip(new_updates, results):
+                    if isinstance(result, Exception):
+                        failed += 1
+                        print(f"ERROR: Failed to sync update '{up['title']}': {result}")
+                self.last_sync["new_updates"] = len(new_updates) - failed
+                if self.last_sync["new_updates"]:
+                    stored = [up['title'] for up, result in zip(new_updates, results) if not isinstance(result, Exception)]
+                    message = (f"New RBI update: {stored[0]}" if len(stored) == 1
+                               else f"{len(stored)} new RBI updates, latest: {stored[0]}")
+                    try:
+                        await asyncio.to_thread(create_notification, message, "rbi_update")
+                    except Exception as notif_error:
+                        print(f"WARNING: Failed to create notification (non-critical): {notif_error}")
+
+                # Summaries still being generated are written as they finish
+                summary_results = await asyncio.gather(*self._summary_writes, return_exceptions=True)
+                for result in summary_results:
+                    if isinstance(result, Exception):
+                        print(f"WARNING: Failed to store update summary: {result}")
+                self._summary_writes = []
+                self._summaries_in_flight = {}
+                print(f"INFO: Summaries: {self.last_sync.get('summaries_generated', 0)} generated, "
+                      f"{self.last_sync.get('summaries_cached', 0)} from cache.")
+
+                # Remember this listing only once its updates are stored, so failures are retried next cycle
+                if not failed:
+                    await asyncio.to_thread(save_source_state, listing["state"])
 
             return len(updates)
-            
+
         except Exception as e:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             print(f"[{timestamp}] ERROR: Sync failed: {e}")
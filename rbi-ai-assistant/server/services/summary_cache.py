@@ -0,0 +1,37 @@
+import hashlib
+from services.supabase_client import get_supabase
+
+# Only this much of an update's text is sent to the LLM, so it is also the cache key
+SUMMARY_INPUT_CHARS = 3000
+
+# Summaries looked up or generated by this process (content_hash -> summary)
+_memo = {}
+
+
+def summary_key(text: str) -> str:
+    return hashlib.sha256((text or "")[:SUMMARY_INPUT_CHARS].encode("utf-8")).hexdigest()
+
+
+def load_cached_summary(key: str):
+    """Cached summary for `key` (db/schema_summary_cache.sql), or None. Non-critical."""
+    if key in _memo:
+        return _memo[key]
+    try:
+        res = get_supabase().table("summary_cache").select("summary").eq("content_hash", key).limit(1).execute()
+    except Exception as e:
+        print(f"WARNING: Failed to read summary cache (non-critical): {e}")
+        return None
+    if not res.data:
+        return None
+    _memo[key] = res.data[0]["summary"]
+    return _memo[key]
+
+
+def store_cached_summary(key: str, summary: str, model: str = None):
+    _memo[key] = summary
+    try:
+        get_supabase().table("summary_cache").upsert(
+            {"content_hash": key, "summary": summary, "model": model}, on_conflict="content_hash"
+        ).execute()
+    except Exception as e:
+        print(f"WARNING: Failed to write summary cache (non-critical): {e}")
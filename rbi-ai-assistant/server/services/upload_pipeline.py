@@ -0,0 +1,437 @@
+import os
+import re
+import uuid
+import asyncio
+import contextlib
+import fitz
+from datetime import datetime
+from services.supabase_client import get_supabase
+from services.embedding_service import generate_embedding
+from services.pdf_extraction import iter_pdf_pages, count_pages
+from services.dedupe import (find_duplicate_document, compute_text_hash, compute_page_hash, record_page_hashes,
+                             is_duplicate_key_error, is_missing_column_error)
+from services.chunking import chunk_text
+from services.boilerplate import SpanCounter, BoilerplateFilter, load_corpus_boilerplate, record_document_spans
+from services.bulk_writer import bulk_upsert, BulkWriteError, CHUNK_CONFLICT_KEY, TABLE_CONFLICT_KEY
+from services.job_queue import JobFailed
+from services.analytics import invalidate_document_stats
+from services.notifications import create_notification
+
+BUCKET_NAME = "rbi-documents"
+# Extracted page batches buffered between extraction and the chunk/embed/write stage
+STREAM_QUEUE_BATCHES = int(os.getenv("STREAM_QUEUE_BATCHES", "2"))
+
+
+# Domain validation reads PyMuPDF text from at most this many leading pages (RBI identifiers sit on page 1)
+EARLY_VALIDATION_PAGES = int(os.getenv("EARLY_VALIDATION_PAGES", "5"))
+RBI_SIGNAL_THRESHOLD = 2
+
+
+class DomainValidationFailed(JobFailed):
+    """Raised when a PDF is not an RBI circular: a final rejection, retrying cannot help."""
+
+
+def rbi_signals(text: str) -> set:
+    """Names of the RBI domain signals present in text."""
+    signals = set()
+    text_lower = text.lower()
+
+    # Signal 1: Institutional Name
+    if "reserve bank of india" in text_lower:
+        signals.add("institution")
+
+    # Signal 2: Content Type
+    if "rbi circular" in text_lower:
+        signals.add("content_type")
+
+    # Signal 3: Official URL
+    if "rbi.org.in" in text_lower:
+        signals.add("url")
+
+    # Signal 4: Regex Pattern (RBI/YYYY-YY/)
+    if re.search(r"RBI/\d{4}-\d{2}/", text):
+        signals.add("rbi_reference")
+
+    # Signal 5: Official Circular Reference Structure
+    if re.search(r"Ref\.No\.|Circular No\.|Notification No\.", text, re.I):
+        signals.add("circular_reference")
+
+    return signals
+
+
+def early_validate_pdf(pdf_path: str, max_pages: int = EARLY_VALIDATION_PAGES):
+    """
+    Incremental domain validation on PyMuPDF text only (no table parsing), run before full extraction.
+    Reads page by page and stops as soon as the signal threshold is reached, or after max_pages
+    without reaching it. Returns (passed, signals, pages_read).
+    """
+    found = set()
+    with fitz.open(pdf_path) as doc:
+        limit = min(len(doc), max_pages)
+        for page_num in range(limit):
+            found |= rbi_signals(doc[page_num].get_text())
+            if len(found) >= RBI_SIGNAL_THRESHOLD:
+                return True, found, page_num + 1
+    return False, found, limit
+
+
+def scan_text_layer(pdf_path: str):
+    """
+    One text-only PyMuPDF pass (no table parsing, no page text kept): the normalized-text
+    hash for dedupe, the span statistics boilerplate stripping needs before pages are
+    streamed, and per-page hashes for incremental re-ingestion.
+    Returns (text_hash, span_counter, page_hashes).
+    """
+    counter = SpanCounter()
+    page_hashes = []
+
+    def page_texts():
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                text = page.get_text()
+                counter.add_page(text)
+                page_hashes.append(compute_page_hash(text))
+                yield text
+
+    return compute_text_hash(page_texts()), counter, page_hashes
+
+
+def discard_interrupted_upload(payload: dict, progress: dict):
+    """
+    Recovery hook for upload jobs whose worker died: removes the half-indexed documents row and
+    stored PDF of the interrupted run, so the rerun is not reported as a duplicate of them.
+    """
+    supabase = get_supabase()
+    if progress.get("document_id"):
+        supabase.table("documents").delete().eq("id", progress["document_id"]).execute()
+        invalidate_document_stats()
+        print(f"INFO: Removed document {progress['document_id']} left by an interrupted upload.")
+    if progress.get("storage_key"):
+        supabase.storage.from_(BUCKET_NAME).remove([progress["storage_key"]])
+
+
+async def run_upload_pipeline(payload: dict, progress):
+    """
+    Job handler for queued uploads: extraction, domain validation, storage upload,
+    document insert, chunk embedding and table storage.
+    payload: {spool_path, filename, title, category, sha256, file_size, keep_source, notify}
+    keep_source leaves the PDF in place (offline backfill reads archive files directly);
+    notify=False skips the "New circular uploaded" notification (archive backfills report once at the end).
+    The PDF is never loaded into memory as a whole: parsers and the storage upload read the spooled file.
+    """
+    spool_path = payload["spool_path"]
+    filename = payload["filename"]
+    title = payload["title"]
+    category = payload.get("category", "General")
+
+    try:
+        # 2.5 Duplicate Check (raw bytes hash) before any extraction
+        content_hash = payload.get("sha256")
+        existing = await asyncio.to_thread(find_duplicate_document, content_hash=content_hash)
+
+        # 2.6 Validate RBI Domain Policy on the leading pages' text, before any full-document pass
+        if not existing:
+            passed, signals, pages_read = await asyncio.to_thread(early_validate_pdf, spool_path)
+            print(f"🕵️ Domain Security Audit: Found {len(signals)} validation signals in the first {pages_read} page(s).")
+            if not passed:
+                print(f"ERROR: STRONG Domain Validation Failed: Document '{filename}' rejected.")
+                raise DomainValidationFailed("Only authentic official RBI circular documents are allowed.")
+            print("SUCCESS: STRONG Domain Validation Passed.")
+
+        # 2.7 Duplicate Check (normalized-text hash); the same pass collects boilerplate span statistics
+        text_hash = None
+        span_counter = None
+        page_hashes = []
+        if not existing:
+            text_hash, span_counter, page_hashes = await asyncio.to_thread(scan_text_layer, spool_path)
+            if text_hash:  # None for a PDF without a text layer
+                existing = await asyncio.to_thread(find_duplicate_document, text_hash=text_hash)
+        if existing:
+            print(f"INFO: Skipping ingestion, '{filename}' duplicates document ID {existing['id']}.")
+            return {"document": existing, "duplicate": True}
+
+        total_pages = await asyncio.to_thread(count_pages, spool_path)
+        progress.update(total_pages=total_pages, pages_extracted=0)
+
+        # 4. Generate Unique Filename & Path
+        file_extension = os.path.splitext(filename)[1] or ".pdf"
+        unique_filename = f"{uuid.uuid4()}{file_extension}"
+        file_size_kb = round(payload.get("file_size", os.path.getsize(spool_path)) / 1024, 2)
+
+        supabase = get_supabase()
+
+        # 5. Upload to Supabase Storage (streamed from the spooled file)
+        print("🔹 Uploading to Supabase Storage...")
+        with open(spool_path, "rb") as pdf_file:
+            await asyncio.to_thread(
+                supabase.storage.from_(BUCKET_NAME).upload,
+                path=unique_filename,
+                file=pdf_file,
+                file_options={"content-type": "application/pdf"}
+            )
+        print("SUCCESS: File uploaded to Storage.")
+        # Persisted right away: if this worker dies, recovery removes what the run created
+        progress.update(storage_key=unique_filename)
+        progress.flush()
+
+        # 6. Get Public URL
+        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(unique_filename)
+
+        # 7. Insert into 'documents' table
+        row_data = {
+            "filename": filename,
+            "file_path": public_url,
+            "upload_date": datetime.utcnow().isoformat(),
+            "category": category,
+            "title": title,
+            "total_pages": total_pages,
+            "file_size": file_size_kb,
+            "content_hash": content_hash,
+            "text_hash": text_hash
+        }
+
+        print("🔹 Inserting into 'documents' table...")
+        try:
+            data = supabase.table("documents").insert(row_data).execute()
+        except Exception as insert_error:
+            if is_duplicate_key_error(insert_error):
+                # Same file committed concurrently by another job: drop our storage copy and reuse it
+                existing = await asyncio.to_thread(find_duplicate_document, content_hash=content_hash)
+                supabase.storage.from_(BUCKET_NAME).remove([unique_filename])
+                if not existing:
+                    raise JobFailed(f"Document could not be stored, please retry the upload: {insert_error}")
+                return {"document": existing, "duplicate": True}
+            if is_missing_column_error(insert_error):
+                print(f"⚠️ Metadata columns missing in Supabase. Falling back to basic insert. Error: {insert_error}")
+                # Fallback: Remove metadata fields and try again
+                basic_row_data = {
+                    "filename": filename,
+                    "file_path": public_url,
+                    "upload_date": datetime.utcnow().isoformat(),
+                    "category": category,
+                    "title": title
+                }
+                data = supabase.table("documents").insert(basic_row_data).execute()
+            else:
+                raise insert_error
+
+        document_id = None
+        if hasattr(data, 'data') and len(data.data) > 0:
+            document_id = data.data[0]['id']
+            progress.update(document_id=document_id)
+            progress.flush()
+            invalidate_document_stats()
+            print(f"SUCCESS: Document inserted successfully. ID: {document_id}")
+        else:
+            print("ERROR: Document ID not returned from Supabase.")
+
+        # 8. Stream pages: extract -> strip boilerplate -> chunk -> embed -> write (tables alongside)
+        if document_id:
+            print(f"🔹 Streaming {total_pages} pages into the index for document_id: {document_id}")
+            boilerplate_filter = BoilerplateFilter(span_counter.repeated(), load_corpus_boilerplate())
+            try:
+                page_batches = iter_pdf_pages(spool_path, filename, content_hash, total_pages)
+                await stream_pages_to_index(document_id, page_batches, boilerplate_filter, progress)
+            except Exception as e:
+                # Never leave a half-indexed document behind: roll back so a re-upload starts clean
+                print(f"ERROR: Indexing failed for document {document_id}, rolling back: {e}")
+                supabase.table("documents").delete().eq("id", document_id).execute()
+                invalidate_document_stats()
+                supabase.storage.from_(BUCKET_NAME).remove([unique_filename])
+                raise JobFailed(f"Indexing failed, please retry the upload: {e}")
+            boilerplate_filter.report()
+        else:
+            print("⚠️ Skipping chunking and table storage: Missing document_id")
+
+        # 8.5 Update corpus boilerplate index with this document's header/footer spans,
+        #     and keep page hashes so an amended version re-embeds only what changed
+        if document_id:
+            record_document_spans(span_counter.zone_spans)
+            record_page_hashes(document_id, page_hashes)
+
+        # 9. Create Notification (archive backfills pass notify=False and report once at the end)
+        if payload.get("notify", True):
+            try:
+                print("🔹 Creating notification...")
+                create_notification(f"New circular uploaded: {title}", "upload")
+                print("SUCCESS: Notification created.")
+            except Exception as notif_error:
+                print(f"WARNING: Failed to create notification (non-critical): {notif_error}")
+
+        print("🎉 Upload Process Complete.")
+
+        if hasattr(data, 'data') and len(data.data) > 0:
+            return {"document": data.data[0]}
+        return {"data": row_data}
+    finally:
+        if not payload.get("keep_source") and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+
+async def embed_page_chunks(document_id: int, pages_content: list, progress=None, start_index: int = 0):
+    """
+    Chunks the text page-by-page and generates embeddings, numbering chunks from start_index.
+    Returns (chunk_rows, next_chunk_index); chunks whose embedding failed are left out.
+    """
+    # Prepare all chunks with metadata first
+    all_chunks_data = []
+    global_chunk_idx = start_index
+    for page_data in pages_content:
+        text = page_data["text"]
+        page_num = page_data["page_number"]
+        chunks = chunk_text(text)
+        for chunk in chunks:
+            all_chunks_data.append({
+                "text": chunk,
+                "page_number": page_num,
+                "chunk_index": global_chunk_idx
+            })
+            global_chunk_idx += 1
+
+    if progress:
+        progress.increment("chunks_total", len(all_chunks_data))
+
+    # Process embeddings in parallel
+    semaphore = asyncio.Semaphore(5)
+
+    async def process_single_chunk(chunk_item):
+         async with semaphore:
+            try:
+                # Run synchronous generate_embedding in a thread
+                embedding = await asyncio.to_thread(generate_embedding, chunk_item["text"])
+                if progress:
+                    progress.increment("chunks_embedded")
+                return {
+                    "document_id": document_id,
+                    "content": chunk_item["text"],
+                    "embedding": embedding,
+                    "page_number": chunk_item["page_number"],
+                    "chunk_index": chunk_item["chunk_index"]
+                }
+            except Exception as e:
+                print(f"❌ Embedding generation failed for chunk {chunk_item['chunk_index']}: {e}")
+                return None
+
+    # Gather all embeddings
+    tasks = [process_single_chunk(c) for c in all_chunks_data]
+    results = await asyncio.gather(*tasks)
+
+    # Filter out failed ones
+    return [r for r in results if r is not None], global_chunk_idx
+
+
+async def process_pdf_and_store_chunks(document_id: int, pages_content: list, progress=None, start_index: int = 0) -> int:
+    """
+    Chunks the text page-by-page, generates embeddings, and stores them in Supabase
+    with core metadata (document_id, page_number, chunk_index).
+    chunk_index numbering starts at start_index; returns the next free index (for streamed batches).
+    """
+    next_chunk_index = start_index
+    try:
+        print(f"🔹 Processing chunks for document {document_id} across {len(pages_content)} pages...")
+        chunk_rows, next_chunk_index = await embed_page_chunks(document_id, pages_content, progress, start_index)
+
+        if not chunk_rows:
+            print("⚠️ No valid chunks generated.")
+            return next_chunk_index
+
+        print(f"✅ Generated {len(chunk_rows)} embeddings. Inserting into DB...")
+
+        # Idempotent bulk upsert (byte-sized batches, bounded parallelism, retries)
+        await bulk_upsert("document_chunks", chunk_rows, CHUNK_CONFLICT_KEY, progress)
+        print("SUCCESS: All chunks inserted successfully.")
+
+    except BulkWriteError:
+        raise
+    except Exception as e:
+        print(f"❌ process_pdf_and_store_chunks failed: {e}")
+    return next_chunk_index
+
+
+async def stream_pages_to_index(document_id: int, page_batches, boilerplate_filter, progress=None):
+    """
+    Consumes page batches from an async iterator (iter_pdf_pages) in page order: each batch is
+    stripped of boilerplate, chunked, embedded and written with its tables before the next one.
+    A bounded queue sits between extraction and this stage, so extraction of later pages overlaps
+    embedding of earlier ones while only a few batches are ever held in memory.
+    """
+    queue = asyncio.Queue(maxsize=max(1, STREAM_QUEUE_BATCHES))
+    done = object()
+
+    async def produce():
+        try:
+            async for batch in page_batches:
+                await queue.put(batch)
+            await queue.put(done)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(produce())
+    next_chunk_index = 0
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is done:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            if progress:
+                progress.increment("pages_extracted", len(batch))
+            for page in batch:
+                boilerplate_filter.strip(page)
+            next_chunk_index, _ = await asyncio.gather(
+                process_pdf_and_store_chunks(document_id, batch, progress, next_chunk_index),
+                store_extracted_tables(document_id, batch, progress)
+            )
+        await producer
+    finally:
+        # Cancelling the producer closes the page iterator, which cancels extraction still in flight
+        producer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await producer
+    return next_chunk_index
+
+def build_table_rows(document_id: int, pages_content: list) -> list:
+    """document_tables rows for the structured JSON tables of the given pages."""
+    tables_to_insert = []
+    for page in pages_content:
+        page_num = page['page_number']
+        tables = page.get('tables', [])
+
+        for idx, table_data in enumerate(tables):
+            # Ensure table_data is valid JSON serializable
+            if not table_data: continue
+
+            tables_to_insert.append({
+                "document_id": document_id,
+                "page_number": page_num,
+                "table_index": idx,
+                "table_data": table_data, # Already structured JSON
+                "summary": f"Table {idx+1} extracted from Page {page_num}" # Placeholder for future AI summary
+            })
+    return tables_to_insert
+
+
+async def store_extracted_tables(document_id: int, pages_content: list, progress=None):
+    """
+    Extracts structured JSON tables from pages_content and stores them in the document_tables database.
+    This runs largely in parallel with text chunking.
+    """
+    try:
+        print(f"🔹 [Phase 2] Analyzing {len(pages_content)} pages for structured tables...")
+        tables_to_insert = build_table_rows(document_id, pages_content)
+
+        if not tables_to_insert:
+            print("ℹ️ No structured tables found to store.")
+            return
+
+        print(f"🔹 [Phase 2] Storing {len(tables_to_insert)} extracted tables into DB...")
+
+        # Idempotent bulk upsert (byte-sized batches, bounded parallelism, retries)
+        await bulk_upsert("document_tables", tables_to_insert, TABLE_CONFLICT_KEY, progress)
+        print("SUCCESS: [Phase 2] All structured tables stored successfully.")
+
+    except BulkWriteError:
+        raise
+    except Exception as e:
+        print(f"❌ store_extracted_tables failed: {e}")
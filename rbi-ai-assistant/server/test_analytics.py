@@ -0,0 +1,66 @@
+import os
+import contextlib
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.analytics as analytics
+from scripts.testing import stubbed_supabase
+from routes.documents import delete_documents, DeleteDocumentsRequest
+
+DOCUMENTS = [
+    {"id": 1, "category": "Circular", "total_pages": 4, "file_path": "https://x/rbi-documents/a.pdf"},
+    {"id": 2, "category": "Master Direction", "total_pages": 40, "file_path": "https://x/rbi-documents/b.pdf"},
+    {"id": 3, "category": "Circular", "total_pages": 6, "file_path": "https://x/rbi-documents/c.pdf"},
+    {"id": 4, "category": None, "total_pages": None, "file_path": "https://x/rbi-documents/d.pdf"},
+]
+
+def document_category_stats(stub, payload):
+    stats = {}
+    for doc in stub.rows("documents"):
+        entry = stats.setdefault(doc.get("category") or "General", {"documents": 0, "pages": 0})
+        entry["documents"] += 1
+        entry["pages"] += doc.get("total_pages") or 0
+    return [{"category": name, **counts} for name, counts in sorted(stats.items(), key=lambda i: (-i[1]["documents"], i[0]))]
+
+@contextlib.contextmanager
+def seeded_stub(with_rpc=True):
+    rpc_handlers = {"document_category_stats": document_category_stats} if with_rpc else {}
+    analytics.invalidate_document_stats()
+    try:
+        with stubbed_supabase(**rpc_handlers) as stub:
+            stub.tables["documents"] = [dict(doc) for doc in DOCUMENTS]
+            yield stub
+    finally:
+        analytics.invalidate_document_stats()
+
+def test_stats_are_aggregated_by_the_database_and_cached():
+    with seeded_stub() as stub:
+        stats = analytics.get_document_stats()
+        assert stats["total_documents"] == 4 and stats["total_pages"] == 50
+        assert [(c["name"], c["count"]) for c in stats["categories"]] == [("Circular", 2), ("General", 1), ("Master Direction", 1)]
+        assert stats["categories"][0]["color"] == analytics.CATEGORY_COLORS[0]
+        # One RPC call, no document rows read
+        assert [path for _, path, _ in stub.requests] == ["/rest/v1/rpc/document_category_stats"]
+
+        # Further polls are served from memory
+        assert analytics.get_document_stats() == stats
+        assert len(stub.requests) == 1
+
+        # Deleting documents invalidates the cache
+        delete_documents(DeleteDocumentsRequest(ids=[2]))
+        stub.requests.clear()
+        stats = analytics.get_document_stats()
+        assert stats["total_documents"] == 3 and stats["total_pages"] == 10
+        assert [path for _, path, _ in stub.requests] == ["/rest/v1/rpc/document_category_stats"]
+
+def test_stats_fall_back_to_projected_rows_without_the_rpc():
+    with seeded_stub(with_rpc=False) as stub:
+        stats = analytics.get_document_stats()
+        assert stats["total_documents"] == 4 and stats["total_pages"] == 50
+        assert [(c["name"], c["count"]) for c in stats["categories"]] == [("Circular", 2), ("General", 1), ("Master Direction", 1)]
+        assert stub.requests[-1][1] == "/rest/v1/documents"
+
+if __name__ == "__main__":
+    test_stats_are_aggregated_by_the_database_and_cached()
+    test_stats_fall_back_to_projected_rows_without_the_rpc()
+    print("✅ Analytics tests passed.")
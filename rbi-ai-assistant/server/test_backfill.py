@@ -0,0 +1,78 @@
+import os
+import json
+import asyncio
+import tempfile
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import scripts.backfill_archive as backfill
+import services.upload_pipeline as upload_pipeline
+from scripts.testing import patched, offline_pipeline, stubbed_supabase, write_pdf
+
+def test_load_entries_from_directory_and_manifests():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "2019"))
+        for name in ("2019/a.pdf", "b.PDF", "notes.txt"):
+            open(os.path.join(tmp, name), "wb").close()
+        entries = backfill.load_entries(tmp, "Archive")
+        assert [os.path.basename(e["path"]) for e in entries] == ["a.pdf", "b.PDF"]
+        assert entries[0]["title"] == "a" and entries[0]["category"] == "Archive"
+
+        with open(os.path.join(tmp, "manifest.csv"), "w") as f:
+            f.write("path,title,category\nb.PDF,Master Direction,KYC\n")
+        entries = backfill.load_entries(os.path.join(tmp, "manifest.csv"), "General")
+        assert entries == [{"path": os.path.join(tmp, "b.PDF"), "title": "Master Direction", "category": "KYC"}]
+
+        with open(os.path.join(tmp, "manifest.jsonl"), "w") as f:
+            f.write(json.dumps({"path": "2019/a.pdf"}) + "\n")
+        entries = backfill.load_entries(os.path.join(tmp, "manifest.jsonl"), "General")
+        assert entries[0]["path"] == os.path.join(tmp, "2019", "a.pdf")
+
+def test_resume_skips_finished_entries_and_retries_failures():
+    calls = []
+    attempts = {}
+
+    async def fake_ingest(entry, notify=False):
+        calls.append(os.path.basename(entry["path"]))
+        attempts[entry["title"]] = attempts.get(entry["title"], 0) + 1
+        status = "failed" if entry["title"] == "c" and attempts["c"] == 1 else "ingested"
+        return {"status": status, "pages": 10, "chunks": 20}
+
+    with patched(backfill, ingest_entry=fake_ingest):
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint_path = os.path.join(tmp, "checkpoint.json")
+            entries = [{"path": os.path.join(tmp, f"{n}.pdf"), "title": n, "category": "General"} for n in "abc"]
+
+            totals = asyncio.run(backfill.run_backfill(entries, checkpoint_path, workers=2))
+            assert totals["ingested"] == 2 and totals["failed"] == 1 and totals["pages"] == 20
+            assert backfill.load_checkpoint(checkpoint_path)[entries[2]["path"]]["status"] == "failed"
+
+            # Second run only retries the failed document
+            calls.clear()
+            totals = asyncio.run(backfill.run_backfill(entries, checkpoint_path, workers=2))
+            assert calls == ["c.pdf"]
+            assert totals["ingested"] == 1
+            assert all(r["status"] == "ingested" for r in backfill.load_checkpoint(checkpoint_path).values())
+
+def test_archive_documents_raise_no_notifications_and_rejections_are_final():
+    with offline_pipeline(upload_pipeline), \
+            stubbed_supabase(record_boilerplate_spans=lambda stub, payload: None) as stub:
+        circular = write_pdf([["Reserve Bank of India", "RBI/2019-20/45 Banks shall report exposures."]])
+        record = asyncio.run(backfill.ingest_entry({"path": circular, "title": "Exposures", "category": "Archive"}))
+        assert record["status"] == "ingested" and record["document_id"] == stub.rows("documents")[0]["id"]
+        assert stub.rows("notifications") == []
+
+        # The message is irrelevant: the exception type marks a rejection
+        foreign = write_pdf(["Quarterly newsletter of a housing society"])
+        record = asyncio.run(backfill.ingest_entry({"path": foreign, "title": "Newsletter", "category": "Archive"}))
+        assert record["status"] == "rejected" and record["status"] in backfill.FINAL_STATUSES
+
+        backfill.notify_archive_summary("the archive backfill", {"ingested": 1})
+        backfill.notify_archive_summary("the archive backfill", {"ingested": 0})
+        assert [n["message"] for n in stub.rows("notifications")] == ["1 archived circular(s) added from the archive backfill"]
+
+if __name__ == "__main__":
+    test_load_entries_from_directory_and_manifests()
+    test_resume_skips_finished_entries_and_retries_failures()
+    test_archive_documents_raise_no_notifications_and_rejections_are_final()
+    print("All backfill tests passed.")
@@ -0,0 +1,86 @@
+import os
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+from services.boilerplate import strip_boilerplate, span_hash, collect_zone_spans
+
+def make_pages():
+    pages = []
+    for n in range(1, 6):
+        pages.append({"page_number": n, "text": "\n".join([
+            "RBI/2024-25/12 DOR.CRE.REC.5",
+            f"Clause {n}: banks shall maintain a ratio of {n * 3} percent on this page.",
+            "### [Tabular Data extracted]",
+            "| Central Office, Mumbai | 400001 |",
+            f"Page {n} of 5",
+        ])})
+    return pages
+
+def test_running_headers_kept_once_and_tables_untouched():
+    pages = make_pages()
+    stats = strip_boilerplate(pages)
+    assert pages[0]["text"].startswith("RBI/2024-25/12")
+    assert "Page 1 of 5" in pages[0]["text"]
+    for page in pages[1:]:
+        assert "RBI/2024-25/12" not in page["text"]
+        assert "Page" not in page["text"].split("\n")[-1]
+        assert "| Central Office, Mumbai | 400001 |" in page["text"]
+        assert "banks shall maintain" in page["text"]
+    assert stats["lines_removed"] == 8
+
+def letter(body):
+    return "\n".join(["RBI/2024-25/12", "Reserve Bank of India", "Central Office, Mumbai"] + body +
+                     ["Yours faithfully,", "(Chief General Manager)", "Encl: as above"])
+
+def test_corpus_spans_removed_from_header_and_footer_zones():
+    body = ["Dear Sir / Madam,", "Please refer to the circular cited above.",
+            "Master Direction - Know Your Customer", "Applicability", "Real content about KYC norms here.", "Banks shall update records periodically.",
+            "Applicability of these directions is extended to NBFCs.", "Further clauses follow below."]
+    pages = [{"page_number": 1, "text": letter(body)}]
+    corpus = {span_hash(line) for line in ("Reserve Bank of India", "Yours faithfully,", "(Chief General Manager)",
+                                           "Master Direction - Know Your Customer", "Applicability")}
+    strip_boilerplate(pages, corpus)
+    lines = pages[0]["text"].split("\n")
+    assert "Reserve Bank of India" not in lines and "Yours faithfully," not in lines
+    # Titles and headings learned from other (short) circulars stay in the body
+    assert "Master Direction - Know Your Customer" in lines and "Applicability" in lines
+
+def test_short_numeric_body_lines_are_not_merged():
+    pages = [{"page_number": n, "text": "\n".join(["RBI/2024-25/12 DOR.CRE.REC.5", "Limit per borrower",
+                                                   f"Rs. {n * 5} lakh", "Applies to all banks.", f"Page {n} of 4"])}
+             for n in range(1, 5)]
+    strip_boilerplate(pages)
+    for n, page in enumerate(pages, start=1):
+        assert f"Rs. {n * 5} lakh" in page["text"]
+    assert all("Page" not in page["text"] for page in pages[1:])
+
+def test_zone_spans_fold_digits():
+    spans = collect_zone_spans(["Page 3 of 12\nBody of the circular\nClosing paragraph text",
+                                "Page 4 of 12\nBody of the circular\nClosing paragraph text"])
+    assert "Page 3 of 12" in spans.values() and "Page 4 of 12" not in spans.values()
+    assert "Body of the circular" not in spans.values()
+
+def test_reference_numbers_and_dates_are_not_folded():
+    assert span_hash("Page 3 of 12") == span_hash("Page 4 of 12") == span_hash("page 10 of 12")
+    for a, b in (("RBI/2024-25/12", "RBI/2023-24/98"), ("April 1, 2024", "April 17, 2023"),
+                 ("Notification No. 123", "Notification No. 456")):
+        assert span_hash(a) != span_hash(b)
+
+    # Header spans of earlier circulars, as the corpus index would hold them
+    earlier = [f"RBI/2024-25/{n}\nApril {n}, 2024\nReserve Bank of India\nBody text of circular {n}.\n"
+               f"Further instructions follow.\nThey apply at once.\nBanks shall comply.\nYours faithfully,\nPage 1 of 1" for n in range(1, 6)]
+    corpus = set(collect_zone_spans(earlier))
+    pages = [{"page_number": 1, "text": "RBI/2024-25/12\nApril 17, 2024\nReserve Bank of India\nBody text of circular 12.\n"
+                                        "Further instructions follow.\nThey apply at once.\nBanks shall comply.\nYours faithfully,\nPage 1 of 1"}]
+    strip_boilerplate(pages, corpus)
+    lines = pages[0]["text"].split("\n")
+    assert lines[:2] == ["RBI/2024-25/12", "April 17, 2024"]
+    assert "Reserve Bank of India" not in lines and "Page 1 of 1" not in lines
+
+if __name__ == "__main__":
+    test_running_headers_kept_once_and_tables_untouched()
+    test_corpus_spans_removed_from_header_and_footer_zones()
+    test_short_numeric_body_lines_are_not_merged()
+    test_zone_spans_fold_digits()
+    test_reference_numbers_and_dates_are_not_folded()
+    print("✅ Boilerplate tests passed.")
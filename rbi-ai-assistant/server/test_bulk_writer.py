@@ -0,0 +1,50 @@
+import os
+import asyncio
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.bulk_writer as bulk_writer
+from supabase import create_client
+from scripts.postgrest_stub import PostgrestStub
+from scripts.testing import patched
+from services.bulk_writer import bulk_upsert, plan_batches, BulkWriteError, CHUNK_CONFLICT_KEY
+
+def chunk_rows(count, document_id=1):
+    return [{"document_id": document_id, "chunk_index": i, "content": f"chunk {i}", "embedding": [0.1] * 384}
+            for i in range(count)]
+
+def test_plan_batches_respects_byte_budget():
+    rows = chunk_rows(50)
+    batches = plan_batches(rows, max_bytes=20_000, max_rows=500)
+    assert sum(len(b) for b in batches) == 50
+    assert len(batches) > 1
+    assert all(len(str(b)) < 40_000 for b in batches)
+
+def test_retries_are_idempotent_against_stub():
+    with patched(bulk_writer, BULK_BACKOFF_SECONDS=0.01):
+        stub = PostgrestStub().start()
+        try:
+            client = create_client(stub.url, "test-key")
+            rows = chunk_rows(120)
+            stub.fail_next(2)
+            written = asyncio.run(bulk_upsert("document_chunks", rows, CHUNK_CONFLICT_KEY, client=client, concurrency=3))
+            assert written == 120
+            assert len(stub.rows("document_chunks")) == 120
+
+            # Replaying the whole write (e.g. a re-run job) must not duplicate rows
+            asyncio.run(bulk_upsert("document_chunks", rows, CHUNK_CONFLICT_KEY, client=client))
+            assert len(stub.rows("document_chunks")) == 120
+
+            stub.fail_next(100)
+            try:
+                asyncio.run(bulk_upsert("document_chunks", rows[:5], CHUNK_CONFLICT_KEY, client=client, max_retries=1))
+                assert False, "expected BulkWriteError"
+            except BulkWriteError:
+                pass
+        finally:
+            stub.stop()
+
+if __name__ == "__main__":
+    test_plan_batches_respects_byte_budget()
+    test_retries_are_idempotent_against_stub()
+    print("✅ Bulk writer tests passed.")
@@ -0,0 +1,45 @@
+from services.chunking import chunk_text, count_tokens, TABLE_MARKER
+
+CIRCULAR = """RESERVE BANK OF INDIA
+RBI/2024-25/12
+1. In terms of para 2 of the Master Direction, banks are advised to review
+their loan limits. The limits are given below.
+2. The revised limits shall come into force with immediate effect. Banks
+shall ensure compliance. Rs. 25 lakh is the cap for Tier 1 centres.
+
+### [Tabular Data extracted]
+| Category | Loan limit |
+| --- | --- |
+| Tier 1 | 25 |
+| Tier 2 | 35 |
+| Tier 3 | 45 |
+
+Yours faithfully,
+(Chief General Manager)
+"""
+
+def test_chunks_respect_token_budget_and_sentences():
+    chunks = chunk_text(CIRCULAR, max_tokens=40, overlap_tokens=10)
+    for chunk in chunks:
+        if TABLE_MARKER not in chunk:
+            assert count_tokens(chunk) <= 40
+            assert chunk.rstrip().endswith((".", ")", "25"))  # never cut mid-sentence
+    assert any(c.startswith("2. The revised limits") or "\n\n2. The revised limits" in c for c in chunks)
+    assert not any(c.rstrip().endswith("Rs.") for c in chunks)
+
+def test_tables_stay_whole():
+    chunks = chunk_text(CIRCULAR, max_tokens=20, overlap_tokens=0)
+    table_chunks = [c for c in chunks if "| Tier" in c]
+    assert len(table_chunks) == 1
+    assert table_chunks[0].startswith(TABLE_MARKER)
+    assert "| Tier 3 | 45 |" in table_chunks[0]
+
+def test_empty_text():
+    assert chunk_text("") == []
+    assert chunk_text("   \n  ") == []
+
+if __name__ == "__main__":
+    test_chunks_respect_token_budget_and_sentences()
+    test_tables_stay_whole()
+    test_empty_text()
+    print("✅ Chunking tests passed.")
@@ -0,0 +1,85 @@
+import os
+import json
+import base64
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from scripts.testing import stubbed_supabase
+from routes import documents
+
+def seed_documents(stub, count):
+    categories = ["Compliance", "Lending", "Forex"]
+    # Pairs of documents share an upload_date so the id tie-break is exercised
+    stub.tables["documents"] = [
+        {"id": n, "title": f"Circular {n}", "filename": f"c{n}.pdf", "category": categories[n % 3],
+         "upload_date": f"2024-{(n + 1) // 2 % 12 + 1:02d}-{(n + 1) // 2 % 28 + 1:02d}T10:00:00+00:00",
+         "file_path": f"https://x/rbi-documents/c{n}.pdf", "total_pages": n, "file_size": 100 + n,
+         "content_hash": f"hash{n}", "text_hash": f"text{n}"}
+        for n in range(1, count + 1)
+    ]
+
+def newest_first(rows):
+    return sorted(rows, key=lambda r: (r["upload_date"], r["id"]), reverse=True)
+
+def with_stub(test):
+    def run():
+        app = FastAPI()
+        app.include_router(documents.router, prefix="/api")
+        with stubbed_supabase() as stub:
+            test(stub, TestClient(app))
+    run.__name__ = test.__name__
+    return run
+
+@with_stub
+def test_keyset_pages_cover_every_document_once(stub, client):
+    seed_documents(stub, 23)
+    seen, cursor, pages = [], None, 0
+    while True:
+        response = client.get("/api/circulars", params={"limit": 5, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        assert isinstance(page, list) and len(page) <= 5
+        seen += page
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == 5
+    assert [r["id"] for r in seen] == [r["id"] for r in newest_first(stub.rows("documents"))]
+    # Default projection leaves out hashes the list view never renders
+    assert "content_hash" not in seen[0] and set(seen[0]) == set(documents.CIRCULAR_FIELDS)
+
+@with_stub
+def test_filters_and_projection(stub, client):
+    seed_documents(stub, 30)
+    response = client.get("/api/circulars", params={"category": "Lending", "since": "2024-03-01", "until": "2024-08-01",
+                                                     "fields": "title,category"})
+    rows = response.json()
+    expected = [r for r in newest_first(stub.rows("documents"))
+                if r["category"] == "Lending" and "2024-03-01" <= r["upload_date"] < "2024-08-01"]
+    assert rows and [r["id"] for r in rows] == [r["id"] for r in expected]
+    assert set(rows[0]) == {"id", "upload_date", "title", "category"}
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get("/api/circulars", params={"fields": "title,embedding"}).status_code == 400
+    assert client.get("/api/circulars", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/circulars", params={"limit": 0}).status_code == 422
+
+@with_stub
+def test_crafted_cursors_are_rejected(stub, client):
+    seed_documents(stub, 3)
+    stub.requests.clear()
+    for crafted in (['2024-01-01",id.gt.0,title.eq."x', 3], ["2024-01-01T10:00:00+00:00", "3),or(id.gt.0"],
+                    ["2024-01-01T10:00:00+00:00", 3.5], ["2024-01-01T10:00:00+00:00", True], [20240101, 3], {"id": 3}):
+        cursor = base64.urlsafe_b64encode(json.dumps(crafted).encode("utf-8")).decode("ascii")
+        assert client.get("/api/circulars", params={"cursor": cursor}).status_code == 400
+    # Rejected before any query reaches the database
+    assert stub.requests == []
+
+if __name__ == "__main__":
+    test_keyset_pages_cover_every_document_once()
+    test_filters_and_projection()
+    test_crafted_cursors_are_rejected()
+    print("✅ Circulars pagination tests passed.")
@@ -0,0 +1,116 @@
+import os
+import time
+import asyncio
+import tempfile
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import scripts.crawl_rbi_archive as crawl
+from scripts.rbi_fixture_server import RBIFixtureServer
+from scripts.testing import pdf_bytes
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "rbi", "archive")
+PDF_PATHS = ["/rdocs/notification/PDFs/NT100KYC29012024.PDF", "/rdocs/notification/PDFs/NT101AIF05012024.PDF",
+             "/rdocs/notification/PDFs/NT102FPC15012024.PDF", "/rdocs/notification/PDFs/NT150MFI12022024.PDF"]
+
+def circular_pdf(name):
+    return pdf_bytes([f"Reserve Bank of India {name}"])
+
+def test_month_range_and_listing_parsing():
+    assert crawl.month_range("2023-11", "2024-02") == [(2023, 11), (2023, 12), (2024, 1), (2024, 2)]
+    page_url = "http://rbi.test/Scripts/NotificationUser.aspx?Year=2024&Month=1"
+    with open(os.path.join(ARCHIVE_DIR, "notifications_2024_01_p1.html"), encoding="utf-8") as f:
+        parsed = crawl.parse_listing_page(f.read(), page_url)
+    assert parsed["documents"] == [{"url": "http://rbi.test/rdocs/notification/PDFs/NT102FPC15012024.PDF",
+                                    "title": "Fair Practices Code for Lenders - Charging of Interest"}]
+    assert [d["url"] for d in parsed["details"]] == ["http://rbi.test/Scripts/NotificationUser.aspx?Id=12600&Mode=0"]
+    assert parsed["next"] == "http://rbi.test/Scripts/NotificationUser.aspx?Year=2024&Month=1&Page=2"
+    with open(os.path.join(ARCHIVE_DIR, "notifications_2024_01_p2.html"), encoding="utf-8") as f:
+        assert crawl.parse_listing_page(f.read(), page_url)["next"] is None
+
+def test_rate_limiter_pause_holds_back_sleeping_waiters():
+    async def scenario():
+        limiter = crawl.RateLimiter(0.1)
+        await limiter.wait()
+        start = asyncio.get_running_loop().time()
+        waiter = asyncio.ensure_future(limiter.wait())
+        await asyncio.sleep(0.02)
+        limiter.pause(0.3)  # the waiter is already sleeping towards the old deadline
+        await waiter
+        return asyncio.get_running_loop().time() - start
+
+    assert asyncio.run(scenario()) >= 0.3
+
+def test_crawl_is_polite_and_resumes_from_frontier():
+    fixture_server = RBIFixtureServer()
+    fixture_server.add_manifest(os.path.join(ARCHIVE_DIR, "routes.json"))
+    for path in PDF_PATHS:
+        fixture_server.add(path, circular_pdf(os.path.basename(path)))
+    fixture_server.start()
+    fixture_server.throttle_next(1, retry_after=0.3)
+    tmp = tempfile.mkdtemp()
+    frontier_path = os.path.join(tmp, "frontier.json")
+    ingested = []
+
+    async def fake_ingest(entry, notify=True):
+        assert not notify
+        with open(entry["path"], "rb") as f:
+            assert f.read(4) == b"%PDF"
+        ingested.append(entry["title"])
+        if entry["title"].startswith("Investments") and ingested.count(entry["title"]) == 1:
+            return {"title": entry["title"], "status": "failed", "error": "embedding service unavailable"}
+        return {"title": entry["title"], "status": "ingested", "document_id": len(ingested)}
+
+    # Start times as granted by the rate limiter (server-side arrival adds thread scheduling jitter)
+    granted = []
+    original_wait = crawl.RateLimiter.wait
+
+    async def recording_wait(limiter):
+        await original_wait(limiter)
+        granted.append(time.monotonic())
+
+    original_ingest = crawl.ingest_entry
+    crawl.ingest_entry = fake_ingest
+    crawl.RateLimiter.wait = recording_wait
+    try:
+        def make_crawler():
+            crawler = crawl.ArchiveCrawler(frontier_path, base_url=fixture_server.url, interval=0.05,
+                                           fetch_concurrency=2, workers=2, spool_dir=os.path.join(tmp, "spool"))
+            crawler.seed(["notifications"], [(2024, 1), (2024, 2)])
+            return crawler
+
+        totals = asyncio.run(make_crawler().run())
+        # 2 monthly seeds + page 2 of January + 3 notification pages; the repeated KYC link is crawled once
+        assert totals["pages"] == 6 and totals["pages_failed"] == 0
+        assert totals["ingested"] == 3 and totals["failed"] == 1
+        assert sorted(ingested)[0] == "Fair Practices Code for Lenders - Charging of Interest"
+        assert os.listdir(os.path.join(tmp, "spool")) == []
+
+        # Polite: the throttled request was retried after Retry-After, starts are spaced by the interval
+        times = fixture_server.request_times
+        paths = fixture_server.paths_requested()
+        assert len(times) == 6 + 4 + 1
+        retry = paths.index(paths[0], 1)
+        assert times[retry] - times[0] >= 0.29
+        assert all(t - times[0] >= 0.29 for t in times[2:])
+        assert len(granted) == len(times)
+        assert all(b - a >= 0.049 for a, b in zip(granted, granted[1:]))
+        assert all(b - a >= 0.025 for a, b in zip(times, times[1:]))
+
+        # Resume: only the failed document is fetched and ingested again
+        fixture_server.requests.clear()
+        totals = asyncio.run(make_crawler().run())
+        assert fixture_server.paths_requested() == ["/rdocs/notification/PDFs/NT101AIF05012024.PDF"]
+        assert totals["ingested"] == 1 and totals["pages"] == 0
+        frontier = crawl.load_checkpoint(frontier_path)
+        assert {d["status"] for d in frontier["documents"].values()} == {"ingested"}
+    finally:
+        crawl.ingest_entry = original_ingest
+        crawl.RateLimiter.wait = original_wait
+        fixture_server.stop()
+
+if __name__ == "__main__":
+    test_month_range_and_listing_parsing()
+    test_rate_limiter_pause_holds_back_sleeping_waiters()
+    test_crawl_is_polite_and_resumes_from_frontier()
+    print("✅ Archive crawler tests passed.")
@@ -0,0 +1,52 @@
+import os
+import fitz
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+from services.dedupe import normalize_text, compute_text_hash, compute_page_hash
+from scripts.testing import pdf_bytes
+
+def page_text(lines, page_number=1, page_count=3):
+    with fitz.open(stream=pdf_bytes([lines + [f"Page {page_number} of {page_count}"]]), filetype="pdf") as doc:
+        return doc[0].get_text()
+
+def test_text_hash_ignores_layout_and_case():
+    original = ["RESERVE BANK OF INDIA\nRBI/2024-25/12\n", "Master  Direction –\tKYC"]
+    reflowed = ["Reserve Bank of India RBI/2024-25/12", "", "master direction kyc"]
+    assert normalize_text(original[0]) == "reserve bank of india rbi 2024 25 12"
+    assert compute_text_hash(original) == compute_text_hash(reflowed)
+
+def test_text_hash_changes_with_content():
+    assert compute_text_hash(["Loan limit Rs 25 lakh"]) != compute_text_hash(["Loan limit Rs 35 lakh"])
+
+def test_text_hash_is_none_without_text():
+    assert compute_text_hash(["", "  \n\t", "–"]) is None
+    assert compute_text_hash([]) is None
+
+def test_page_hash_changes_when_only_a_figure_changes():
+    base = ["Loans to MSEs up to Rs. 25 lakh need no collateral.", "Limit", "25",
+            "The risk weight is reduced to 4.5% for these exposures."]
+    for i, amended_line in ((0, "Loans to MSEs up to Rs. 35 lakh need no collateral."), (2, "35"),
+                            (3, "The risk weight is reduced to 4.0% for these exposures.")):
+        amended = list(base)
+        amended[i] = amended_line
+        assert compute_page_hash(page_text(base)) != compute_page_hash(page_text(amended))
+
+def test_page_hash_ignores_layout_and_page_numbering():
+    lines = ["Loans to MSEs up to Rs. 25 lakh need no collateral.", "Limit", "25"]
+    reflowed = page_text(["Loans to MSEs up to Rs. 25 lakh", "need no collateral.", "Limit 25"], page_number=4, page_count=9)
+    assert compute_page_hash(page_text(lines)) == compute_page_hash(reflowed)
+
+def test_page_hash_is_none_without_text():
+    assert compute_page_hash("") is None
+    assert compute_page_hash(" \n Page 3 of 9\n") is None
+    assert compute_page_hash(page_text([])) is None
+
+if __name__ == "__main__":
+    test_text_hash_ignores_layout_and_case()
+    test_text_hash_changes_with_content()
+    test_text_hash_is_none_without_text()
+    test_page_hash_changes_when_only_a_figure_changes()
+    test_page_hash_ignores_layout_and_page_numbering()
+    test_page_hash_is_none_without_text()
+    print("✅ Dedupe tests passed.")
@@ -0,0 +1,47 @@
+import os
+import tempfile
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+from services.upload_pipeline import early_validate_pdf, rbi_signals
+from scripts.testing import write_pdf
+
+def build_pdf(path, first_page_text, filler_pages=40):
+    write_pdf([first_page_text] + [f"Annexure page {n}: general terms and conditions." for n in range(filler_pages)], path)
+
+def test_rbi_document_passes_on_first_page():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "circular.pdf")
+        build_pdf(path, "RBI/2024-25/12\nReserve Bank of India\nwww.rbi.org.in")
+        passed, signals, pages_read = early_validate_pdf(path)
+        assert passed
+        assert pages_read == 1
+        assert {"rbi_reference", "institution"} <= signals
+
+def test_foreign_document_rejected_after_leading_pages():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "brochure.pdf")
+        build_pdf(path, "Quarterly product brochure")
+        passed, signals, pages_read = early_validate_pdf(path, max_pages=5)
+        assert not passed
+        assert pages_read == 5
+        assert not signals
+
+def test_signals_accumulate_across_pages():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cover.pdf")
+        write_pdf(["Reserve Bank of India", "Circular No. 45"], path)
+        passed, _, pages_read = early_validate_pdf(path)
+        assert passed and pages_read == 2
+
+def test_rbi_signals_are_named():
+    assert rbi_signals("Reserve Bank of India RBI/2023-24/101") == {"institution", "rbi_reference"}
+    assert rbi_signals("Reserve Bank of India annual report") == {"institution"}
+    assert rbi_signals("Ref.No. DOR rbi.org.in") == {"circular_reference", "url"}
+
+if __name__ == "__main__":
+    test_rbi_document_passes_on_first_page()
+    test_foreign_document_rejected_after_leading_pages()
+    test_signals_accumulate_across_pages()
+    test_rbi_signals_are_named()
+    print("All domain validation tests passed.")
@@ -0,0 +1,54 @@
+import os
+import json
+import tempfile
+import services.extraction_cache as extraction_cache
+from services.pdf_extraction import extractor_version, missing_page_ranges
+from scripts.testing import write_pdf, extracted_pages, patched
+
+def build_pdf(page_count):
+    return write_pdf([f"Reserve Bank of India page {i + 1}" for i in range(page_count)])
+
+def test_missing_page_ranges_skips_cached_pages():
+    assert missing_page_ranges(10, {}) == [(0, 10)]
+    assert missing_page_ranges(10, {1: {}, 2: {}, 6: {}}) == [(2, 5), (6, 10)]
+    assert missing_page_ranges(3, {1: {}, 2: {}, 3: {}}) == []
+
+def test_second_extraction_reads_cache_and_fills_gaps():
+    with patched(extraction_cache, EXTRACTION_CACHE_DIR=tempfile.mkdtemp()):
+        pdf_path = build_pdf(12)
+        pdf_hash = "ab" * 32
+        first = extracted_pages(pdf_path, pdf_hash)
+        doc_dir = os.path.join(extraction_cache.EXTRACTION_CACHE_DIR, "ab", pdf_hash, extractor_version())
+        assert sorted(os.listdir(doc_dir)) == sorted(f"{n}.json" for n in range(1, 13))
+
+        # Mark one cached page and drop another: the marked page must come from cache, the dropped one re-extracted
+        with open(os.path.join(doc_dir, "3.json"), "w") as f:
+            json.dump({"text": "from cache", "page_number": 3, "tables": []}, f)
+        os.remove(os.path.join(doc_dir, "8.json"))
+
+        second = extracted_pages(pdf_path, pdf_hash)
+        assert [p["page_number"] for p in second] == list(range(1, 13))
+        assert second[2]["text"] == "from cache"
+        assert second[7]["text"] == first[7]["text"]
+        assert os.path.exists(os.path.join(doc_dir, "8.json"))
+
+        # Without a hash the cache is bypassed
+        uncached = extracted_pages(pdf_path)
+        assert uncached[2]["text"] == first[2]["text"]
+
+def test_prune_removes_stale_documents():
+    with patched(extraction_cache, EXTRACTION_CACHE_DIR=tempfile.mkdtemp()):
+        extraction_cache.store_pages("cd" * 32, "v1", [{"text": "x", "page_number": 1, "tables": []}])
+        extraction_cache.store_pages("ef" * 32, "v1", [{"text": "y", "page_number": 1, "tables": [],
+                                                        "extraction_fallback": True}])
+        stale_dir = os.path.join(extraction_cache.EXTRACTION_CACHE_DIR, "cd", "cd" * 32)
+        os.utime(stale_dir, (0, 0))
+        assert extraction_cache.load_cached_pages("ef" * 32, "v1", 1) == {}
+        assert extraction_cache.prune_extraction_cache(max_age_days=1) == 1
+        assert not os.path.exists(stale_dir)
+
+if __name__ == "__main__":
+    test_missing_page_ranges_skips_cached_pages()
+    test_second_extraction_reads_cache_and_fills_gaps()
+    test_prune_removes_stale_documents()
+    print("✅ Extraction cache tests passed.")
@@ -0,0 +1,59 @@
+import os
+import glob
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.html_parser as html_parser
+from services.html_parser import parse_html
+from services.scraper_service import parse_updates, extract_summary_text
+from scripts.crawl_rbi_archive import parse_listing_page
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVED_PAGES = sorted(glob.glob(os.path.join(SERVER_DIR, "fixtures", "rbi", "**", "*.*"), recursive=True)
+                     + glob.glob(os.path.join(SERVER_DIR, "*.html")))
+
+def parse_with(backend, html):
+    original = html_parser.HTML_PARSER_BACKEND
+    html_parser.HTML_PARSER_BACKEND = backend
+    try:
+        return (parse_updates(html, "https://www.rbi.org.in", limit=1000),
+                parse_listing_page(html, "https://www.rbi.org.in/Scripts/NotificationUser.aspx"))
+    finally:
+        html_parser.HTML_PARSER_BACKEND = original
+
+def test_backends_parse_saved_pages_identically():
+    assert html_parser.lxml, "lxml is a server dependency (requirements.txt)"
+    pages = [p for p in SAVED_PAGES if p.endswith((".html", ".aspx"))]
+    assert len(pages) >= 8
+    for path in pages:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        assert parse_with("lxml", html) == parse_with("bs4", html), path
+
+def test_page_lookups():
+    html = """<html><head><script>var menu = "Notification";</script></head><body>
+      <div class="nav"><a href="/Scripts/Notifications.aspx">All  notifications</a></div>
+      <table><tr><th>Date</th><th>Title</th></tr>
+        <tr><td>Oct 17, 2026</td><td><a href="/a.pdf" title="A" rel="next"> Credit
+            <b>Risk</b> </a> Oct 17, 2026</td></tr></table></body></html>"""
+    for backend in ("lxml", "bs4"):
+        page = parse_html(html, backend)
+        links = page.links()
+        assert [(l.href, l.text) for l in links] == [("/Scripts/Notifications.aspx", "All notifications"), ("/a.pdf", "Credit Risk")]
+        assert links[1].title == "A" and links[1].rel == "next"
+        assert "Oct 17, 2026" in page.context_text(links[1])
+        assert "All" in page.context_text(links[0])
+        rows = page.rows()
+        assert rows[0] == (["Date", "Title"], [])
+        assert rows[1][0] == ["Oct 17, 2026", "Credit Risk Oct 17, 2026"]
+        assert "var menu" not in page.text() and "Credit" in page.text()
+
+def test_summary_text_from_html_bytes():
+    text, pdf = extract_summary_text(b"<html><body><p>Priority Sector Lending</p></body></html>", "text/html", "http://x/a.aspx")
+    assert pdf is None and "Priority Sector Lending" in text
+
+if __name__ == "__main__":
+    test_backends_parse_saved_pages_identically()
+    test_page_lookups()
+    test_summary_text_from_html_bytes()
+    print("✅ HTML parser tests passed.")
@@ -0,0 +1,50 @@
+import os
+import asyncio
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.ingestion_service as ingestion_service
+from scripts.testing import patched, offline_pipeline, stubbed_supabase, pdf_bytes
+from services.bulk_writer import BulkWriteError
+
+def test_failed_chunk_write_rolls_back_document_and_storage():
+    async def failing_upsert(table, rows, conflict_key):
+        raise BulkWriteError("document_chunks batch 1 failed after 4 attempts")
+
+    with offline_pipeline(ingestion_service), \
+            stubbed_supabase(record_boilerplate_spans=lambda stub, payload: None) as stub:
+        pdf = pdf_bytes([["RBI/2024-25/90 Reserve Bank of India",
+                          "Banks shall report large exposures to the Central Repository every quarter."]])
+        with patched(ingestion_service, bulk_upsert=failing_upsert):
+            assert asyncio.run(ingestion_service.ingest_rbi_document(pdf, "update.pdf", "Large Exposures")) is None
+        assert stub.rows("documents") == []
+        assert stub.storage == {}
+
+        # Nothing pins the circular as ingested: the next sync stores it
+        document_id = asyncio.run(ingestion_service.ingest_rbi_document(pdf, "update.pdf", "Large Exposures"))
+        assert document_id == stub.rows("documents")[0]["id"]
+        assert stub.rows("document_chunks")
+
+def test_concurrent_duplicate_insert_reuses_the_stored_document():
+    original_lookup = ingestion_service.find_duplicate_document
+    lookups = []
+
+    def racing_lookup(**hashes):
+        # The two pre-insert lookups miss, as when another link to the same PDF is mid-ingest
+        lookups.append(hashes)
+        return None if len(lookups) <= 2 else original_lookup(**hashes)
+
+    with offline_pipeline(ingestion_service), \
+            stubbed_supabase(record_boilerplate_spans=lambda stub, payload: None) as stub:
+        stub.unique_keys["documents"] = ["content_hash"]
+        pdf = pdf_bytes([["RBI/2024-25/90 Reserve Bank of India", "Banks shall report large exposures quarterly."]])
+        document_id = asyncio.run(ingestion_service.ingest_rbi_document(pdf, "update.pdf", "Large Exposures"))
+        with patched(ingestion_service, find_duplicate_document=racing_lookup):
+            assert asyncio.run(ingestion_service.ingest_rbi_document(pdf, "copy.pdf", "Large Exposures")) == document_id
+        assert len(stub.rows("documents")) == 1 and stub.rows("documents")[0]["content_hash"]
+        assert len(stub.storage) == 1
+
+if __name__ == "__main__":
+    test_failed_chunk_write_rolls_back_document_and_storage()
+    test_concurrent_duplicate_insert_reuses_the_stored_document()
+    print("✅ Ingestion service tests passed.")
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta
+from services.job_queue import (JobStore, IngestionJobQueue, JobFailed, JOB_COMPLETED, JOB_FAILED,
+                                JOB_RUNNING, JOB_STALE_SECONDS)
+
+def make_store():
+    return JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+
+def test_jobs_run_and_report_progress():
+    async def handler(payload, progress):
+        progress.update(pages_extracted=payload["pages"])
+        progress.increment("rows_inserted", 3)
+        return {"document": {"id": 1}}
+
+    async def handler_rejects(payload, progress):
+        raise JobFailed("Only authentic official RBI circular documents are allowed.")
+
+    async def run():
+        queue = IngestionJobQueue(make_store(), workers=2)
+        queue.register("upload", handler)
+        queue.register("reject", handler_rejects)
+        await queue.start()
+        ok = queue.submit("upload", {"pages": 12})
+        bad = queue.submit("reject", {})
+        await queue._queue.join()
+        await queue.stop()
+        return queue.get(ok), queue.get(bad)
+
+    ok, bad = asyncio.run(run())
+    assert ok["status"] == JOB_COMPLETED
+    assert ok["progress"] == {"pages_extracted": 12, "rows_inserted": 3}
+    assert ok["result"] == {"document": {"id": 1}}
+    assert bad["status"] == JOB_FAILED
+    assert "RBI" in bad["error"]
+
+def test_queued_jobs_survive_restart_and_only_stale_running_jobs_are_recovered():
+    store = make_store()
+    queued = store.create("upload", {})
+    interrupted = store.create("upload", {"filename": "kyc.pdf"})
+    assert store.claim(interrupted, "dead-worker")
+    store.update(interrupted, progress={"document_id": 7, "storage_key": "abc.pdf"},
+                 heartbeat_at=(datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS + 5)).isoformat())
+    live = store.create("upload", {})
+    assert store.claim(live, "live-worker")
+
+    assert store.pending_ids() == [queued]
+    cleaned = []
+    ran = []
+
+    async def handler(payload, progress):
+        ran.append(payload.get("filename"))
+        return {}
+
+    async def run():
+        queue = IngestionJobQueue(store, workers=1)
+        queue.register("upload", handler, on_interrupted=lambda payload, progress: cleaned.append(progress))
+        await queue.start()
+        await queue._queue.join()
+        await queue.stop()
+
+    asyncio.run(run())
+    # The interrupted run's leftovers were cleaned up before it ran again; the live worker's job is untouched
+    assert cleaned == [{"document_id": 7, "storage_key": "abc.pdf"}]
+    assert ran == [None, "kyc.pdf"]
+    assert store.get(interrupted)["status"] == JOB_COMPLETED
+    assert store.get(live)["status"] == JOB_RUNNING
+
+def test_jobs_are_claimed_once_across_workers():
+    store = make_store()
+    job_id = store.create("upload", {})
+    assert store.claim(job_id, "worker-a")
+    assert not store.claim(job_id, "worker-b")
+
+    # Two queues (worker processes) sharing one store both see the job; it runs once
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    shared = JobStore(path)
+    job_id = shared.create("upload", {})
+    runs = []
+
+    async def handler(payload, progress):
+        runs.append(job_id)
+        await asyncio.sleep(0.05)
+        return {}
+
+    async def run():
+        queues = [IngestionJobQueue(JobStore(path), workers=2) for _ in range(2)]
+        for queue in queues:
+            queue.register("upload", handler)
+            await queue.start()
+        for queue in queues:
+            await queue._queue.join()
+            await queue.stop()
+
+    asyncio.run(run())
+    assert runs == [job_id]
+    assert shared.get(job_id)["status"] == JOB_COMPLETED
+
+if __name__ == "__main__":
+    test_jobs_run_and_report_progress()
+    test_queued_jobs_survive_restart_and_only_stale_running_jobs_are_recovered()
+    test_jobs_are_claimed_once_across_workers()
+    print("✅ Job queue tests passed.")
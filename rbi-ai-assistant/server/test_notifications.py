@@ -0,0 +1,96 @@
+import os
+import json
+import asyncio
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.notifications as notifications
+from scripts.testing import stubbed_supabase
+from routes.notifications import get_unread_count, mark_read, mark_all_read
+
+def parse_event(message):
+    lines = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+def with_stub(test):
+    def run():
+        original_hub = notifications._hub
+        notifications._hub = notifications.NotificationHub()
+        try:
+            with stubbed_supabase() as stub:
+                stub.tables["notifications"] = [
+                    {"id": 1, "message": "New circular uploaded: KYC", "type": "upload", "is_read": False, "created_at": "2024-01-01T10:00:00"},
+                    {"id": 2, "message": "New circular uploaded: FEMA", "type": "upload", "is_read": True, "created_at": "2024-01-02T10:00:00"},
+                    {"id": 3, "message": "New circular uploaded: NBFC", "type": "upload", "is_read": False, "created_at": "2024-01-03T10:00:00"},
+                ]
+                stub._next_id["notifications"] = 3
+                test(stub)
+        finally:
+            notifications._hub = original_hub
+    run.__name__ = test.__name__
+    return run
+
+@with_stub
+def test_unread_count_is_kept_in_memory(stub):
+    assert get_unread_count() == {"count": 2}
+    assert len(stub.requests) == 1 and stub.requests[0][0] == "HEAD"
+    # Polls after the first one cost no queries
+    assert get_unread_count() == {"count": 2}
+    assert len(stub.requests) == 1
+
+    notifications.create_notification("New circular uploaded: Basel III", "upload")
+    assert get_unread_count() == {"count": 3}
+    mark_read(1)
+    mark_read(1)  # already read: counted once
+    assert get_unread_count() == {"count": 2}
+    mark_all_read()
+    assert get_unread_count() == {"count": 0}
+    assert [method for method, _, _ in stub.requests].count("HEAD") == 1
+    assert not [n for n in stub.rows("notifications") if not n["is_read"]]
+
+    # Notifications written by another worker are picked up on refresh
+    stub.tables["notifications"].append({"id": 9, "message": "x", "type": "upload", "is_read": False})
+    assert notifications.get_notification_hub().refresh() == 1
+
+@with_stub
+def test_stream_pushes_new_notifications_and_counts(stub):
+    hub = notifications.get_notification_hub()
+
+    async def scenario():
+        stream = hub.subscribe()
+        assert parse_event(await stream.__anext__()) == ("unread-count", {"count": 2})
+        assert hub.subscriber_count == 1
+        # Written from a worker thread, as the upload and scraper paths do
+        await asyncio.to_thread(notifications.create_notification, "2 new RBI updates, latest: Repo rate", "rbi_update")
+        assert parse_event(await stream.__anext__()) == ("unread-count", {"count": 3})
+        event, data = parse_event(await stream.__anext__())
+        assert event == "notification" and data["message"].startswith("2 new RBI updates") and data["id"] == 4
+        await asyncio.to_thread(mark_all_read)
+        assert parse_event(await stream.__anext__()) == ("unread-count", {"count": 0})
+        await stream.aclose()
+        assert hub.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+def test_idle_stream_sends_keepalives():
+    hub = notifications.NotificationHub()
+    hub.set_unread(5)
+    original_keepalive = notifications.NOTIFICATION_KEEPALIVE_SECONDS
+    notifications.NOTIFICATION_KEEPALIVE_SECONDS = 0.05
+
+    async def scenario():
+        stream = hub.subscribe()
+        assert parse_event(await stream.__anext__()) == ("unread-count", {"count": 5})
+        assert await stream.__anext__() == ": keepalive\n\n"
+        await stream.aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        notifications.NOTIFICATION_KEEPALIVE_SECONDS = original_keepalive
+
+if __name__ == "__main__":
+    test_unread_count_is_kept_in_memory()
+    test_stream_pushes_new_notifications_and_counts()
+    test_idle_stream_sends_keepalives()
+    print("✅ Notification tests passed.")
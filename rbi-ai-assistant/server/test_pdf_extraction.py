@@ -0,0 +1,33 @@
+from services.pdf_extraction import plan_page_ranges, get_extraction_executor, shutdown_extraction_executor
+from scripts.testing import write_pdf, extracted_pages
+
+def build_pdf(page_count):
+    return write_pdf([f"Reserve Bank of India page {i + 1}" for i in range(page_count)])
+
+def test_plan_page_ranges_covers_every_page():
+    ranges = plan_page_ranges(37, workers=4, min_pages=8)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 37
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert len(ranges) == 4
+    assert plan_page_ranges(5, workers=4, min_pages=8) == [(0, 5)]
+    assert plan_page_ranges(0) == []
+
+def test_extracted_pages_keep_page_order():
+    pages = extracted_pages(build_pdf(20))
+    assert [p["page_number"] for p in pages] == list(range(1, 21))
+    assert "page 7" in pages[6]["text"]
+
+def test_extraction_workers_are_spawned_not_forked():
+    shutdown_extraction_executor()
+    try:
+        assert get_extraction_executor()._mp_context.get_start_method() == "spawn"
+        pages = extracted_pages(build_pdf(20))
+        assert len(pages) == 20 and "page 20" in pages[-1]["text"]
+    finally:
+        shutdown_extraction_executor()
+
+if __name__ == "__main__":
+    test_plan_page_ranges_covers_every_page()
+    test_extracted_pages_keep_page_order()
+    test_extraction_workers_are_spawned_not_forked()
+    print("✅ Extraction tests passed.")
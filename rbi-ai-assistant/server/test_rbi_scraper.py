@@ -0,0 +1,213 @@
+import os
+import time
+import asyncio
+import threading
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.scraper_service as scraper_service
+import services.summary_cache as summary_cache
+from scripts.testing import stubbed_supabase, pdf_bytes
+from scripts.rbi_fixture_server import RBIFixtureServer
+from services.scraper_service import RBIScraperService, parse_updates
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "rbi")
+LISTING_PATH = "/Scripts/BS_ViewWasNewResponse.aspx"
+
+def circular_pdf(title):
+    return pdf_bytes([["RBI/2026-27/118 Reserve Bank of India", title]])
+
+def start_fixture_server(delay=0.0):
+    server = RBIFixtureServer(delay=delay)
+    server.add_directory(FIXTURES_DIR)
+    server.add("/rdocs/notification/PDFs/NT118CRE17102026.PDF", circular_pdf("Credit Risk Management Amendment"))
+    server.add("/rdocs/notification/PDFs/NT117KYC16102026.PDF", circular_pdf("Know Your Customer Amendment"))
+    server.add("/Scripts/NotificationUser.aspx?Id=12861&Mode=0",
+               "<html><body><p>Priority Sector Lending targets are revised for urban co-operative banks.</p></body></html>")
+    return server.start()
+
+def test_parse_updates_from_listing_fixture():
+    with open(os.path.join(FIXTURES_DIR, LISTING_PATH.lstrip("/")), encoding="utf-8") as f:
+        updates = parse_updates(f.read(), "http://rbi.test", limit=10)
+    assert [u["url"] for u in updates] == [
+        "http://rbi.test/rdocs/notification/PDFs/NT118CRE17102026.PDF",
+        "http://rbi.test/rdocs/notification/PDFs/NT117KYC16102026.PDF",
+        "http://rbi.test/Scripts/NotificationUser.aspx?Id=12861&Mode=0",
+        "http://rbi.test/Scripts/BS_PressReleaseDisplay.aspx?prid=59012",
+    ]
+    assert updates[0]["date"] == "Oct 17, 2026"
+    # No regulatory links: falls back to the first link of each table row
+    rows = "".join(f"<tr><td>Oct {n}, 2026</td><td><a href='/Scripts/Item{n}.aspx'>{'Untitled row ' * 2}{n}</a></td></tr>"
+                   for n in range(1, 4))
+    fallback = parse_updates(f"<table>{rows}</table>", "http://rbi.test", limit=2)
+    assert [u["date"] for u in fallback] == ["Oct 1, 2026", "Oct 2, 2026"]
+
+def test_sync_fetches_updates_concurrently_and_skips_known():
+    fixture_server = start_fixture_server(delay=0.2)
+    original_ingest = scraper_service.ingest_rbi_document
+    ingested = []
+
+    async def fake_ingest(pdf_bytes, filename, title, category="Live Update"):
+        assert pdf_bytes.startswith(b"%PDF")
+        ingested.append(title)
+        return len(ingested)
+
+    scraper_service.ingest_rbi_document = fake_ingest
+    try:
+        with stubbed_supabase() as stub:
+            scraper = RBIScraperService(base_url=fixture_server.url, concurrency=2)
+            assert asyncio.run(scraper.sync_updates()) == 4
+            rows = stub.rows("rbi_updates")
+            assert len(rows) == 4
+            assert sorted(ingested) == ["Master Direction - Know Your Customer (KYC) Direction - Amendment",
+                                        "Reserve Bank of India (Credit Risk Management) Amendment Directions, 2026"]
+            assert sum(1 for r in rows if r["document_id"]) == 2
+            # The four update fetches overlapped, but never beyond the configured limit
+            assert fixture_server.max_in_flight == 2
+            assert scraper.client is None
+
+            assert stub.rows("scraper_sources")[0]["content_hash"]
+
+            # Second run: same listing body, so nothing is parsed or fetched beyond the listing
+            fixture_server.requests.clear()
+            assert asyncio.run(scraper.sync_updates()) == 0
+            assert scraper.last_sync["listing_changed"] is False
+            assert len(stub.rows("rbi_updates")) == 4
+            assert fixture_server.paths_requested() == [LISTING_PATH]
+    finally:
+        scraper_service.ingest_rbi_document = original_ingest
+        fixture_server.stop()
+
+def test_conditional_listing_fetch_reports_bytes_saved():
+    fixture_server = start_fixture_server()
+    original_ingest = scraper_service.ingest_rbi_document
+
+    async def fake_ingest(pdf_bytes, filename, title, category="Live Update"):
+        return None
+
+    scraper_service.ingest_rbi_document = fake_ingest
+    try:
+        with stubbed_supabase() as stub:
+            listing = fixture_server.routes[LISTING_PATH]["body"]
+            fixture_server.add(LISTING_PATH, listing, headers={"ETag": '"v1"', "Last-Modified": "Fri, 16 Oct 2026 10:00:00 GMT"})
+            scraper = RBIScraperService(base_url=fixture_server.url)
+            assert asyncio.run(scraper.sync_updates()) == 4
+            state = stub.rows("scraper_sources")[0]
+            assert state["etag"] == '"v1"' and state["content_length"] == len(listing)
+
+            # Unchanged: the server answers 304 and the listing body is not transferred again
+            sent = fixture_server.bytes_sent
+            fixture_server.requests.clear()
+            assert asyncio.run(scraper.sync_updates()) == 0
+            assert scraper.last_sync == {"listing_changed": False, "bytes_downloaded": 0,
+                                         "bytes_saved": len(listing), "new_updates": 0}
+            assert fixture_server.bytes_sent == sent
+            assert fixture_server.paths_requested() == [LISTING_PATH]
+
+            # A new listing version is fetched, parsed and only its new entry processed
+            extra = b'<tr><td><a href="/Scripts/NotificationUser.aspx?Id=12870&amp;Mode=0">Basel III Capital Regulations - Review</a></td></tr>'
+            fixture_server.add(LISTING_PATH, listing.replace(b"</table>", extra + b"</table>"), headers={"ETag": '"v2"'})
+            fixture_server.add("/Scripts/NotificationUser.aspx?Id=12870&Mode=0", "<p>Basel III review.</p>")
+            assert asyncio.run(scraper.sync_updates()) == 5
+            assert scraper.last_sync["listing_changed"] is True
+            assert scraper.last_sync["new_updates"] == 1
+            assert len(stub.rows("rbi_updates")) == 5
+            assert stub.rows("scraper_sources")[0]["etag"] == '"v2"'
+    finally:
+        scraper_service.ingest_rbi_document = original_ingest
+        fixture_server.stop()
+
+def test_known_urls_are_looked_up_in_batches_and_stored_once():
+    with stubbed_supabase() as stub:
+        urls = [f"http://rbi.test/Scripts/NotificationUser.aspx?Id={n}&Mode=0" for n in range(250)]
+        for url in urls[::50]:
+            scraper_service.store_update({"title": "Known", "url": url, "pdf_url": url})
+        scraper_service.store_update({"title": "Known again", "url": urls[0], "pdf_url": urls[0]})
+        assert len(stub.rows("rbi_updates")) == 5
+        assert stub.rows("rbi_updates")[0]["title"] == "Known"
+        assert scraper_service.find_known_urls(urls) == set(urls[::50])
+        assert scraper_service.find_known_urls([]) == set()
+
+class FakeGroq:
+    """Slow stand-in for the Groq client that records concurrency and what it was asked."""
+
+    def __init__(self, stub, delay=0.3):
+        self.stub = stub
+        self.delay = delay
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.snapshots = []
+        self._lock = threading.Lock()
+        self.chat = self
+        self.completions = self
+
+    def create(self, messages, **kwargs):
+        with self._lock:
+            self.prompts.append(messages[0]["content"])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+            self.snapshots.append({r["pdf_url"]: r["summary"] for r in self.stub.rows("rbi_updates")})
+        message = type("Message", (), {"content": f"Summary {len(self.prompts)}."})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})]})
+
+def test_summaries_run_concurrently_after_storing_and_are_cached():
+    fixture_server = start_fixture_server()
+    # The press release carries the same text as the notification page: one summary for both
+    fixture_server.add("/Scripts/BS_PressReleaseDisplay.aspx?prid=59012",
+                       fixture_server.routes["/Scripts/NotificationUser.aspx?Id=12861&Mode=0"]["body"])
+    original_ingest = scraper_service.ingest_rbi_document
+    original_concurrency = scraper_service.SUMMARY_CONCURRENCY
+    scraper_service.SUMMARY_CONCURRENCY = 2
+    summary_cache._memo.clear()
+
+    async def fake_ingest(pdf_bytes, filename, title, category="Live Update"):
+        return None
+
+    scraper_service.ingest_rbi_document = fake_ingest
+    try:
+        with stubbed_supabase() as stub:
+            groq = FakeGroq(stub)
+            scraper = RBIScraperService(base_url=fixture_server.url)
+            scraper.groq_client = groq
+            assert asyncio.run(scraper.sync_updates()) == 4
+            assert len(groq.prompts) == 3
+            assert groq.max_in_flight == 2
+            # Every update was stored before the first summary came back
+            assert len(groq.snapshots[0]) == 4 and set(groq.snapshots[0].values()) == {None}
+            rows = stub.rows("rbi_updates")
+            assert all(r["summary"].startswith("Summary") for r in rows)
+            by_url = {r["pdf_url"].split("/")[-1]: r["summary"] for r in rows}
+            assert by_url["NotificationUser.aspx?Id=12861&Mode=0"] == by_url["BS_PressReleaseDisplay.aspx?prid=59012"]
+            assert len(stub.rows("summary_cache")) == 3
+
+            # The same circular republished under a new link: summary comes from the cache (new process)
+            summary_cache._memo.clear()
+            listing = fixture_server.routes[LISTING_PATH]["body"]
+            extra = b'<tr><td><a href="/rdocs/notification/PDFs/NT118CRE17102026R.PDF">Credit Risk Management Amendment Directions (reissued)</a></td></tr>'
+            fixture_server.add(LISTING_PATH, listing.replace(b"</table>", extra + b"</table>"))
+            fixture_server.add("/rdocs/notification/PDFs/NT118CRE17102026R.PDF",
+                               fixture_server.routes["/rdocs/notification/PDFs/NT118CRE17102026.PDF"]["body"])
+            scraper = RBIScraperService(base_url=fixture_server.url)
+            scraper.groq_client = groq
+            assert asyncio.run(scraper.sync_updates()) == 5
+            assert len(groq.prompts) == 3
+            assert scraper.last_sync["summaries_cached"] == 1
+            by_url = {r["pdf_url"].split("/")[-1]: r["summary"] for r in stub.rows("rbi_updates")}
+            assert by_url["NT118CRE17102026R.PDF"] == by_url["NT118CRE17102026.PDF"]
+    finally:
+        scraper_service.ingest_rbi_document = original_ingest
+        scraper_service.SUMMARY_CONCURRENCY = original_concurrency
+        summary_cache._memo.clear()
+        fixture_server.stop()
+
+if __name__ == "__main__":
+    test_parse_updates_from_listing_fixture()
+    test_sync_fetches_updates_concurrently_and_skips_known()
+    test_conditional_listing_fetch_reports_bytes_saved()
+    test_known_urls_are_looked_up_in_batches_and_stored_once()
+    test_summaries_run_concurrently_after_storing_and_are_cached()
+    print("✅ RBI scraper tests passed.")
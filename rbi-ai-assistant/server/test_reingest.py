@@ -0,0 +1,117 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.upload_pipeline as upload_pipeline
+from scripts.testing import Progress, offline_pipeline, stubbed_supabase, write_pdf, circular_pages
+from services.reingest import run_reingest_pipeline, diff_pages, storage_key_from_url, find_amended_document
+
+def swap_document_pages(stub, args):
+    """In-memory stand-in for the swap_document_pages SQL function (db/schema_page_revisions.sql)."""
+    doc_id = args["p_document_id"]
+    moved_from = {m["from"] for m in args["p_moves"]}
+    dropped = (set(args["p_removed_pages"]) | set(args["p_replaced_pages"])) - moved_from
+    for table in ("document_chunks", "document_tables"):
+        rows = [r for r in stub.rows(table) if not (r["document_id"] == doc_id and r["page_number"] in dropped)]
+        targets = {m["from"]: m["to"] for m in args["p_moves"]}
+        for r in rows:
+            if r["document_id"] == doc_id and r["page_number"] in targets:
+                r["page_number"] = -targets[r["page_number"]]
+        for r in rows:
+            if r["document_id"] == doc_id and r["page_number"] < 0:
+                r["page_number"] = -r["page_number"]
+        stub.tables[table] = rows
+    base = max([r["chunk_index"] for r in stub.rows("document_chunks") if r["document_id"] == doc_id], default=-1) + 1
+    for i, chunk in enumerate(args["p_chunks"]):
+        stub.tables["document_chunks"].append(dict(chunk, document_id=doc_id, chunk_index=base + i))
+    for table in args["p_tables"]:
+        stub.tables["document_tables"].append(dict(table, document_id=doc_id))
+    stub.tables["document_pages"] = [r for r in stub.rows("document_pages") if r["document_id"] != doc_id] + \
+        [dict(p, document_id=doc_id) for p in args["p_pages"]]
+    for doc in stub.rows("documents"):
+        if doc["id"] == doc_id:
+            doc.update(args["p_document"])
+    stub.tables.setdefault("document_revisions", []).append({"document_id": doc_id, "changed_pages": args["p_replaced_pages"]})
+    return len(stub.rows("document_revisions"))
+
+def payload_for(path, **extra):
+    with open(path, "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+    return dict({"spool_path": path, "filename": os.path.basename(path), "title": "Master Direction",
+                 "category": "General", "sha256": sha256, "file_size": os.path.getsize(path), "keep_source": True}, **extra)
+
+def test_diff_pages_classifies_changes():
+    old = {1: "a", 2: "b", 3: "c", 4: "d"}
+    diff = diff_pages(old, ["a", "x", "b", "c", "d"])
+    assert diff["unchanged"] == [1]
+    assert diff["changed"] == [2]
+    assert diff["moved"] == [{"from": 2, "to": 3}, {"from": 3, "to": 4}, {"from": 4, "to": 5}]
+    assert diff["removed"] == []
+    diff = diff_pages(old, ["a", "c"])
+    assert diff["removed"] == [2, 4] and diff["moved"] == [{"from": 3, "to": 2}]
+
+def test_blank_pages_never_match_or_move():
+    # Blank in both versions: kept in place; a blank page elsewhere is not a move
+    diff = diff_pages({1: "a", 2: None, 3: None}, ["a", None, "b", None])
+    assert diff["unchanged"] == [1, 2] and diff["moved"] == [] and diff["changed"] == [3, 4]
+    with stubbed_supabase() as stub:
+        stub.tables["document_pages"] = [{"document_id": 1, "page_number": n, "page_hash": h}
+                                         for n, h in enumerate(["a", None, None, None], start=1)]
+        # Three blank pages and one page of new text: nothing to match on
+        assert find_amended_document([None, None, None, "z"]) == (None, 0.0)
+        assert find_amended_document([None, None]) == (None, 0.0)
+        assert find_amended_document([None, "a", None]) == (1, 1.0)
+
+def test_storage_key_from_url():
+    url = "https://x.supabase.co/storage/v1/object/public/rbi-documents/abc.pdf?"
+    assert storage_key_from_url(url) == "abc.pdf"
+    assert storage_key_from_url(None) is None
+
+def test_amended_circular_reembeds_only_changed_pages():
+    with offline_pipeline(upload_pipeline), \
+            stubbed_supabase(record_boilerplate_spans=lambda stub, payload: None,
+                             swap_document_pages=swap_document_pages) as stub:
+        tmp = tempfile.mkdtemp()
+        paragraphs = [f"Reserve Bank of India directions, paragraph {n}: banks shall report exposure {n * 7}."
+                      for n in range(1, 13)]
+        original_path = write_pdf(circular_pages(paragraphs), os.path.join(tmp, "md_v1.pdf"))
+        result = asyncio.run(upload_pipeline.run_upload_pipeline(payload_for(original_path), Progress()))
+        document_id = result["document"]["id"]
+        assert len(stub.rows("document_pages")) == 12
+
+        # Amendment: paragraph 5 edited, a new page inserted after page 8
+        amended = list(paragraphs)
+        amended[4] = "Reserve Bank of India directions, paragraph 5 (amended): exposure limit revised to 15 percent."
+        amended.insert(8, "Reserve Bank of India directions, new paragraph 8A: climate risk disclosures.")
+        amended_path = write_pdf(circular_pages(amended), os.path.join(tmp, "md_v2.pdf"))
+
+        progress = Progress()
+        revision = asyncio.run(run_reingest_pipeline(payload_for(amended_path), progress))
+        assert revision["document"]["id"] == document_id
+        assert revision["changed_pages"] == [5, 9]
+        assert revision["moved_pages"] == [{"from": n, "to": n + 1} for n in range(9, 13)]
+        assert revision["removed_pages"] == []
+        assert progress.values["pages_extracted"] == 2
+
+        chunks = [r for r in stub.rows("document_chunks") if r["document_id"] == document_id]
+        assert {r["page_number"] for r in chunks} == set(range(1, 14))
+        assert len({r["chunk_index"] for r in chunks}) == len(chunks)
+        page5 = " ".join(r["content"] for r in chunks if r["page_number"] == 5)
+        assert "amended" in page5 and "exposure 35" not in page5
+        assert "paragraph 12" in " ".join(r["content"] for r in chunks if r["page_number"] == 13)
+        assert len(stub.rows("document_pages")) == 13
+        assert stub.rows("documents")[0]["total_pages"] == 13
+
+        # Re-submitting the same amendment is a no-op
+        again = asyncio.run(run_reingest_pipeline(payload_for(amended_path), Progress()))
+        assert again["changed_pages"] == []
+
+if __name__ == "__main__":
+    test_diff_pages_classifies_changes()
+    test_blank_pages_never_match_or_move()
+    test_storage_key_from_url()
+    test_amended_circular_reembeds_only_changed_pages()
+    print("✅ Re-ingest tests passed.")
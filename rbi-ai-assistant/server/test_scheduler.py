@@ -0,0 +1,71 @@
+import os
+import time
+import asyncio
+import tempfile
+from services.scheduler import Scheduler, JobLock
+
+def make_scheduler(state_dir, calls, name="rbi_scraper", exclusive=True, fail=False):
+    async def job():
+        calls.append(name)
+        await asyncio.sleep(0.05)
+        if fail:
+            raise RuntimeError("listing unavailable")
+
+    scheduler = Scheduler(state_dir=state_dir, tick_seconds=0.01)
+    scheduler.add_job(name, job, interval=3600, jitter=600, exclusive=exclusive)
+    return scheduler
+
+def test_job_runs_once_across_workers_and_restarts():
+    state_dir = tempfile.mkdtemp()
+    calls = []
+
+    async def run():
+        # Two workers sharing the state directory tick at the same moment
+        first, second = make_scheduler(state_dir, calls), make_scheduler(state_dir, calls)
+        ran = await asyncio.gather(first.run_job("rbi_scraper"), second.run_job("rbi_scraper"))
+        # A restarted worker reads the persisted schedule and finds nothing due
+        restarted = make_scheduler(state_dir, calls)
+        return ran, await restarted.run_due_jobs(), restarted.load_state("rbi_scraper")
+
+    ran, started, state = asyncio.run(run())
+    assert sorted(ran) == [False, True]
+    assert calls == ["rbi_scraper"]
+    assert started == []
+    assert state["last_status"] == "completed"
+    assert time.time() + 3600 - 5 <= state["next_run"] <= time.time() + 3600 + 600
+
+def test_locked_job_is_skipped_and_failures_are_recorded():
+    state_dir = tempfile.mkdtemp()
+    calls = []
+    scheduler = make_scheduler(state_dir, calls, fail=True)
+    lock = JobLock(os.path.join(state_dir, "rbi_scraper.lock"))
+    assert lock.acquire()
+    assert asyncio.run(scheduler.run_job("rbi_scraper")) is False
+    lock.release()
+
+    assert asyncio.run(scheduler.run_job("rbi_scraper")) is True
+    state = scheduler.load_state("rbi_scraper")
+    assert state["last_status"] == "failed" and "listing unavailable" in state["last_error"]
+    assert not scheduler.is_due("rbi_scraper")
+
+def test_per_process_jobs_run_in_every_worker():
+    state_dir = tempfile.mkdtemp()
+    calls = []
+
+    async def run():
+        workers = [make_scheduler(state_dir, calls, name="cache_warming", exclusive=False) for _ in range(2)]
+        for worker in workers:
+            await worker.start()
+        await asyncio.sleep(0.2)
+        for worker in workers:
+            await worker.stop()
+
+    asyncio.run(run())
+    assert calls == ["cache_warming", "cache_warming"]
+    assert not os.path.exists(os.path.join(state_dir, "cache_warming.json"))
+
+if __name__ == "__main__":
+    test_job_runs_once_across_workers_and_restarts()
+    test_locked_job_is_skipped_and_failures_are_recorded()
+    test_per_process_jobs_run_in_every_worker()
+    print("✅ Scheduler tests passed.")
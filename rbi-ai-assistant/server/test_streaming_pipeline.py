@@ -0,0 +1,120 @@
+import os
+import asyncio
+import hashlib
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+import services.upload_pipeline as upload_pipeline
+from scripts.testing import Progress, patched, offline_pipeline, stubbed_supabase, write_pdf, circular_pages
+from services.boilerplate import BoilerplateFilter
+from services.job_queue import JobFailed
+
+def build_circular(page_count):
+    return write_pdf(circular_pages([f"Reserve Bank of India directions, paragraph {n + 1}: banks shall report exposure {n * 7}."
+                                     for n in range(page_count)]))
+
+def with_stub(test):
+    def run():
+        with offline_pipeline(upload_pipeline), \
+                stubbed_supabase(record_boilerplate_spans=lambda stub, payload: None) as stub:
+            test(stub)
+    run.__name__ = test.__name__
+    return run
+
+@with_stub
+def test_stream_buffers_a_bounded_number_of_batches(stub):
+    progress = Progress()
+    state = {"produced": 0, "max_ahead": 0}
+
+    async def page_batches():
+        for b in range(12):
+            state["produced"] += 1
+            state["max_ahead"] = max(state["max_ahead"], state["produced"] - progress.values.get("pages_extracted", 0))
+            yield [{"text": f"Clause {b}. Banks shall comply with item {b}.", "page_number": b + 1, "tables": []}]
+
+    next_index = asyncio.run(upload_pipeline.stream_pages_to_index(7, page_batches(), BoilerplateFilter(set()), progress))
+    rows = stub.rows("document_chunks")
+    assert next_index == len(rows) == 12
+    assert sorted(r["chunk_index"] for r in rows) == list(range(12))
+    assert [r["page_number"] for r in sorted(rows, key=lambda r: r["chunk_index"])] == list(range(1, 13))
+    # Queue holds STREAM_QUEUE_BATCHES, plus one being consumed and one waiting to be queued
+    assert state["max_ahead"] <= upload_pipeline.STREAM_QUEUE_BATCHES + 2
+
+@with_stub
+def test_upload_pipeline_streams_pages_into_the_index(stub):
+    pdf_path = build_circular(30)
+    with open(pdf_path, "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+    payload = {"spool_path": pdf_path, "filename": "circular.pdf", "title": "Streaming test",
+               "category": "General", "sha256": sha256, "file_size": os.path.getsize(pdf_path), "keep_source": True}
+    progress = Progress()
+
+    result = asyncio.run(upload_pipeline.run_upload_pipeline(payload, progress))
+    document_id = result["document"]["id"]
+    chunks = sorted(stub.rows("document_chunks"), key=lambda r: r["chunk_index"])
+    assert progress.values["pages_extracted"] == 30
+    assert all(r["document_id"] == document_id for r in chunks)
+    assert [r["chunk_index"] for r in chunks] == list(range(len(chunks)))
+    assert {r["page_number"] for r in chunks} == set(range(1, 31))
+    # Running header kept once; paragraph text on every page
+    assert sum("DOR.STR.REC.12" in r["content"] for r in chunks) == 1
+    assert sum("banks shall report exposure" in r["content"] for r in chunks) == 30
+    assert os.path.exists(pdf_path)
+
+@with_stub
+def test_interrupted_upload_is_discarded_before_the_rerun(stub):
+    pdf_path = build_circular(3)
+    with open(pdf_path, "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+    payload = {"spool_path": pdf_path, "filename": "circular.pdf", "title": "Recovery test",
+               "category": "General", "sha256": sha256, "file_size": os.path.getsize(pdf_path), "keep_source": True}
+    # A run whose worker died after the insert: its row and stored PDF are left behind
+    progress = Progress()
+    asyncio.run(upload_pipeline.run_upload_pipeline(payload, progress))
+    assert progress.values["document_id"] == stub.rows("documents")[0]["id"]
+    assert any(key.endswith(progress.values["storage_key"]) for key in stub.storage)
+
+    upload_pipeline.discard_interrupted_upload(payload, progress.values)
+    assert stub.rows("documents") == []
+    assert not any(key.endswith(progress.values["storage_key"]) for key in stub.storage)
+
+    result = asyncio.run(upload_pipeline.run_upload_pipeline(payload, Progress()))
+    assert not result.get("duplicate") and len(stub.rows("documents")) == 1
+
+@with_stub
+def test_duplicate_insert_reuses_the_stored_document_or_fails(stub):
+    stub.unique_keys["documents"] = ["content_hash"]
+    pdf_path = build_circular(3)
+    with open(pdf_path, "rb") as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+    payload = {"spool_path": pdf_path, "filename": "circular.pdf", "title": "Race test",
+               "category": "General", "sha256": sha256, "file_size": os.path.getsize(pdf_path), "keep_source": True}
+    document = asyncio.run(upload_pipeline.run_upload_pipeline(payload, Progress()))["document"]
+    original_lookup = upload_pipeline.find_duplicate_document
+    lookups = []
+
+    def racing_lookup(**hashes):
+        # The two pre-insert lookups miss, as when the same file is queued twice
+        lookups.append(hashes)
+        return None if len(lookups) <= 2 else original_lookup(**hashes)
+
+    with patched(upload_pipeline, find_duplicate_document=racing_lookup):
+        result = asyncio.run(upload_pipeline.run_upload_pipeline(payload, Progress()))
+    assert result["duplicate"] and result["document"]["id"] == document["id"]
+    assert len(stub.rows("documents")) == 1 and len(stub.storage) == 1
+
+    # The conflicting row cannot be read back: fail instead of inserting it again without hashes
+    with patched(upload_pipeline, find_duplicate_document=lambda **hashes: None):
+        try:
+            asyncio.run(upload_pipeline.run_upload_pipeline(payload, Progress()))
+            assert False, "expected JobFailed"
+        except JobFailed:
+            pass
+    assert len(stub.rows("documents")) == 1 and len(stub.storage) == 1
+
+if __name__ == "__main__":
+    test_stream_buffers_a_bounded_number_of_batches()
+    test_upload_pipeline_streams_pages_into_the_index()
+    test_interrupted_upload_is_discarded_before_the_rerun()
+    test_duplicate_insert_reuses_the_stored_document_or_fails()
+    print("✅ Streaming pipeline tests passed.")
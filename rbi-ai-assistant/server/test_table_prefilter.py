@@ -0,0 +1,50 @@
+import os
+import tempfile
+import fitz
+import pdfplumber
+from services.pdf_extraction import page_may_contain_tables, extract_page_range
+
+def build_pdf():
+    doc = fitz.open()
+    prose = doc.new_page()
+    prose.insert_text((72, 72), "Reserve Bank of India - prose only page")
+    prose.draw_line((72, 90), (500, 90))  # underline / separator, not a table
+
+    table_page = doc.new_page()
+    table_page.insert_text((72, 60), "Loan limits")
+    for row in range(4):
+        y = 80 + row * 20
+        table_page.draw_line((72, y), (372, y))
+        for col, label in enumerate(["Category", "Loan limit", "Cost"]):
+            if row < 3:
+                table_page.insert_text((76 + col * 100, y + 14), f"{label} {row}")
+    for col in range(4):
+        x = 72 + col * 100
+        table_page.draw_line((x, 80), (x, 140))
+
+    path = os.path.join(tempfile.mkdtemp(), "prefilter.pdf")
+    doc.save(path)
+    doc.close()
+    return path
+
+def test_prefilter_agrees_with_pdfplumber():
+    path = build_pdf()
+    with fitz.open(path) as fitz_doc, pdfplumber.open(path) as plub_doc:
+        assert not page_may_contain_tables(fitz_doc[0])
+        assert plub_doc.pages[0].extract_tables() == []
+        assert page_may_contain_tables(fitz_doc[1])
+        assert plub_doc.pages[1].extract_tables()
+
+def test_pymupdf_mode_matches_hybrid_tables():
+    path = build_pdf()
+    hybrid = extract_page_range(path, 0, 2, "prefilter.pdf", "hybrid")
+    single = extract_page_range(path, 0, 2, "prefilter.pdf", "pymupdf")
+    assert [len(p["tables"]) for p in single] == [len(p["tables"]) for p in hybrid] == [0, 1]
+    assert single[1]["tables"][0]["columns"] == hybrid[1]["tables"][0]["columns"]
+    assert single[1]["tables"][0]["rows"] == hybrid[1]["tables"][0]["rows"]
+    assert "[Tabular Data extracted]" in single[1]["text"]
+
+if __name__ == "__main__":
+    test_prefilter_agrees_with_pdfplumber()
+    test_pymupdf_mode_matches_hybrid_tables()
+    print("✅ Pre-filter test passed.")